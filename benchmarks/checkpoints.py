@@ -0,0 +1,115 @@
+"""Checkpoint write amplification benchmark: full snapshots vs delta checkpoints
+
+Replays one long scripted conversation through a checkpointed graph in each
+mode and totals the bytes the in-memory saver stored: checkpoints, channel
+blobs and pending writes. Write amplification is bytes written over the
+size of the final message history.
+
+Usage:
+    python benchmarks/checkpoints.py
+    python benchmarks/checkpoints.py --turns 80 --snapshot-every 50 --json
+"""
+from typing import Dict, Any
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from e2e import CONVERSATION, lift_token_budgets  # also sets up sys.path and quiet logging
+
+from langchain_core.messages import HumanMessage
+from ghl_agent.fakes import installed_fakes
+
+MODES = {"full": False, "delta": True}
+
+
+def stored_bytes(saver) -> Dict[str, int]:
+    """Bytes held by an InMemorySaver, by kind"""
+    return {
+        "checkpoints": sum(
+            len(checkpoint[1]) + len(metadata[1])
+            for namespaces in saver.storage.values()
+            for checkpoints in namespaces.values()
+            for checkpoint, metadata, _ in checkpoints.values()
+        ),
+        "blobs": sum(len(blob[1]) for blob in saver.blobs.values()),
+        "writes": sum(len(write[2][1]) for writes in saver.writes.values() for write in writes.values())
+    }
+
+
+async def run_mode(delta: bool, turns: int, snapshot_every: int, load_repeat: int) -> Dict[str, Any]:
+    from ghl_agent.agent import graph as graph_module
+    from ghl_agent.agent.checkpointing import delta_state_schema
+
+    with installed_fakes():
+        if delta:
+            workflow = graph_module.build_workflow(delta_state_schema(graph_module.State, snapshot_every=snapshot_every))
+        else:
+            workflow = graph_module.workflow
+        checkpointer, _ = graph_module.get_checkpointer_with_store()
+        graph = workflow.compile(checkpointer=checkpointer)
+        config = {"configurable": {"thread_id": "bench-thread"}}
+
+        started = time.perf_counter()
+        for turn in range(turns):
+            await graph.ainvoke({
+                "messages": [HumanMessage(content=CONVERSATION[turn % len(CONVERSATION)])],
+                "contact_id": "bench-contact",
+                "conversation_id": "bench-conversation"
+            }, config)
+        run_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(load_repeat):
+            state = await graph.aget_state(config)
+        load_seconds = (time.perf_counter() - started) / load_repeat
+
+    messages = state.values["messages"]
+    history_bytes = len(checkpointer.serde.dumps_typed(list(messages))[1])
+    stored = stored_bytes(checkpointer)
+    total = sum(stored.values())
+    return {
+        **stored,
+        "total_bytes": total,
+        "bytes_per_turn": round(total / turns),
+        "history_bytes": history_bytes,
+        "write_amplification": round(total / history_bytes, 1),
+        "messages": len(messages),
+        "load_ms": round(load_seconds * 1000, 2),
+        "turn_ms": round(run_seconds / turns * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint write amplification benchmark")
+    parser.add_argument("--turns", type=int, default=40, help="Conversation turns on one thread")
+    parser.add_argument("--snapshot-every", type=int, default=20, help="Delta mode full snapshot interval (updates)")
+    parser.add_argument("--load-repeat", type=int, default=20, help="State loads timed at the end")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    lift_token_budgets()
+    results = {
+        mode: asyncio.run(run_mode(delta, args.turns, args.snapshot_every, args.load_repeat))
+        for mode, delta in MODES.items()
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{args.turns} turns, delta snapshots every {args.snapshot_every} updates")
+    print(f"{'mode':<7}{'total KiB':>11}{'B/turn':>9}{'blobs':>10}{'writes':>10}{'ckpts':>10}"
+          f"{'amplif.':>9}{'load ms':>9}{'turn ms':>9}")
+    for mode, result in results.items():
+        print(f"{mode:<7}{result['total_bytes'] / 1024:>11.1f}{result['bytes_per_turn']:>9}{result['blobs']:>10}"
+              f"{result['writes']:>10}{result['checkpoints']:>10}{result['write_amplification']:>9}"
+              f"{result['load_ms']:>9}{result['turn_ms']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
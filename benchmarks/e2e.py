@@ -0,0 +1,279 @@
+"""Offline end-to-end benchmark for the agent graph and the webhook app
+
+Runs conversation turns against ``ScriptedChatModel`` and ``FakeGHL`` from
+``ghl_agent.fakes`` - no network, API keys or LangGraph Cloud needed. Latency
+of the stand-ins is configurable so runs approximate production timings.
+Results are compared against ``baselines/e2e.json``.
+
+Usage:
+    python benchmarks/e2e.py                          # report and check for regressions
+    python benchmarks/e2e.py --llm-latency 0.2 --concurrency 16
+    python benchmarks/e2e.py --update-baseline        # accept the current numbers
+"""
+from typing import Dict, Any, List, Callable, Awaitable
+from collections import Counter
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "e2e.json"
+sys.path.insert(0, str(ROOT))
+
+# Benchmark the in-process agent, never a deployment
+for _name in ("LANGGRAPH_API_URL", "LANGGRAPH_AUTH_TYPE"):
+    os.environ.pop(_name, None)
+
+import structlog
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+from langchain_core.messages import HumanMessage
+from ghl_agent.fakes import ScriptedChatModel, FakeGHL, default_responder, installed_fakes
+
+# Customer messages of one scripted conversation, replayed turn by turn
+CONVERSATION = [
+    "Hola, me interesa una batería para los apagones",
+    "Vivo en casa",
+    "Quiero energizar la nevera, el tv, dos abanicos y el router",
+    "¿Cuánto me duraría con una de 5kWh?",
+    "Me gustaría agendar una consulta para el martes"
+]
+
+# Metrics checked against the baseline: name -> True when higher is better
+CHECKED_METRICS = {"p95_ms": False, "throughput_per_s": True, "peak_kib": False}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class CountingResponder:
+    """Wraps the default responder to count requested tool calls by name"""
+
+    def __init__(self):
+        self.tool_calls: Counter = Counter()
+
+    def __call__(self, messages):
+        message = default_responder(messages)
+        self.tool_calls.update(call["name"] for call in message.tool_calls)
+        return message
+
+
+def graph_turn(index: int) -> Callable[[], Awaitable[Any]]:
+    from ghl_agent.agent.graph import get_graph
+
+    contact_id = f"bench-contact-{index % 50}"
+    message = CONVERSATION[index % len(CONVERSATION)]
+    return lambda: get_graph().ainvoke({
+        "messages": [HumanMessage(content=message)],
+        "contact_id": contact_id,
+        "conversation_id": f"conv-{contact_id}"
+    })
+
+
+def webhook_payload(contact_id: str, message: str, location_id: str = "bench-location") -> Dict[str, Any]:
+    """GHL ``InboundMessage`` webhook body"""
+    return {
+        "type": "InboundMessage",
+        "locationId": location_id,
+        "contactId": contact_id,
+        "conversationId": f"conv-{contact_id}",
+        "message": {"type": "WhatsApp", "body": message}
+    }
+
+
+def app_client():
+    """httpx client bound to the webhook app in-process"""
+    import httpx
+    from ghl_agent.custom_app import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def webhook_turn(client, index: int) -> Callable[[], Awaitable[Any]]:
+    contact_id = f"bench-contact-{index % 50}"
+    payload = webhook_payload(contact_id, CONVERSATION[index % len(CONVERSATION)])
+
+    async def turn():
+        response = await client.post("/webhook/ghl", json=payload)
+        if not response.json().get("success"):
+            raise RuntimeError(response.text)
+    return turn
+
+
+async def run_turns(make_turn: Callable[[int], Callable[[], Awaitable[Any]]], turns: int, concurrency: int) -> Dict[str, Any]:
+    """Run ``turns`` turns with at most ``concurrency`` in flight and time each one"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def timed(index: int):
+        nonlocal errors
+        turn = make_turn(index)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await turn()
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(index) for index in range(turns)))
+    elapsed = time.perf_counter() - started
+    return {
+        "turns": turns,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "throughput_per_s": round(turns / elapsed, 2)
+    }
+
+
+def lift_token_budgets():
+    """Replace the worker's LLM gateway with one without per-model TPM budgets
+
+    Scripted turns run far faster than real ones, so configured budgets would
+    throttle the benchmark instead of measuring the agent.
+    """
+    from ghl_agent.agent import llm_gateway
+    from ghl_agent.config_loader import get_config
+
+    settings = get_config().llm_gateway.model_copy(update={"tokens_per_minute": {}})
+    llm_gateway._gateway = llm_gateway.LLMGateway(settings)
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    if not args.keep_token_budgets:
+        lift_token_budgets()
+    responder = CountingResponder()
+    model = ScriptedChatModel(responder=responder, latency_seconds=args.llm_latency)
+    ghl = FakeGHL(latency_seconds=args.ghl_latency)
+
+    with installed_fakes(model, ghl):
+        client = app_client() if name == "webhook" else None
+        make_turn = (lambda index: webhook_turn(client, index)) if client else graph_turn
+        # Warm caches and compile the graph outside the measurement
+        await run_turns(make_turn, len(CONVERSATION), 1)
+        responder.tool_calls.clear()
+        ghl.requests.clear()
+        model.calls = 0
+
+        result = await run_turns(make_turn, args.turns, args.concurrency)
+        result["llm_calls_per_turn"] = round(model.calls / args.turns, 2)
+        result["tool_calls"] = dict(sorted(responder.tool_calls.items()))
+        result["ghl_requests"] = dict(sorted(ghl.requests.items()))
+
+        # Allocation profile from a shorter pass - tracemalloc slows every allocation
+        tracemalloc.start()
+        await run_turns(make_turn, args.alloc_turns, args.concurrency)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_kib"] = round(peak / 1024, 1)
+        result["retained_kib"] = round(current / 1024, 1)
+        if client:
+            await client.aclose()
+    return result
+
+
+def load_baseline() -> Dict[str, Any]:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+def find_regressions(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        for metric, higher_is_better in CHECKED_METRICS.items():
+            expected = baseline.get("scenarios", {}).get(name, {}).get(metric)
+            if expected is None:
+                continue
+            actual = result[metric]
+            if higher_is_better and actual < expected * (1 - tolerance):
+                regressions.append(f"{name}.{metric}: {actual} < {expected} (-{tolerance:.0%})")
+            elif not higher_is_better and actual > expected * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {actual} > {expected} (+{tolerance:.0%})")
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any]):
+    print(f"{'scenario':<10}{'p50':>10}{'p95':>10}{'p99':>10}{'turns/s':>10}{'llm/turn':>10}{'peak KiB':>10}{'errors':>8}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+              f"{result['throughput_per_s']:>10.1f}{result['llm_calls_per_turn']:>10.2f}"
+              f"{result['peak_kib']:>10.1f}{result['errors']:>8}")
+        expected = baseline.get("scenarios", {}).get(name)
+        if expected:
+            print(f"{'baseline':>10}{'':>10}{expected['p95_ms']:>10.1f}{'':>10}"
+                  f"{expected['throughput_per_s']:>10.1f}{'':>10}{expected['peak_kib']:>10.1f}")
+        print(f"  tool calls: {result['tool_calls']}")
+        print(f"  GHL requests: {result['ghl_requests']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    parser.add_argument("--scenario", choices=["graph", "webhook"], action="append", help="Scenario to run (default: all)")
+    parser.add_argument("--turns", type=int, default=200, help="Measured turns per scenario")
+    parser.add_argument("--alloc-turns", type=int, default=20, help="Turns traced for allocations")
+    parser.add_argument("--concurrency", type=int, default=8, help="Turns in flight at once")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake chat model delay per call (seconds)")
+    parser.add_argument("--ghl-latency", type=float, default=0.0, help="Fake GHL delay per request (seconds)")
+    parser.add_argument("--keep-token-budgets", action="store_true", help="Throttle with the configured LLM TPM budgets")
+    parser.add_argument("--tolerance", type=float, default=None, help="Allowed slowdown vs baseline (0.5 = 50%%)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the current results as the baseline")
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", 0.5)
+    settings = {key: getattr(args, key) for key in ("turns", "concurrency", "llm_latency", "ghl_latency", "keep_token_budgets")}
+    if baseline.get("settings", settings) != settings:
+        print(f"Settings differ from the baseline ({baseline['settings']}), skipping the comparison")
+        baseline = {}
+
+    results = {name: asyncio.run(run_scenario(name, args)) for name in args.scenario or ["graph", "webhook"]}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results, baseline)
+
+    if args.update_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps({
+            "tolerance": tolerance,
+            "python": sys.version.split()[0],
+            "settings": settings,
+            "scenarios": {
+                name: {metric: result[metric] for metric in ("p50_ms", *CHECKED_METRICS)}
+                for name, result in results.items()
+            }
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH.relative_to(ROOT)}")
+        return 0
+
+    regressions = find_regressions(results, baseline, tolerance)
+    if regressions:
+        print("\nEnd-to-end regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
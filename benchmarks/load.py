@@ -0,0 +1,278 @@
+"""Load generator replaying WhatsApp conversations against POST /webhook/ghl
+
+Conversations (greeting -> housing -> equipment -> scheduling) start as a
+Poisson process so inbound messages arrive at the target rate. Each contact
+waits for the agent's reply before its next step, and some double-text
+before the reply arrives. Reply latency is measured from the inbound
+webhook to the reply reaching the ``FakeGHL`` send sink.
+
+Usage:
+    python benchmarks/load.py --rate 10 --duration 20
+    python benchmarks/load.py --find-saturation --slo-ms 3000
+    python benchmarks/load.py --scripts conversations.json   # replay recorded scripts
+"""
+from typing import Dict, Any, List, Optional
+from collections import defaultdict
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from e2e import ScriptedChatModel, FakeGHL, installed_fakes, app_client, webhook_payload, percentile, lift_token_budgets
+
+# Message variants per conversation step
+SCRIPT_STEPS = {
+    "greeting": [
+        "Hola, me interesa una batería",
+        "Buenas, vi el anuncio de las baterías",
+        "Hola! Información de las placas y baterías por favor",
+        "Saludos, cuánto cuestan las baterías?"
+    ],
+    "housing": [
+        "Vivo en casa",
+        "Es un apartamento",
+        "Casa de dos niveles",
+        "Apartamento en Carolina"
+    ],
+    "equipment": [
+        "Quiero energizar la nevera, el tv y los abanicos",
+        "Nevera, microondas, router y luces",
+        "La nevera, dos abanicos y la computadora",
+        "Aire acondicionado, nevera y tv"
+    ],
+    "scheduling": [
+        "Me gustaría agendar una consulta",
+        "Pueden llamarme el martes en la mañana?",
+        "Quiero una cita esta semana",
+        "Sí, agendemos"
+    ]
+}
+DOUBLE_TEXTS = ["?", "Hola??", "Me dejas saber", "Gracias", "Es urgente, se va la luz a cada rato"]
+
+
+def synthesize_scripts(count: int, rng: random.Random) -> List[List[str]]:
+    """Build ``count`` conversation scripts from the step variants"""
+    return [[rng.choice(variants) for variants in SCRIPT_STEPS.values()] for _ in range(count)]
+
+
+def load_scripts(path: str) -> List[List[str]]:
+    """Read recorded scripts: a JSON list of message lists"""
+    with open(path) as f:
+        scripts = json.load(f)
+    if not scripts or not all(isinstance(script, list) and script for script in scripts):
+        raise ValueError(f"{path} must contain a non-empty list of message lists")
+    return scripts
+
+
+class ReplyTracker:
+    """Pairs inbound messages with replies arriving at the fake send sink
+
+    A reply answers every inbound message of the contact that is still
+    waiting (a double-text and its original get one reply), and latency is
+    measured from the oldest of them.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, List[float]] = defaultdict(list)
+        self.replied: Dict[str, asyncio.Event] = {}
+        self.latencies_ms: List[float] = []
+        self.inbound = 0
+        self.replies = 0
+        self.unmatched_replies = 0
+
+    def expect(self, contact_id: str):
+        self.inbound += 1
+        self.pending[contact_id].append(time.perf_counter())
+        self.replied.setdefault(contact_id, asyncio.Event()).clear()
+
+    def on_send(self, record: Dict[str, Any]):
+        contact_id = record["contact_id"]
+        waiting = self.pending.pop(contact_id, None)
+        if not waiting:
+            self.unmatched_replies += 1
+            return
+        self.replies += 1
+        self.latencies_ms.append((record["sent_at"] - waiting[0]) * 1000)
+        self.replied[contact_id].set()
+
+    async def wait(self, contact_id: str, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.replied[contact_id].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.pending.pop(contact_id, None)
+            return False
+
+
+class LoadRun:
+    """One load level: conversations started at a fixed message rate"""
+
+    def __init__(self, client, scripts: List[List[str]], args: argparse.Namespace, rate: float):
+        self.client = client
+        self.scripts = scripts
+        self.args = args
+        self.rate = rate
+        self.rng = random.Random(args.seed)
+        self.tracker = ReplyTracker()
+        self.requests: set = set()
+        self.http_errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _post(self, contact_id: str, message: str):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            response = await self.client.post("/webhook/ghl", json=webhook_payload(contact_id, message))
+            if response.status_code != 200 or not response.json().get("success"):
+                self.http_errors += 1
+        except Exception:
+            self.http_errors += 1
+        finally:
+            self.in_flight -= 1
+
+    def _send(self, contact_id: str, message: str):
+        self.tracker.expect(contact_id)
+        # GHL does not wait for the webhook response before delivering the next message
+        task = asyncio.create_task(self._post(contact_id, message))
+        self.requests.add(task)
+        task.add_done_callback(self.requests.discard)
+
+    async def conversation(self, index: int, script: List[str]):
+        contact_id = f"load-{self.rate:g}-{index}"
+        for message in script:
+            self._send(contact_id, message)
+            if self.rng.random() < self.args.double_text:
+                await asyncio.sleep(self.rng.uniform(0.05, 0.5))
+                self._send(contact_id, self.rng.choice(DOUBLE_TEXTS))
+            if not await self.tracker.wait(contact_id, self.args.reply_timeout):
+                self.timeouts += 1
+                return
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time) if self.args.think_time else 0)
+
+    async def run(self) -> Dict[str, Any]:
+        # Double-texts count towards the target rate
+        messages_per_conversation = statistics.fmean(len(script) for script in self.scripts) * (1 + self.args.double_text)
+        conversation_rate = self.rate / messages_per_conversation
+        conversations = []
+        started = time.perf_counter()
+        while time.perf_counter() - started < self.args.duration:
+            script = self.scripts[len(conversations) % len(self.scripts)]
+            conversations.append(asyncio.create_task(self.conversation(len(conversations), script)))
+            await asyncio.sleep(self.rng.expovariate(conversation_rate))
+        offered_seconds = time.perf_counter() - started
+        # Contacts wait for replies, so compare with the steps the target rate
+        # asks for rather than the steps that were actually sent
+        steps_target = offered_seconds * self.rate / (1 + self.args.double_text)
+        replies_in_window = self.tracker.replies
+        await asyncio.gather(*conversations)
+        await asyncio.gather(*self.requests)
+        elapsed = time.perf_counter() - started
+
+        latencies = self.tracker.latencies_ms or [float("nan")]
+        return {
+            "target_rate": self.rate,
+            "conversations": len(conversations),
+            "inbound": self.tracker.inbound,
+            "replies": self.tracker.replies,
+            "unmatched_replies": self.tracker.unmatched_replies,
+            "offered_per_s": round(self.tracker.inbound / offered_seconds, 2),
+            "replies_per_s": round(self.tracker.replies / elapsed, 2),
+            "reply_ratio": round(replies_in_window / steps_target, 3),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "timeouts": self.timeouts,
+            "http_errors": self.http_errors,
+            "max_in_flight": self.max_in_flight
+        }
+
+
+def saturated(result: Dict[str, Any], args: argparse.Namespace) -> Optional[str]:
+    """Reason a load level is beyond what the worker sustains, if it is"""
+    if result["timeouts"] or result["http_errors"]:
+        return f"{result['timeouts']} timeouts, {result['http_errors']} webhook errors"
+    if result["reply_ratio"] < args.min_reply_ratio:
+        return f"replies covered {result['reply_ratio']:.0%} of the target step rate"
+    if not result["p95_ms"] <= args.slo_ms:
+        return f"p95 {result['p95_ms']} ms > SLO {args.slo_ms} ms"
+    return None
+
+
+def print_result(result: Dict[str, Any]):
+    print(f"{result['target_rate']:>8g}{result['offered_per_s']:>10.1f}{result['replies_per_s']:>10.1f}"
+          f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+          f"{result['reply_ratio']:>8.2f}{result['timeouts']:>9}{result['http_errors']:>8}{result['max_in_flight']:>10}")
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    scripts = load_scripts(args.scripts) if args.scripts else synthesize_scripts(200, rng)
+    lift_token_budgets()
+    model = ScriptedChatModel(latency_seconds=args.llm_latency)
+    ghl = FakeGHL(latency_seconds=args.ghl_latency)
+
+    results = []
+    with installed_fakes(model, ghl):
+        async with app_client() as client:
+            # Compile the graph and warm caches before the first level
+            await client.post("/webhook/ghl", json=webhook_payload("load-warmup", scripts[0][0]))
+
+            print(f"{'rate':>8}{'offered':>10}{'replies':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'ratio':>8}{'timeouts':>9}{'errors':>8}{'in-flight':>10}")
+            rate = args.rate
+            while True:
+                run = LoadRun(client, scripts, args, rate)
+                ghl.on_send = run.tracker.on_send
+                result = await run.run()
+                print_result(result)
+                results.append(result)
+                if not args.find_saturation:
+                    break
+                reason = saturated(result, args)
+                if reason or rate >= args.max_rate:
+                    result["saturated"] = reason
+                    break
+                rate = round(rate * args.step_factor, 2)
+
+    summary: Dict[str, Any] = {"levels": results}
+    if args.find_saturation:
+        sustained = [result for result in results if not saturated(result, args)]
+        summary["sustained_rate"] = sustained[-1]["target_rate"] if sustained else None
+        if results[-1].get("saturated"):
+            print(f"\nSaturated at {results[-1]['target_rate']:g} msg/s: {results[-1]['saturated']}")
+        print(f"Highest sustained rate: {summary['sustained_rate']} msg/s (p95 SLO {args.slo_ms:g} ms)")
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="WhatsApp webhook load generator")
+    parser.add_argument("--rate", type=float, default=5.0, help="Target inbound messages per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of new conversations per load level")
+    parser.add_argument("--scripts", help="JSON file of recorded conversation scripts to replay")
+    parser.add_argument("--double-text", type=float, default=0.2, help="Chance a contact double-texts before a reply")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds a contact takes to answer")
+    parser.add_argument("--reply-timeout", type=float, default=30.0, help="Seconds to wait for a reply")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Fake chat model delay per call (seconds)")
+    parser.add_argument("--ghl-latency", type=float, default=0.05, help="Fake GHL delay per request (seconds)")
+    parser.add_argument("--find-saturation", action="store_true", help="Raise the rate until the worker saturates")
+    parser.add_argument("--step-factor", type=float, default=1.5, help="Rate multiplier between load levels")
+    parser.add_argument("--max-rate", type=float, default=500.0, help="Stop searching at this rate")
+    parser.add_argument("--slo-ms", type=float, default=5000.0, help="p95 reply latency a sustained rate must meet")
+    parser.add_argument("--min-reply-ratio", type=float, default=0.8, help="Share of the target step rate a sustained level must answer")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to a JSON file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Persistence backend benchmark: memory vs SQLite vs Postgres
+
+Replays the scripted conversation through a checkpointed graph on each
+backend, then times state loads, a cold reload from a fresh connection
+(durable backends only) and memory store operations: single puts, batched
+puts, gets and namespace searches.
+
+Postgres runs only when ``POSTGRES_URI`` is set and the Postgres packages
+are installed; it is reported as skipped otherwise.
+
+Usage:
+    python benchmarks/persistence.py
+    python benchmarks/persistence.py --turns 40 --items 500 --json
+"""
+from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from e2e import CONVERSATION, lift_token_budgets  # also sets up sys.path and quiet logging
+
+from langchain_core.messages import HumanMessage
+from langgraph.store.base import PutOp
+from ghl_agent.fakes import installed_fakes
+
+BACKENDS = ("memory", "sqlite", "postgres")
+
+
+@asynccontextmanager
+async def open_backend(name: str, workdir: str):
+    """Yield a fresh (checkpointer, store) pair for a backend"""
+    from ghl_agent.serialization import get_serializer
+
+    if name == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+        from langgraph.store.memory import InMemoryStore
+        yield MemorySaver(serde=get_serializer()), InMemoryStore()
+    elif name == "sqlite":
+        from ghl_agent.agent.sqlite_backend import close_sqlite_backends, get_sqlite_checkpointer_with_store
+        try:
+            yield get_sqlite_checkpointer_with_store(os.path.join(workdir, "bench.sqlite"))
+        finally:
+            close_sqlite_backends()
+    else:
+        from ghl_agent.agent.checkpointing import close_postgres_backends, get_async_checkpointer_with_store
+        try:
+            yield await get_async_checkpointer_with_store()
+        finally:
+            await close_postgres_backends()
+
+
+def skip_reason(name: str) -> Optional[str]:
+    try:
+        if name == "sqlite":
+            import langgraph.checkpoint.sqlite  # noqa: F401
+        elif name == "postgres":
+            if not os.getenv("POSTGRES_URI"):
+                return "POSTGRES_URI not set"
+            import langgraph.checkpoint.postgres.aio  # noqa: F401
+            import psycopg_pool  # noqa: F401
+    except ImportError as e:
+        return f"not installed ({e.name})"
+    return None
+
+
+def percentiles(samples) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3)
+    }
+
+
+async def timed(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return time.perf_counter() - started
+
+
+async def bench_graph(checkpointer, store, thread_id: str, turns: int, load_repeat: int) -> Dict[str, Any]:
+    from ghl_agent.agent import graph as graph_module
+
+    # With the store compiled in, the agent's memory reads and writes hit the backend too
+    graph = graph_module.workflow.compile(checkpointer=checkpointer, store=store)
+    config = {"configurable": {"thread_id": thread_id}}
+    turn_seconds = []
+    for turn in range(turns):
+        turn_seconds.append(await timed(graph.ainvoke({
+            "messages": [HumanMessage(content=CONVERSATION[turn % len(CONVERSATION)])],
+            "contact_id": "bench-contact",
+            "conversation_id": "bench-conversation"
+        }, config)))
+    load_seconds = [await timed(graph.aget_state(config)) for _ in range(load_repeat)]
+    return {"turn": percentiles(turn_seconds), "load": percentiles(load_seconds)}
+
+
+async def bench_store(store, items: int) -> Dict[str, Any]:
+    record = {"customer_name": "Ana", "housing_type": "casa", "equipment_list": ["nevera", "tv", "abanico"]}
+    put_seconds = [
+        await timed(store.aput(("conversation", f"contact-{index % 50}"), f"single-{index}", record))
+        for index in range(items)
+    ]
+    # Batches of 10 puts - written together, like a turn's memory records
+    batches = [
+        [PutOp(("insights", f"contact-{index % 50}"), f"batch-{index}-{offset}", record) for offset in range(10)]
+        for index in range(items // 10)
+    ]
+    batch_seconds = [await timed(store.abatch(batch)) for batch in batches]
+    get_seconds = [
+        await timed(store.aget(("conversation", f"contact-{index % 50}"), f"single-{index}"))
+        for index in range(items)
+    ]
+    search_seconds = [
+        await timed(store.asearch(("conversation", f"contact-{index % 50}")))
+        for index in range(min(items, 200))
+    ]
+    return {
+        "put": percentiles(put_seconds),
+        "put_batch10": percentiles(batch_seconds),
+        "get": percentiles(get_seconds),
+        "search": percentiles(search_seconds)
+    }
+
+
+async def run_backend(name: str, turns: int, items: int, load_repeat: int) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="ghl-bench-")
+    thread_id = f"bench-thread-{time.time_ns()}"
+    with installed_fakes():
+        async with open_backend(name, workdir) as (checkpointer, store):
+            result = await bench_graph(checkpointer, store, thread_id, turns, load_repeat)
+            result.update(await bench_store(store, items))
+        if name != "memory":
+            # Cold start: new connections, first state load for an existing thread
+            from ghl_agent.agent import graph as graph_module
+            started = time.perf_counter()
+            async with open_backend(name, workdir) as (checkpointer, _):
+                state = await graph_module.workflow.compile(checkpointer=checkpointer).aget_state(
+                    {"configurable": {"thread_id": thread_id}}
+                )
+                result["reload_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                result["reloaded_messages"] = len(state.values.get("messages", []))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistence backend benchmark")
+    parser.add_argument("--turns", type=int, default=20, help="Conversation turns on one thread")
+    parser.add_argument("--items", type=int, default=300, help="Store operations per kind")
+    parser.add_argument("--load-repeat", type=int, default=20, help="State loads timed after the turns")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    lift_token_budgets()
+    results = {}
+    for name in args.backends:
+        reason = skip_reason(name)
+        results[name] = {"skipped": reason} if reason else asyncio.run(
+            run_backend(name, args.turns, args.items, args.load_repeat)
+        )
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{args.turns} turns, {args.items} store operations per kind (p50 / p95 ms)")
+    columns = ("turn", "load", "put", "put_batch10", "get", "search")
+    print(f"{'backend':<10}" + "".join(f"{column:>18}" for column in columns) + f"{'reload ms':>11}")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<10}skipped: {result['skipped']}")
+            continue
+        cells = "".join(f"{result[c]['p50_ms']:>9.3f} /{result[c]['p95_ms']:>7.3f}" for c in columns)
+        print(f"{name:<10}{cells}{result.get('reload_ms', '-'):>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Checkpoint and store record serialization benchmark
+
+Replays the scripted conversation from ``benchmarks/e2e.py`` through a
+checkpointed graph, then re-serializes every checkpoint's channel values
+(the way the saver stores them, one value at a time) with each serializer
+and reports bytes per checkpoint and (de)serialization time.
+
+Usage:
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --conversations 3 --repeat 50 --json
+"""
+from typing import Dict, Any, List, Tuple
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from e2e import CONVERSATION  # also sets up sys.path and quiet logging
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from ghl_agent.fakes import installed_fakes
+from ghl_agent.serialization import CompactSerializer, compact_record
+
+SERIALIZERS = {
+    "jsonplus": lambda: JsonPlusSerializer(),
+    "compact": lambda: CompactSerializer(compression_threshold=None),
+    "compact+zstd": lambda: CompactSerializer()
+}
+
+
+async def collect_checkpoints(conversations: int) -> List[Dict[str, Any]]:
+    """Channel values of every checkpoint written while replaying conversations"""
+    from ghl_agent.agent.graph import compile_graph_with_config
+
+    checkpoints = []
+    with installed_fakes():
+        graph = compile_graph_with_config(enable_checkpointing=True)
+        for index in range(conversations):
+            config = {"configurable": {"thread_id": f"bench-thread-{index}"}}
+            for message in CONVERSATION:
+                await graph.ainvoke({
+                    "messages": [HumanMessage(content=message)],
+                    "contact_id": f"bench-contact-{index}",
+                    "conversation_id": f"bench-conversation-{index}"
+                }, config)
+            checkpoints.extend(
+                checkpoint.checkpoint["channel_values"] for checkpoint in graph.checkpointer.list(config)
+            )
+    return checkpoints
+
+
+def measure(serde, checkpoints: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    sizes = []
+    dumps_seconds = []
+    loads_seconds = []
+    for values in checkpoints:
+        encoded: List[Tuple[str, bytes]] = [serde.dumps_typed(value) for value in values.values()]
+        sizes.append(sum(len(data) for _, data in encoded))
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for value in values.values():
+                serde.dumps_typed(value)
+        dumps_seconds.append((time.perf_counter() - started) / repeat)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for item in encoded:
+                serde.loads_typed(item)
+        loads_seconds.append((time.perf_counter() - started) / repeat)
+    return {
+        "mean_bytes": round(statistics.mean(sizes), 1),
+        "max_bytes": max(sizes),
+        "dumps_us": round(statistics.mean(dumps_seconds) * 1e6, 1),
+        "loads_us": round(statistics.mean(loads_seconds) * 1e6, 1)
+    }
+
+
+def measure_records() -> Dict[str, int]:
+    """JSON bytes of a typical conversation memory record"""
+    from ghl_agent.agent.graph import ConversationMemory
+
+    memory = ConversationMemory(
+        customer_name="Ana",
+        housing_type="casa",
+        equipment_list=["nevera", "tv", "abanico", "router"],
+        total_consumption=510.0
+    )
+    return {
+        "model_dump": len(json.dumps(memory.model_dump(mode="json"))),
+        "compact_record": len(json.dumps(compact_record(memory)))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint serialization benchmark")
+    parser.add_argument("--conversations", type=int, default=2, help="Scripted conversations to checkpoint")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions per checkpoint")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    checkpoints = asyncio.run(collect_checkpoints(args.conversations))
+    results = {name: measure(factory(), checkpoints, args.repeat) for name, factory in SERIALIZERS.items()}
+    records = measure_records()
+
+    if args.json:
+        print(json.dumps({"checkpoints": len(checkpoints), "serializers": results, "memory_record": records}, indent=2))
+        return 0
+
+    baseline = results["jsonplus"]["mean_bytes"]
+    print(f"{len(checkpoints)} checkpoints from {args.conversations} conversations of {len(CONVERSATION)} turns")
+    print(f"{'serializer':<14}{'mean B':>10}{'max B':>10}{'ratio':>8}{'dumps us':>11}{'loads us':>11}")
+    for name, result in results.items():
+        print(f"{name:<14}{result['mean_bytes']:>10}{result['max_bytes']:>10}"
+              f"{result['mean_bytes'] / baseline:>8.2f}{result['dumps_us']:>11}{result['loads_us']:>11}")
+    print(f"memory record: {records['model_dump']} B as model_dump, {records['compact_record']} B compact")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
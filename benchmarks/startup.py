@@ -0,0 +1,148 @@
+"""Cold start benchmark and import-time budget report
+
+Every scenario runs in a fresh interpreter so module caches do not hide
+import costs. Medians are compared against ``baselines/startup.json``.
+
+Usage:
+    python benchmarks/startup.py                    # report and check for regressions
+    python benchmarks/startup.py --importtime ghl_agent.custom_app
+    python benchmarks/startup.py --update-baseline  # accept the current numbers
+"""
+from typing import Dict, Any, List, Tuple
+from pathlib import Path
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup.json"
+
+# Scenario name -> code timed inside a fresh interpreter
+SCENARIOS = {
+    "import_custom_app": "import ghl_agent.custom_app",
+    "import_inbox_api": "import ghl_agent.inbox.api",
+    "import_graph": "import ghl_agent.agent.graph",
+    "first_graph_compile": "import ghl_agent.agent.graph as g; g.get_graph()",
+}
+
+_TIMER = """
+import time
+_started = time.perf_counter()
+{code}
+print("elapsed_ms=%.3f" % ((time.perf_counter() - _started) * 1000))
+"""
+
+
+def _run_python(args: List[str]) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONDONTWRITEBYTECODE": "0"}
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def time_scenario(code: str, repeat: int) -> Dict[str, float]:
+    """Median/min/max wall time of ``code`` over fresh interpreters"""
+    samples = []
+    for _ in range(repeat):
+        output = _run_python(["-c", _TIMER.format(code=code)]).stdout
+        line = next(line for line in output.splitlines() if line.startswith("elapsed_ms="))
+        samples.append(float(line.split("=", 1)[1]))
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1)
+    }
+
+
+def import_times(module: str) -> List[Tuple[str, float, float]]:
+    """Parse ``python -X importtime`` output into (module, self_ms, cumulative_ms)"""
+    stderr = _run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+
+def importtime_report(module: str, top: int = 15) -> Dict[str, Any]:
+    """Total import time plus the most expensive dependencies and package modules"""
+    rows = import_times(module)
+    total_ms = next((cumulative for name, _, cumulative in rows if name == module), 0.0)
+    heaviest = sorted(rows, key=lambda row: row[2], reverse=True)
+    package = [row for row in heaviest if row[0].startswith("ghl_agent")]
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 1),
+        "heaviest": [(name, round(cumulative, 1)) for name, _, cumulative in heaviest[1:top + 1]],
+        "package_modules": [(name, round(self_ms, 1), round(cumulative, 1)) for name, self_ms, cumulative in package]
+    }
+
+
+def print_importtime_report(report: Dict[str, Any]):
+    print(f"\nImport time for {report['module']}: {report['total_ms']:.1f} ms")
+    print("  Heaviest imports (cumulative ms):")
+    for name, cumulative in report["heaviest"]:
+        print(f"    {cumulative:9.1f}  {name}")
+    print("  Package modules (self / cumulative ms):")
+    for name, self_ms, cumulative in report["package_modules"]:
+        print(f"    {self_ms:9.1f} / {cumulative:9.1f}  {name}")
+
+
+def load_baseline() -> Dict[str, Any]:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument("--tolerance", type=float, default=None, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--importtime", metavar="MODULE", help="Only print the import-time report for a module")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the current results as the baseline")
+    args = parser.parse_args()
+
+    if args.importtime:
+        print_importtime_report(importtime_report(args.importtime))
+        return 0
+
+    baseline = load_baseline()
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", 0.25)
+    results = {name: time_scenario(code, args.repeat) for name, code in SCENARIOS.items()}
+
+    regressions = []
+    print(f"{'scenario':<24}{'median':>10}{'min':>10}{'max':>10}{'baseline':>10}")
+    for name, result in results.items():
+        budget = baseline.get("scenarios", {}).get(name, {}).get("median_ms")
+        print(f"{name:<24}{result['median_ms']:>10.1f}{result['min_ms']:>10.1f}{result['max_ms']:>10.1f}"
+              f"{budget if budget is not None else '-':>10}")
+        if budget is not None and result["median_ms"] > budget * (1 + tolerance):
+            regressions.append(f"{name}: {result['median_ms']:.1f} ms > {budget:.1f} ms (+{tolerance:.0%})")
+
+    print_importtime_report(importtime_report("ghl_agent.custom_app"))
+
+    if args.update_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps({
+            "tolerance": tolerance,
+            "python": sys.version.split()[0],
+            "scenarios": {name: {"median_ms": result["median_ms"]} for name, result in results.items()}
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH.relative_to(ROOT)}")
+        return 0
+
+    if regressions:
+        print("\nStartup regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Operator endpoints, enabled only when ADMIN_TOKEN is set
+
+Requests must send the token in the ``X-Admin-Token`` header.
+"""
+from fastapi import APIRouter, Header, HTTPException, Depends, Query
+from typing import Dict, Any, Optional
+import asyncio
+import hmac
+import os
+import structlog
+
+from ghl_agent.profiling import profiler
+
+logger = structlog.get_logger()
+
+# Longest sampler run the endpoint accepts
+MAX_SAMPLER_SECONDS = 600
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    """Reject requests without the configured admin token"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def create_admin_router() -> APIRouter:
+    """Create FastAPI router for admin endpoints"""
+    router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin_token)])
+
+    @router.get("/profile")
+    async def profile_status() -> Dict[str, Any]:
+        """Profiler settings, sampler state and written profiles"""
+        return profiler.status()
+
+    @router.post("/profile/sampler")
+    async def start_sampler(
+        seconds: float = Query(30.0, gt=0, le=MAX_SAMPLER_SECONDS),
+        interval_ms: float = Query(10.0, ge=1, le=1000),
+        include_idle: bool = False
+    ) -> Dict[str, Any]:
+        """Sample all thread stacks for ``seconds``, then write folded stacks to disk"""
+        try:
+            sampler = profiler.start_sampler(interval_ms / 1000, include_idle)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        async def stop_later():
+            await asyncio.sleep(seconds)
+            if profiler.sampler is sampler:
+                profiler.stop_sampler()
+
+        asyncio.create_task(stop_later())
+        return {"started": True, "seconds": seconds, "interval_ms": interval_ms}
+
+    @router.delete("/profile/sampler")
+    async def stop_sampler() -> Dict[str, Any]:
+        """Stop the sampler early and return the hottest frames"""
+        path = profiler.stop_sampler()
+        if path is None:
+            raise HTTPException(status_code=409, detail="Sampler is not running")
+        return {"path": str(path), "samples": profiler.sampler.samples, "top_frames": profiler.sampler.top_frames()}
+
+    @router.put("/profile/sample-rate")
+    async def set_sample_rate(rate: float = Query(..., ge=0, le=1)) -> Dict[str, Any]:
+        """Change the share of agent runs profiled with cProfile"""
+        profiler.sample_rate = rate
+        logger.info("Profile sample rate changed", rate=rate)
+        return {"sample_rate": rate}
+
+    @router.get("/stats/model-tiers")
+    async def model_tier_stats() -> Dict[str, Any]:
+        """Calls, errors, escalations, latency, tokens and cost per model tier since startup"""
+        from ghl_agent.agent.model_tiers import tier_stats
+        return tier_stats.snapshot()
+
+    @router.get("/stats/tool-exposure")
+    async def tool_exposure_stats() -> Dict[str, Any]:
+        """Turns, exposed tools, tool calls and schema tokens saved per conversation stage"""
+        from ghl_agent.agent.graph import stage_tool_stats
+        return stage_tool_stats.snapshot()
+
+    return router
+
+
+__all__ = ["create_admin_router", "require_admin_token"]
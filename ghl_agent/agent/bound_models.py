@@ -0,0 +1,89 @@
+"""Registry of pre-bound model runnables so tool schemas are serialized once"""
+from typing import Dict, Any, List, Optional, Iterable, Mapping, Tuple
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+import structlog
+
+logger = structlog.get_logger()
+
+# (model tier, tool names, parallel flag)
+BindingKey = Tuple[str, Tuple[str, ...], bool]
+
+
+class BoundModelRegistry:
+    """Cache of ``model.bind_tools(...)`` results
+
+    ``bind_tools`` converts every tool to its JSON schema on each call. The
+    registry does that once per (tier, tool subset, parallel flag) and hands
+    out the same bound runnable afterwards. A binding is only reused for the
+    model instance it was made from - when a tier's model is rebuilt (config
+    reload, model factory swap) it is bound again and replaces the old entry.
+    """
+
+    def __init__(self, tools: List[BaseTool]):
+        self.tools = list(tools)
+        self.tool_names: Tuple[str, ...] = tuple(tool.name for tool in self.tools)
+        self._bound: Dict[BindingKey, Tuple[BaseChatModel, Runnable]] = {}
+
+    def _subset(self, tool_names: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        """Normalize a tool subset to registry order, ignoring unknown names"""
+        if tool_names is None:
+            return self.tool_names
+        wanted = set(tool_names)
+        unknown = wanted.difference(self.tool_names)
+        if unknown:
+            logger.warning("Ignoring unknown tools in subset", tools=sorted(unknown))
+        return tuple(name for name in self.tool_names if name in wanted)
+
+    def get(
+        self,
+        model: BaseChatModel,
+        tier: str,
+        tool_names: Optional[Iterable[str]] = None,
+        parallel_tool_calls: bool = True
+    ) -> Runnable:
+        """Get a tier's model bound to a tool subset (all tools by default)"""
+        names = self._subset(tool_names)
+        key = (tier, names, parallel_tool_calls)
+        cached = self._bound.get(key)
+        if cached is not None and cached[0] is model:
+            return cached[1]
+
+        subset = [tool for tool in self.tools if tool.name in names]
+        bound = model.bind_tools(subset, parallel_tool_calls=parallel_tool_calls)
+        self._bound[key] = (model, bound)
+        logger.debug("Bound tools to model", tier=tier, tools=len(subset), parallel_tool_calls=parallel_tool_calls)
+        return bound
+
+    def precompute(
+        self,
+        models: Mapping[str, BaseChatModel],
+        subsets: Iterable[Optional[Iterable[str]]] = (None,),
+        parallel_flags: Iterable[bool] = (True, False)
+    ) -> int:
+        """Bind every combination up front (e.g. at startup)
+
+        Args:
+            models: Chat model per tier
+
+        Returns:
+            Number of bound runnables in the registry
+        """
+        subsets = [self._subset(subset) for subset in subsets]
+        parallel_flags = list(parallel_flags)
+        for tier, model in models.items():
+            for names in subsets:
+                for parallel in parallel_flags:
+                    self.get(model, tier, names, parallel)
+        return len(self._bound)
+
+    def clear(self, *_):
+        """Drop all cached bindings (e.g. after tools change; also a config subscriber)"""
+        self._bound.clear()
+
+    def __len__(self) -> int:
+        return len(self._bound)
+
+
+__all__ = ["BoundModelRegistry"]
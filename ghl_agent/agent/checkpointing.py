@@ -0,0 +1,227 @@
+"""Checkpointer and store backends for graph persistence
+
+Kept apart from graph.py so callers that only need persistence (e.g. the
+inbox API) do not import the agent.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple, get_type_hints
+from typing_extensions import Annotated, TypedDict
+import asyncio
+import os
+import threading
+import structlog
+
+from ghl_agent.config_loader import get_config
+
+logger = structlog.get_logger()
+
+DEFAULT_SQLITE_PATH = "data/ghl_agent.sqlite"
+
+try:
+    from langgraph.channels.delta import DeltaChannel
+except ImportError:  # langgraph < 1.2
+    DeltaChannel = None
+
+
+# Enhanced checkpointer for production with store support
+def get_checkpointer_with_store():
+    """Get checkpointer and store for production use"""
+    postgres_uri = os.getenv("POSTGRES_URI")
+
+    # Try PostgreSQL first
+    if postgres_uri:
+        try:
+            return _get_postgres_backend(postgres_uri)
+        except ImportError:
+            logger.warning("PostgreSQL packages not available, using memory-based solutions")
+
+    # Try Redis if configured
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        try:
+            from langgraph.checkpoint.redis import RedisSaver
+            from langgraph.store.redis import RedisStore
+            checkpointer = RedisSaver.from_conn_string(redis_url)
+            store = RedisStore.from_conn_string(redis_url)
+            return checkpointer, store
+        except ImportError:
+            logger.warning("Redis packages not available, using memory-based solutions")
+
+    # SQLite for durable single-node deployments
+    sqlite_path = os.getenv("SQLITE_PATH")
+    if not sqlite_path and get_config().memory.store_type == "sqlite":
+        sqlite_path = DEFAULT_SQLITE_PATH
+    if sqlite_path:
+        try:
+            from ghl_agent.agent.sqlite_backend import get_sqlite_checkpointer_with_store
+            return get_sqlite_checkpointer_with_store(sqlite_path)
+        except ImportError:
+            logger.warning("SQLite packages not available, using memory-based solutions")
+
+    # Default to memory-based solutions for development
+    return _get_memory_backend()
+
+
+# Process-wide in-memory backend, so every caller sees the same threads and items
+_memory_backend: Optional[Tuple[Any, Any]] = None
+_memory_backend_lock = threading.Lock()
+
+
+def _get_memory_backend() -> Tuple[Any, Any]:
+    """MemorySaver and InMemoryStore shared by the graph, usage ledger and inbox"""
+    global _memory_backend
+    with _memory_backend_lock:
+        if _memory_backend is None:
+            from langgraph.checkpoint.memory import MemorySaver
+            from langgraph.store.memory import InMemoryStore
+            from ghl_agent.serialization import get_serializer
+
+            _memory_backend = (MemorySaver(serde=get_serializer()), InMemoryStore())
+            logger.info("In-memory persistence ready, state is lost on restart")
+        return _memory_backend
+
+
+def _connection_kwargs() -> Dict[str, Any]:
+    """psycopg connection settings the LangGraph Postgres saver and store require"""
+    from psycopg.rows import dict_row
+
+    return {
+        "autocommit": True,
+        # Statements are prepared server-side after this many executions on a connection
+        "prepare_threshold": get_config().memory.prepare_threshold,
+        "row_factory": dict_row
+    }
+
+
+# Shared Postgres backends (one pool each per process)
+_postgres_backend: Optional[Tuple[Any, Any, Any]] = None
+_postgres_backend_lock = threading.Lock()
+_async_postgres_backend: Optional[Tuple[Any, Any, Any]] = None
+_async_postgres_backend_lock = asyncio.Lock()
+
+
+def _get_postgres_backend(postgres_uri: str) -> Tuple[Any, Any]:
+    """Sync Postgres checkpointer and store on a shared connection pool
+
+    The app's request path uses ``get_async_checkpointer_with_store``; this
+    pool only serves sync callers (``compile_graph_with_config``, scripts,
+    benchmarks). It opens connections on demand, at most
+    ``memory.sync_pool_max_size``, and closes them when idle.
+    """
+    global _postgres_backend
+    with _postgres_backend_lock:
+        if _postgres_backend is None:
+            from langgraph.checkpoint.postgres import PostgresSaver
+            from langgraph.store.postgres import PostgresStore
+            from psycopg_pool import ConnectionPool
+            from ghl_agent.serialization import get_serializer
+
+            memory = get_config().memory
+            pool = ConnectionPool(
+                postgres_uri,
+                min_size=0,
+                max_size=memory.sync_pool_max_size,
+                kwargs=_connection_kwargs(),
+                open=True
+            )
+            checkpointer = PostgresSaver(pool, serde=get_serializer())
+            store = PostgresStore(pool)
+            checkpointer.setup()
+            store.setup()
+            _postgres_backend = (pool, checkpointer, store)
+            logger.info("PostgreSQL persistence ready", pool_max_size=memory.sync_pool_max_size)
+        return _postgres_backend[1], _postgres_backend[2]
+
+
+async def get_async_checkpointer_with_store():
+    """Checkpointer and store with non-blocking async methods
+
+    With ``POSTGRES_URI`` this is AsyncPostgresSaver and an
+    AsyncPostgresStore sharing one connection pool, sized by
+    ``memory.pool_min_size``/``memory.pool_max_size`` and set up on first
+    use. It is the app's only pool on the request path: the graph, the
+    usage ledger, the inbox and warm-up all use it. Other backends come
+    from ``get_checkpointer_with_store`` - their async methods already
+    stay off the event loop, and the in-memory fallback is one shared
+    instance per process.
+    """
+    global _async_postgres_backend
+    postgres_uri = os.getenv("POSTGRES_URI")
+    if postgres_uri:
+        try:
+            async with _async_postgres_backend_lock:
+                if _async_postgres_backend is None:
+                    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+                    from langgraph.store.postgres import AsyncPostgresStore
+                    from psycopg_pool import AsyncConnectionPool
+                    from ghl_agent.serialization import get_serializer
+
+                    memory = get_config().memory
+                    pool = AsyncConnectionPool(
+                        postgres_uri,
+                        min_size=memory.pool_min_size,
+                        max_size=memory.pool_max_size,
+                        kwargs=_connection_kwargs(),
+                        open=False
+                    )
+                    await pool.open()
+                    checkpointer = AsyncPostgresSaver(pool, serde=get_serializer())
+                    store = AsyncPostgresStore(pool)
+                    await checkpointer.setup()
+                    await store.setup()
+                    _async_postgres_backend = (pool, checkpointer, store)
+                    logger.info("Async PostgreSQL persistence ready", pool_max_size=memory.pool_max_size)
+            return _async_postgres_backend[1], _async_postgres_backend[2]
+        except ImportError:
+            logger.warning("PostgreSQL packages not available, using memory-based solutions")
+    return get_checkpointer_with_store()
+
+
+async def close_postgres_backends():
+    """Close the shared Postgres connection pools (at shutdown)"""
+    global _postgres_backend, _async_postgres_backend
+    with _postgres_backend_lock:
+        backend, _postgres_backend = _postgres_backend, None
+    if backend is not None:
+        await asyncio.to_thread(backend[0].close)
+    async with _async_postgres_backend_lock:
+        if _async_postgres_backend is not None:
+            await _async_postgres_backend[0].close()
+            _async_postgres_backend = None
+
+
+def _concat(current: Sequence[Any], writes: Sequence[Sequence[Any]]) -> List[Any]:
+    # Batched form of operator.add - folding writes one by one or all at once is equivalent
+    merged = list(current)
+    for write in writes:
+        merged.extend(write)
+    return merged
+
+
+def delta_state_schema(state_schema: type, channels: Sequence[str] = ("messages",), snapshot_every: int = 20) -> type:
+    """Variant of a state schema whose append-only channels are checkpointed as deltas
+
+    Checkpoints of the returned schema store only each step's new items for
+    ``channels`` (the pending writes) instead of the whole accumulated list,
+    plus a full snapshot every ``snapshot_every`` updates so loading replays
+    a bounded number of writes. Other channels are stored per version as
+    usual, i.e. only when they change.
+
+    Returns ``state_schema`` unchanged when the installed LangGraph has no
+    delta channel support.
+    """
+    if DeltaChannel is None:
+        logger.warning("Delta checkpoints need langgraph>=1.2, storing full snapshots")
+        return state_schema
+    hints = get_type_hints(state_schema, include_extras=True)
+    for channel in channels:
+        value_type = hints[channel].__origin__ if hasattr(hints[channel], "__metadata__") else hints[channel]
+        hints[channel] = Annotated[value_type, DeltaChannel(_concat, snapshot_frequency=snapshot_every)]
+    return TypedDict(f"Delta{state_schema.__name__}", hints, total=state_schema.__total__)
+
+
+__all__ = [
+    "get_checkpointer_with_store",
+    "get_async_checkpointer_with_store",
+    "close_postgres_backends",
+    "delta_state_schema"
+]
@@ -1,18 +1,19 @@
 """LangGraph Cloud deployment graph - Battery Consultation Agent"""
-from typing import TypedDict, Annotated, Sequence, Dict, Any, List, Optional, Literal, Union
+from typing import TypedDict, Annotated, Sequence, Dict, Any, List, Optional, Literal, Tuple, Union
 from typing_extensions import TypedDict as ExtTypedDict, Annotated as ExtAnnotated
 from operator import add
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, END, START
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.channels.untracked_value import UntrackedValue
 from langgraph.errors import NodeInterrupt
-from langgraph.store.base import BaseStore
+from langgraph.config import get_store
+from langgraph.store.base import BaseStore, PutOp, SearchOp
 from langgraph.store.memory import InMemoryStore
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
-from langchain_openai import ChatOpenAI
 import os
 import asyncio
 import uuid
+import time
 from datetime import datetime
 
 # Load environment variables
@@ -38,22 +39,45 @@ from ghl_agent.tools.battery_tools import (
     update_conversation_state
 )
 
-from ghl_agent.config_loader import get_config, get_config_value
+from ghl_agent.config_loader import DEFAULT_BUDGET_EXCEEDED_TEMPLATE, get_config, get_config_value, subscribe_config
+from ghl_agent.catalog import get_catalog, subscribe_catalog
+from ghl_agent.agent.checkpointing import delta_state_schema, get_async_checkpointer_with_store, get_checkpointer_with_store
 from ghl_agent.agent.reflection import reflect_on_conversation
-
-# Load configuration
-config = get_config()
+from ghl_agent.agent.bound_models import BoundModelRegistry
+from ghl_agent.metrics import instrument_node, record_budget_action, track_store, track_tool
+from ghl_agent.serialization import compact_record
+from ghl_agent.usage import BUDGET_DOWNGRADE, BUDGET_TEMPLATE, usage_ledger, usage_scope
+from ghl_agent.tracing import mark_error, span, trace_node
+from ghl_agent.agent.tool_exposure import StageToolStats, tools_for_stage
+from ghl_agent.agent.model_tiers import (
+    DRAFT_TAG,
+    ESCALATION_TAG,
+    TIER_FAST,
+    TIER_SMART,
+    invoke_with_tiering,
+    select_turn_tier,
+    tier_for_task
+)
 
 # Configuration schema for deployment
 class AgentConfig(BaseModel):
     """Configuration for the battery consultation agent"""
-    min_budget: int = Field(default_factory=lambda: config.qualification.min_budget, description="Minimum budget requirement in USD")
-    calendar_days_ahead: int = Field(default_factory=lambda: config.calendar.days_ahead, description="Days to look ahead for appointments")
-    response_language: str = Field(default_factory=lambda: config.business.language, description="Language for responses (es/en)")
-    max_retry_attempts: int = Field(default_factory=lambda: config.behavior.max_retry_attempts, description="Max retries for failed operations")
-    enable_human_review: bool = Field(default_factory=lambda: config.behavior.enable_human_review, description="Enable human review for appointments")
-    enable_memory: bool = Field(default_factory=lambda: config.memory.enable_persistence, description="Enable conversation memory persistence")
-    parallel_tool_calls: bool = Field(default_factory=lambda: config.behavior.parallel_tool_calls, description="Enable parallel tool execution")
+    min_budget: int = Field(default_factory=lambda: get_config().qualification.min_budget, description="Minimum budget requirement in USD")
+    calendar_days_ahead: int = Field(default_factory=lambda: get_config().calendar.days_ahead, description="Days to look ahead for appointments")
+    response_language: str = Field(default_factory=lambda: get_config().business.language, description="Language for responses (es/en)")
+    max_retry_attempts: int = Field(default_factory=lambda: get_config().behavior.max_retry_attempts, description="Max retries for failed operations")
+    enable_human_review: bool = Field(default_factory=lambda: get_config().behavior.enable_human_review, description="Enable human review for appointments")
+    enable_memory: bool = Field(default_factory=lambda: get_config().memory.enable_persistence, description="Enable conversation memory persistence")
+    parallel_tool_calls: bool = Field(default_factory=lambda: get_config().behavior.parallel_tool_calls, description="Enable parallel tool execution")
+    enable_model_tiering: bool = Field(default_factory=lambda: get_config().models.enable_tiering, description="Use the fast model tier for triage turns")
+    fast_model: str = Field(default_factory=lambda: get_config().models.tiers[TIER_FAST].name, description="Model for triage, extraction and reflection")
+    smart_model: str = Field(default_factory=lambda: get_config().models.tiers[TIER_SMART].name, description="Model for recommendation turns and escalations")
+    escalation_threshold: float = Field(default_factory=lambda: get_config().models.escalation_threshold, description="Escalate fast-tier answers below this confidence")
+
+    @property
+    def model_names(self) -> Dict[str, str]:
+        """Tier -> model name mapping"""
+        return {TIER_FAST: self.fast_model, TIER_SMART: self.smart_model}
 
 # Input schema - what the API accepts
 class InputState(ExtTypedDict):
@@ -61,6 +85,7 @@ class InputState(ExtTypedDict):
     messages: List[Dict[str, str]]  # Simple dict format for API input
     contact_id: str
     conversation_id: Optional[str]
+    location_id: Optional[str]
 
 # Output schema - what the API returns
 class OutputState(ExtTypedDict):
@@ -95,6 +120,8 @@ class State(ExtTypedDict):
     messages: Annotated[Sequence[BaseMessage], add]  # Auto-merge messages
     contact_id: str
     conversation_id: Optional[str]
+    # GHL location (tenant) the conversation belongs to - used for usage accounting
+    location_id: Optional[str]
     # Battery consultation specific state
     housing_type: Optional[Literal["casa", "apartamento"]]
     equipment_list: Optional[List[str]]
@@ -105,7 +132,7 @@ class State(ExtTypedDict):
     customer_phone: Optional[str]
     customer_email: Optional[str]
     # Conversation tracking
-    conversation_stage: Optional[Literal["greeting", "discovery", "qualification", "scheduling", "completed"]]
+    conversation_stage: Optional[Literal["discovery", "qualification", "recommendation", "scheduling", "completed"]]
     retry_count: int
     # Error tracking
     error: Optional[str]
@@ -113,28 +140,27 @@ class State(ExtTypedDict):
     tool_calls: Optional[List[Dict[str, Any]]]
     # Configuration
     config: Optional[AgentConfig]
-    # Memory store reference
-    store: Optional[BaseStore]
-
+    # Memory store reference - a live object, so it is kept out of checkpoints
+    store: Annotated[Optional[BaseStore], UntrackedValue(Optional[BaseStore], guard=False)]
 
-# Initialize the model
-model = ChatOpenAI(
-    model="gpt-4-turbo-preview",
-    temperature=0.7
-)
 
 # Memory management functions
 def get_memory_store(state: State) -> BaseStore:
-    """Get or create memory store for the conversation"""
+    """Get the memory store: the state's, the graph's (compiled in or platform-provided), or a new in-memory one"""
     if state.get("store"):
         return state["store"]
-    return InMemoryStore()
+    try:
+        store = get_store()
+    except RuntimeError:  # called outside a graph run
+        store = None
+    return store if store is not None else InMemoryStore()
 
 def load_conversation_memory(store: BaseStore, contact_id: str) -> Optional[ConversationMemory]:
     """Load conversation memory from store"""
     try:
         namespace = ("conversation", contact_id)
-        memories = store.search(namespace)
+        with track_store("search", namespace):
+            memories = store.search(namespace)
         if memories:
             return ConversationMemory(**memories[0].value)
     except Exception as e:
@@ -145,7 +171,8 @@ def save_conversation_memory(store: BaseStore, contact_id: str, memory: Conversa
     """Save conversation memory to store"""
     try:
         namespace = ("conversation", contact_id)
-        store.put(namespace, str(uuid.uuid4()), memory.model_dump(mode="json"))
+        with track_store("put", namespace):
+            store.put(namespace, str(uuid.uuid4()), compact_record(memory))
     except Exception as e:
         logger.error(f"Failed to save conversation memory: {e}")
 
@@ -153,13 +180,48 @@ def load_customer_preferences(store: BaseStore, contact_id: str) -> Optional[Cus
     """Load customer preferences from store"""
     try:
         namespace = ("preferences", contact_id)
-        memories = store.search(namespace)
+        with track_store("search", namespace):
+            memories = store.search(namespace)
         if memories:
             return CustomerPreferences(**memories[0].value)
     except Exception as e:
         logger.warning(f"Failed to load customer preferences: {e}")
     return None
 
+async def aload_memory_context(store: BaseStore, contact_id: str) -> Tuple[Optional[ConversationMemory], Optional[CustomerPreferences]]:
+    """Load conversation memory and customer preferences in one store batch"""
+    conversation_memory = None
+    customer_preferences = None
+    try:
+        namespace = ("conversation", contact_id)
+        preferences_namespace = ("preferences", contact_id)
+        with track_store("search", namespace, preferences_namespace):
+            memories, preferences = await store.abatch([
+                SearchOp(namespace, limit=1),
+                SearchOp(preferences_namespace, limit=1)
+            ])
+        if memories:
+            conversation_memory = ConversationMemory(**memories[0].value)
+        if preferences:
+            customer_preferences = CustomerPreferences(**preferences[0].value)
+    except Exception as e:
+        logger.warning(f"Failed to load conversation memory: {e}")
+    return conversation_memory, customer_preferences
+
+async def asave_memory_records(store: BaseStore, puts: List[PutOp]):
+    """Write a turn's memory records (conversation memory, insights) in one store batch
+    
+    The SQLite store writes a batch in one transaction and the Postgres
+    stores as one multi-row upsert, so the records land together or not at all.
+    """
+    if not puts:
+        return
+    try:
+        with track_store("put", *(put.namespace for put in puts)):
+            await store.abatch(puts)
+    except Exception as e:
+        logger.error(f"Failed to save conversation memory: {e}")
+
 # Enhanced tools with better error handling
 async def safe_send_ghl_message(contact_id: str, message: str, conversation_id: Optional[str] = None) -> str:
     """Send message with enhanced error handling"""
@@ -188,7 +250,15 @@ tools = [
     update_conversation_state
 ]
 
-# Bind tools to model with parallel execution support
+# Pre-bound model/tool combinations - tool schemas are serialized once per
+# (model tier, tool subset, parallel flag) instead of on every turn
+bound_models = BoundModelRegistry(tools)
+# Reloads can change tier models - rebind on next use
+subscribe_config(bound_models.clear)
+
+# Tool-call and prompt-size accounting for stage-scoped tool exposure
+stage_tool_stats = StageToolStats(tools)
+
 # Add tool examples to help the model understand proper usage
 tool_examples = [
     {
@@ -206,15 +276,14 @@ tool_examples = [
     }
 ]
 
-model_with_tools = model.bind_tools(tools, parallel_tool_calls=True)
-
 # Build system prompt from config
 def build_system_prompt():
     """Build system prompt from configuration"""
+    config = get_config()
     equipment_list = ", ".join([f"{k.capitalize()}:{v}W" for k, v in list(config.equipment_consumption.items())[:5]])
     
     products_text = []
-    for category, products in config.products.items():
+    for category, products in get_catalog().featured.items():
         for product in products:
             products_text.append(f"- {product['best_for']}: {product['name']} ({product['capacity_wh']}Wh)")
     
@@ -251,8 +320,23 @@ Presupuesto mínimo: ${config.qualification.min_budget}
 Mantén respuestas cortas y conversacionales (2-3 oraciones máximo).
 Responde en {config.business.language}."""
 
-# System prompt
-SYSTEM_PROMPT = build_system_prompt()
+# System prompt, rebuilt lazily after the config or featured products change
+_system_prompt: Optional[str] = None
+
+def get_system_prompt() -> str:
+    """Get the cached system prompt"""
+    global _system_prompt
+    if _system_prompt is None:
+        _system_prompt = build_system_prompt()
+    return _system_prompt
+
+def invalidate_system_prompt(*_):
+    """Drop the cached system prompt (config and catalog subscriber)"""
+    global _system_prompt
+    _system_prompt = None
+
+subscribe_config(invalidate_system_prompt)
+subscribe_catalog(invalidate_system_prompt, sections=["featured"])
 
 # Helper function to convert dict messages to BaseMessage objects
 def convert_messages(messages: List[Union[Dict, BaseMessage]]) -> List[BaseMessage]:
@@ -297,7 +381,8 @@ def get_conversation_stage(state: State) -> str:
         return "scheduling"
     elif state.get("customer_phone"):
         return "completed"
-    return "greeting"
+    # Sized but not yet interested in a consultation
+    return "recommendation"
 
 # Agent node with memory support
 async def agent(state: State) -> State:
@@ -314,15 +399,14 @@ async def agent(state: State) -> State:
         conversation_memory = None
         customer_preferences = None
         if config.enable_memory:
-            conversation_memory = load_conversation_memory(store, contact_id)
-            customer_preferences = load_customer_preferences(store, contact_id)
+            conversation_memory, customer_preferences = await aload_memory_context(store, contact_id)
         
         # Convert dict messages to BaseMessage objects if needed
         if messages and isinstance(messages[0], dict):
             messages = convert_messages(messages)
         
         # Build enhanced system prompt with memory context
-        system_content = SYSTEM_PROMPT
+        system_content = get_system_prompt()
         
         # Add contact_id and conversation_id to context
         if contact_id:
@@ -363,23 +447,45 @@ async def agent(state: State) -> State:
                 f"Phone: {state.get('customer_phone', 'Unknown')}"
             )
         
-        # Configure model for parallel tool calls if enabled
-        active_model = model_with_tools if config.parallel_tool_calls else model.bind_tools(tools, parallel_tool_calls=False)
+        # Over-budget tenants get a template reply, over-budget contacts the fast tier only
+        location_id = state.get("location_id")
+        budget_action = await usage_ledger.budget_action(location_id, contact_id)
+        if budget_action:
+            record_budget_action(budget_action)
+            logger.warning("Usage budget exceeded", contact_id=contact_id, location_id=location_id, action=budget_action)
+        if budget_action == BUDGET_TEMPLATE:
+            template = get_config().templates.get("budget_exceeded", DEFAULT_BUDGET_EXCEEDED_TEMPLATE)
+            await safe_send_ghl_message(contact_id, template, conversation_id)
+            return {
+                "messages": [AIMessage(content=template)],
+                "tool_calls": [],
+                "response": template,
+                "conversation_stage": current_stage,
+                "retry_count": 0,
+                "store": store
+            }
         
-        # Invoke model with retry logic
-        retry_count = state.get("retry_count", 0)
-        max_retries = config.max_retry_attempts
+        # Pick the model tier: fast for triage/extraction, smart for recommendations
+        tier = select_turn_tier(state, messages, config.enable_model_tiering)
+        escalation_threshold = config.escalation_threshold
+        if budget_action == BUDGET_DOWNGRADE:
+            tier, escalation_threshold = TIER_FAST, 0.0
         
-        response = None
-        for attempt in range(max_retries):
-            try:
-                response = await active_model.ainvoke(messages)
-                break
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise
-                logger.warning(f"Model invocation attempt {attempt + 1} failed: {e}")
-                await asyncio.sleep(1)
+        # Only expose the tools that make sense in the current stage
+        stage_tools = tools_for_stage(current_stage)
+        
+        # Invoke model - the LLM gateway handles rate limits and transient errors
+        with usage_scope(location_id, contact_id, current_stage):
+            response, tier = await invoke_with_tiering(
+                messages,
+                tier,
+                prepare=lambda m, tier: bound_models.get(m, tier, stage_tools, parallel_tool_calls=config.parallel_tool_calls),
+                escalation_threshold=escalation_threshold,
+                model_names=config.model_names
+            )
+        stage_tool_stats.record(current_stage, stage_tools, response)
+        
+        logger.info("Agent turn completed", contact_id=contact_id, stage=current_stage, model_tier=tier)
         
         # Track tool calls for output
         tool_calls = []
@@ -390,6 +496,9 @@ async def agent(state: State) -> State:
                     "args": tc["args"]
                 })
         
+        # Memory records written this turn - saved together after reflection
+        memory_puts = []
+        
         # Save updated memory if enabled
         if config.enable_memory and any([
             state.get("customer_name"),
@@ -407,22 +516,23 @@ async def agent(state: State) -> State:
                 budget_confirmed=state.get("interested_in_consultation"),
                 appointment_scheduled=current_stage == "completed"
             )
-            save_conversation_memory(store, contact_id, new_memory)
+            memory_puts.append(PutOp(("conversation", contact_id), str(uuid.uuid4()), compact_record(new_memory)))
             
         # Run reflection analysis periodically (every 5 messages or at key stages)
         if len(messages) % 5 == 0 or current_stage in ["qualification", "completed"]:
             try:
-                insights = await reflect_on_conversation(messages, contact_id)
+                with usage_scope(location_id, contact_id, "reflection"):
+                    insights = await reflect_on_conversation(messages, contact_id)
                 if insights:
                     logger.info("Reflection insights", 
                               contact_id=contact_id,
                               sentiment=insights.get("sentiment"),
                               next_action=insights.get("next_action"))
                     # Store insights in memory
-                    namespace = ("insights", contact_id)
-                    store.put(namespace, str(uuid.uuid4()), insights)
+                    memory_puts.append(PutOp(("insights", contact_id), str(uuid.uuid4()), insights))
             except Exception as e:
                 logger.warning(f"Reflection analysis failed: {e}")
+        await asave_memory_records(store, memory_puts)
         
         # Update state - preserve any existing state values
         updated_state = {
@@ -537,12 +647,76 @@ async def calculate_consumption_parallel(state: State) -> State:
         logger.warning(f"Failed to calculate consumption: {e}")
     return {}
 
-# Create the graph with explicit schemas
-workflow = StateGraph(
-    State, 
-    input_schema=InputState,
-    output_schema=OutputState
-)
+# Name -> tool dispatch table
+TOOLS_BY_NAME = {tool.name: tool for tool in tools}
+
+# Tools without side effects run concurrently; every other tool (GHL writes,
+# state updates, tools added later) runs one at a time in the order the model asked for
+READ_ONLY_TOOLS = frozenset({
+    "get_ghl_contact_info",
+    "get_available_calendar_slots",
+    "get_conversation_messages",
+    "calculate_battery_runtime",
+    "recommend_battery_system",
+    "format_consultation_request"
+})
+
+def _prepare_tool_args(tool_name: str, tool_args: Dict[str, Any], contact_id: str, conversation_id: Optional[str]) -> Dict[str, Any]:
+    """Replace placeholder contact IDs and fill in the conversation ID"""
+    tool_args = tool_args.copy()
+    
+    # Fix contact_id for any tool that needs it
+    if "contact_id" in tool_args:
+        # Replace any placeholder values with the actual contact_id
+        if tool_args["contact_id"] in ["contact_id", "unknown", "test-contact-id", ""]:
+            tool_args["contact_id"] = contact_id
+        # If it's already a proper ID (not a placeholder), keep it
+        elif not tool_args["contact_id"].startswith("test-") and len(tool_args["contact_id"]) > 10:
+            # Keep the existing contact_id if it looks valid
+            pass
+        else:
+            # Otherwise use the one from state
+            tool_args["contact_id"] = contact_id
+    
+    # Add conversation_id if the tool supports it
+    if tool_name in ["send_ghl_message", "get_conversation_messages"] and conversation_id:
+        if "conversation_id" not in tool_args or not tool_args.get("conversation_id"):
+            tool_args["conversation_id"] = conversation_id
+    
+    return tool_args
+
+async def _execute_tool_call(
+    tool_call: Dict[str, Any],
+    contact_id: str,
+    conversation_id: Optional[str],
+    stage: Optional[str] = None
+) -> ToolMessage:
+    """Execute a single tool call and wrap the result in a ToolMessage"""
+    tool_name = tool_call["name"]
+    tool_func = TOOLS_BY_NAME.get(tool_name)
+    if tool_func is None:
+        return ToolMessage(content=f"Tool {tool_name} not found", tool_call_id=tool_call["id"])
+    
+    tool_args = _prepare_tool_args(tool_name, tool_call["args"], contact_id, conversation_id)
+    with span(f"tool.{tool_name}", stage=stage) as tool_span, track_tool(tool_name, stage) as timer:
+        try:
+            if tool_func.response_format == "content_and_artifact":
+                # Invoking with the full tool call returns a ToolMessage carrying the artifact
+                return await tool_func.ainvoke({
+                    "name": tool_name,
+                    "args": tool_args,
+                    "id": tool_call["id"],
+                    "type": "tool_call"
+                })
+            result = await tool_func.ainvoke(tool_args)
+            return ToolMessage(content=str(result), tool_call_id=tool_call["id"])
+        except Exception as e:
+            timer.outcome = "error"
+            mark_error(tool_span, str(e))
+            return ToolMessage(
+                content=f"Error executing {tool_name}: {str(e)}",
+                tool_call_id=tool_call["id"]
+            )
 
 # Custom tool node that ensures contact_id is passed
 async def custom_tool_node(state: State) -> State:
@@ -550,6 +724,7 @@ async def custom_tool_node(state: State) -> State:
     messages = state["messages"]
     contact_id = state.get("contact_id", "unknown")
     conversation_id = state.get("conversation_id")
+    stage = state.get("conversation_stage")
     
     # Get the last message which should contain tool calls
     last_message = messages[-1]
@@ -557,155 +732,275 @@ async def custom_tool_node(state: State) -> State:
     if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
         return state
     
-    # Execute tools with proper contact_id
-    tool_messages = []
-    for tool_call in last_message.tool_calls:
-        tool_name = tool_call["name"]
-        tool_args = tool_call["args"].copy()
-        
-        # Fix contact_id for any tool that needs it
-        if "contact_id" in tool_args:
-            # Replace any placeholder values with the actual contact_id
-            if tool_args["contact_id"] in ["contact_id", "unknown", "test-contact-id", ""]:
-                tool_args["contact_id"] = contact_id
-            # If it's already a proper ID (not a placeholder), keep it
-            elif not tool_args["contact_id"].startswith("test-") and len(tool_args["contact_id"]) > 10:
-                # Keep the existing contact_id if it looks valid
-                pass
-            else:
-                # Otherwise use the one from state
-                tool_args["contact_id"] = contact_id
-        
-        # Add conversation_id if the tool supports it
-        if tool_name in ["send_ghl_message", "get_conversation_messages"] and conversation_id:
-            if "conversation_id" not in tool_args or not tool_args.get("conversation_id"):
-                tool_args["conversation_id"] = conversation_id
-            
-        # Execute the tool
-        try:
-            # Find the tool function
-            tool_func = None
-            for tool in tools:
-                if tool.name == tool_name:
-                    tool_func = tool
-                    break
-            
-            if tool_func:
-                result = await tool_func.ainvoke(tool_args)
-                tool_messages.append(
-                    ToolMessage(
-                        content=str(result),
-                        tool_call_id=tool_call["id"]
-                    )
-                )
-            else:
-                tool_messages.append(
-                    ToolMessage(
-                        content=f"Tool {tool_name} not found",
-                        tool_call_id=tool_call["id"]
-                    )
-                )
-        except Exception as e:
-            tool_messages.append(
-                ToolMessage(
-                    content=f"Error executing {tool_name}: {str(e)}",
-                    tool_call_id=tool_call["id"]
-                )
-            )
+    # Read-only tools run concurrently; writing tools are serialized in call order
+    write_lock = asyncio.Lock()
+    
+    async def run(tool_call: Dict[str, Any]) -> ToolMessage:
+        if tool_call["name"] not in READ_ONLY_TOOLS:
+            async with write_lock:
+                return await _execute_tool_call(tool_call, contact_id, conversation_id, stage)
+        return await _execute_tool_call(tool_call, contact_id, conversation_id, stage)
     
-    # Check if any state updates were made
+    tool_messages = await asyncio.gather(*(run(tool_call) for tool_call in last_message.tool_calls))
+    
+    # Merge typed state updates from tool artifacts, in tool call order
     state_updates = {}
-    for i, tool_message in enumerate(tool_messages):
-        if isinstance(tool_message.content, str) and "State updated:" in tool_message.content:
-            # Extract state updates from the corresponding tool call
-            tool_call = last_message.tool_calls[i]
-            if tool_call["name"] == "update_conversation_state":
-                args = tool_call["args"]
-                if args.get("housing_type"):
-                    state_updates["housing_type"] = args["housing_type"]
-                if args.get("equipment_list"):
-                    state_updates["equipment_list"] = args["equipment_list"]
-                if args.get("customer_name"):
-                    state_updates["customer_name"] = args["customer_name"]
-                if args.get("customer_phone"):
-                    state_updates["customer_phone"] = args["customer_phone"]
-                if args.get("interested_in_consultation") is not None:
-                    state_updates["interested_in_consultation"] = args["interested_in_consultation"]
+    for tool_message in tool_messages:
+        if isinstance(tool_message.artifact, dict):
+            state_updates.update({
+                key: value for key, value in tool_message.artifact.items()
+                if key in State.__annotations__
+            })
     
     # Return messages and any state updates
-    return {"messages": tool_messages, **state_updates}
+    return {"messages": list(tool_messages), **state_updates}
 
-# Add nodes
-workflow.add_node("agent", agent)
-workflow.add_node("tools", custom_tool_node)  # Use custom tool node
-workflow.add_node("error", error_node)
+def build_workflow(state_schema: type = State) -> StateGraph:
+    """Build the agent workflow over ``state_schema`` (State or a variant with other channels)"""
+    # Create the graph with explicit schemas
+    workflow = StateGraph(
+        state_schema,
+        input_schema=InputState,
+        output_schema=OutputState
+    )
+    
+    # Add nodes - the explicit input schema overrides the nodes' State annotations
+    # Nodes are timed per stage and outcome and traced when metrics/tracing are enabled
+    workflow.add_node("agent", instrument_node("agent", trace_node("agent", agent)), input_schema=state_schema)
+    workflow.add_node("tools", instrument_node("tools", trace_node("tools", custom_tool_node)), input_schema=state_schema)  # Use custom tool node
+    workflow.add_node("error", instrument_node("error", trace_node("error", error_node)), input_schema=state_schema)
 
-# Optional: Add parallel enrichment nodes (commented out by default)
-# workflow.add_node("enrich_contact", enrich_contact_info)
-# workflow.add_node("calculate_consumption", calculate_consumption_parallel)
+    # Optional: Add parallel enrichment nodes (commented out by default)
+    # workflow.add_node("enrich_contact", enrich_contact_info)
+    # workflow.add_node("calculate_consumption", calculate_consumption_parallel)
 
-# Set entry point
-workflow.add_edge(START, "agent")
+    # Set entry point
+    workflow.add_edge(START, "agent")
 
-# Add conditional routing
-workflow.add_conditional_edges(
-    "agent",
-    should_continue,
-    {
-        "tools": "tools",
-        "error": "error",
-        "end": END
-    }
-)
+    # Add conditional routing - unannotated wrapper so the router's State hint is not added as a schema
+    workflow.add_conditional_edges(
+        "agent",
+        lambda state: should_continue(state),
+        {
+            "tools": "tools",
+            "error": "error",
+            "end": END
+        }
+    )
+
+    # Route tools back to agent for continued conversation
+    workflow.add_edge("tools", "agent")
 
-# Route tools back to agent for continued conversation
-workflow.add_edge("tools", "agent")
+    # Error node goes to end
+    workflow.add_edge("error", END)
 
-# Error node goes to end
-workflow.add_edge("error", END)
+    # Optional: Example of parallel execution pattern
+    # To enable parallel enrichment, uncomment these lines:
+    # workflow.add_edge(START, "enrich_contact")  # Runs in parallel with agent
+    # workflow.add_edge(START, "calculate_consumption")  # Runs in parallel with agent
+    # workflow.add_edge("enrich_contact", "agent")  # Merge results
+    # workflow.add_edge("calculate_consumption", "agent")  # Merge results
+    
+    return workflow
 
-# Optional: Example of parallel execution pattern
-# To enable parallel enrichment, uncomment these lines:
-# workflow.add_edge(START, "enrich_contact")  # Runs in parallel with agent
-# workflow.add_edge(START, "calculate_consumption")  # Runs in parallel with agent
-# workflow.add_edge("enrich_contact", "agent")  # Merge results
-# workflow.add_edge("calculate_consumption", "agent")  # Merge results
+workflow = build_workflow()
 
 # Compile the graph
-graph = workflow.compile()
+# Compiled on first use - see get_graph and the module __getattr__ below
+_compiled_graph = None
 
-# Streaming helper for better UX
-async def stream_graph_updates(state: State, config: AgentConfig = None):
-    """Stream updates during graph execution"""
-    if not config:
-        config = state.get("config", AgentConfig())
-    
-    # Stream status updates
-    yield {"status": "processing", "stage": state.get("conversation_stage", "unknown")}
-    
-    # If calculating consumption
-    if should_calculate_consumption(state):
-        yield {"status": "calculating", "message": "Calculando consumo eléctrico..."}
-    
-    # If booking appointment
-    if should_book_appointment(state):
-        yield {"status": "booking", "message": "Verificando disponibilidad de calendario..."}
-    
-    # If we have tool calls
-    if state.get("tool_calls"):
-        for tool_call in state["tool_calls"]:
+def get_graph():
+    """Get the compiled graph, compiling it on first use"""
+    global _compiled_graph
+    if _compiled_graph is None:
+        started = time.perf_counter()
+        _compiled_graph = workflow.compile()
+        logger.info("Graph compiled", duration_ms=round((time.perf_counter() - started) * 1000, 2))
+    return _compiled_graph
+
+# Request-path graph: compiled once, with the async persistence backend
+_request_graph = None
+_request_graph_lock = asyncio.Lock()
+
+async def aget_graph():
+    """Get the graph local requests run on, compiling it on first use
+
+    Unlike ``get_graph`` (for the LangGraph platform, which brings its own
+    persistence) it checkpoints each contact's thread and gives nodes the
+    shared store, so memory saved in one turn is loaded by the next.
+    """
+    global _request_graph
+    async with _request_graph_lock:
+        if _request_graph is None:
+            started = time.perf_counter()
+            _request_graph = await acompile_graph_with_config(enable_checkpointing=True)
+            logger.info("Request graph compiled", duration_ms=round((time.perf_counter() - started) * 1000, 2))
+    return _request_graph
+
+def thread_config(contact_id: str, run_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run config for a contact's checkpointed thread - the same id deployments use"""
+    run_config = run_config or {}
+    return {
+        **run_config,
+        "configurable": {"thread_id": f"ghl-{contact_id}", **run_config.get("configurable", {})}
+    }
+
+def _turn_input(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Input for one turn on a checkpointed thread: messages as objects, last turn's outcome cleared"""
+    return {"error": None, "response": None, **state, "messages": convert_messages(state.get("messages", []))}
+
+def __getattr__(name: str) -> Any:
+    """Deferred module attributes (``graph`` for the LangGraph loader, ``SYSTEM_PROMPT``)"""
+    if name == "graph":
+        return get_graph()
+    if name == "SYSTEM_PROMPT":
+        return get_system_prompt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Streaming helpers
+STREAMED_NODES = ("agent", "tools", "error")
+# Only this node's model tokens are the customer-facing reply
+REPLY_NODE = "agent"
+# State keys that hold runtime objects and are never streamed to clients
+NON_STREAMED_KEYS = ("store", "config")
+
+def _serialize_stream_value(value: Any) -> Any:
+    """Convert state values into JSON-friendly structures for streaming"""
+    if isinstance(value, BaseMessage):
+        data = {"type": value.type, "content": value.content}
+        if getattr(value, "tool_calls", None):
+            data["tool_calls"] = [
+                {"name": tc["name"], "args": tc["args"], "id": tc.get("id")}
+                for tc in value.tool_calls
+            ]
+        if isinstance(value, ToolMessage):
+            data["tool_call_id"] = value.tool_call_id
+        return data
+    if isinstance(value, dict):
+        return {k: _serialize_stream_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_serialize_stream_value(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _state_diff(update: Any) -> Dict[str, Any]:
+    """Extract the serializable channels changed by a node"""
+    if not isinstance(update, dict):
+        return {}
+    return {
+        key: _serialize_stream_value(value)
+        for key, value in update.items()
+        if key not in NON_STREAMED_KEYS
+    }
+
+async def stream_graph_updates(state: Dict[str, Any], run_config: Optional[Dict[str, Any]] = None):
+    """Run the graph and stream node, tool, token and state events as they happen
+
+    Built on ``graph.astream_events``. Every yielded event is a JSON-serializable
+    dict with an ``event`` key:
+
+    - ``run_start`` / ``run_end``: whole run, ``run_end`` carries the final response
+    - ``node_start`` / ``node_end``: graph nodes with ``duration_ms``
+    - ``state_update``: channels changed by a node
+    - ``tool_start`` / ``tool_end`` / ``tool_error``: tool executions with ``duration_ms``
+    - ``token``: streamed reply deltas from the agent node; fast-tier drafts
+      are held back until they are kept, and dropped if the turn escalates
+    """
+    started_at = time.perf_counter()
+    run_starts: Dict[str, float] = {}
+    # Draft model run id -> token events held back until the tier decision
+    drafts: Dict[str, List[Dict[str, Any]]] = {}
+    response = None
+    error = None
+
+    yield {"event": "run_start", "contact_id": state.get("contact_id")}
+
+    graph = await aget_graph()
+    config = thread_config(state["contact_id"], run_config)
+    async for event in graph.astream_events(_turn_input(state), config=config, version="v2"):
+        kind = event["event"]
+        name = event.get("name")
+        run_id = event.get("run_id")
+        metadata = event.get("metadata", {})
+        node = metadata.get("langgraph_node")
+        is_node = name in STREAMED_NODES and name == node
+
+        if drafts and run_id not in drafts:
+            # The next run after a draft decides it: an escalation discards it, anything else keeps it
+            if not (kind == "on_chat_model_start" and ESCALATION_TAG in event.get("tags", [])):
+                for token_events in drafts.values():
+                    for token_event in token_events:
+                        yield token_event
+            drafts.clear()
+
+        if kind == "on_chain_start" and is_node:
+            run_starts[run_id] = time.perf_counter()
+            yield {"event": "node_start", "node": name, "step": metadata.get("langgraph_step")}
+
+        elif kind == "on_chain_end" and is_node:
+            duration = time.perf_counter() - run_starts.pop(run_id, started_at)
+            output = event["data"].get("output")
+            yield {"event": "node_end", "node": name, "duration_ms": round(duration * 1000, 2)}
+            changes = _state_diff(output)
+            if changes:
+                if changes.get("response"):
+                    response = changes["response"]
+                if changes.get("error"):
+                    error = changes["error"]
+                yield {"event": "state_update", "node": name, "changes": changes}
+
+        elif kind == "on_tool_start":
+            run_starts[run_id] = time.perf_counter()
             yield {
-                "status": "tool_execution",
-                "tool": tool_call["name"],
-                "message": f"Ejecutando: {tool_call['name']}"
+                "event": "tool_start",
+                "tool": name,
+                "input": _serialize_stream_value(event["data"].get("input"))
             }
 
+        elif kind in ("on_tool_end", "on_tool_error"):
+            duration = time.perf_counter() - run_starts.pop(run_id, started_at)
+            tool_event = {
+                "event": "tool_end" if kind == "on_tool_end" else "tool_error",
+                "tool": name,
+                "duration_ms": round(duration * 1000, 2)
+            }
+            if kind == "on_tool_end":
+                output = event["data"].get("output")
+                tool_event["output"] = str(getattr(output, "content", output))[:500]
+            else:
+                tool_event["error"] = str(event["data"].get("error"))
+            yield tool_event
+
+        elif kind == "on_chat_model_stream" and node == REPLY_NODE:
+            # Other model calls (e.g. the reflection sub-graph's "analyze") are internal
+            chunk = event["data"].get("chunk")
+            content = getattr(chunk, "content", None)
+            if content:
+                token_event = {"event": "token", "node": node, "content": content}
+                if DRAFT_TAG in event.get("tags", []):
+                    drafts.setdefault(run_id, []).append(token_event)
+                else:
+                    yield token_event
+
+    for token_events in drafts.values():
+        for token_event in token_events:
+            yield token_event
+
+    yield {
+        "event": "run_end",
+        "duration_ms": round((time.perf_counter() - started_at) * 1000, 2),
+        "response": response,
+        "error": error
+    }
+
 # Cloud-optimized message processing function
 async def process_ghl_message(
     contact_id: str,
     conversation_id: Optional[str],
     message: str,
-    conversation_history: List[Dict[str, str]] = None
+    conversation_history: List[Dict[str, str]] = None,
+    location_id: Optional[str] = None
 ) -> str:
     """Process a message from GoHighLevel webhook - optimized for cloud deployment"""
     try:
@@ -742,17 +1037,13 @@ Mantén respuestas cortas y conversacionales (2-3 oraciones máximo)."""
                 HumanMessage(content=message)
             ]
             
-            # Get response with retry handling
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = await model_with_tools.ainvoke(messages)
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    logger.warning(f"Model invocation attempt {attempt + 1} failed: {e}")
-                    await asyncio.sleep(1)
+            # Get response - the LLM gateway handles rate limits and transient errors
+            with usage_scope(location_id, contact_id, "triage"):
+                response, _ = await invoke_with_tiering(
+                    messages,
+                    tier_for_task("triage"),
+                    prepare=lambda m, tier: bound_models.get(m, tier, parallel_tool_calls=True)
+                )
             
             # Execute tool calls
             if response.tool_calls:
@@ -789,9 +1080,13 @@ Mantén respuestas cortas y conversacionales (2-3 oraciones máximo)."""
             # Local mode - use full graph
             logger.info("Using local graph processing")
             
-            # Convert conversation history to messages
+            graph = await aget_graph()
+            config = thread_config(contact_id)
+
+            # Convert conversation history to messages - only for a new thread,
+            # a checkpointed one already holds the earlier turns
             messages = []
-            if conversation_history:
+            if conversation_history and not (await graph.aget_state(config)).values.get("messages"):
                 for msg in conversation_history:
                     role = msg.get("role", "user")
                     content = msg.get("content", "")
@@ -807,11 +1102,12 @@ Mantén respuestas cortas y conversacionales (2-3 oraciones máximo)."""
             state = {
                 "messages": messages,
                 "contact_id": contact_id,
-                "conversation_id": conversation_id
+                "conversation_id": conversation_id,
+                "location_id": location_id
             }
             
             # Invoke graph
-            result = await graph.ainvoke(state)
+            result = await graph.ainvoke(_turn_input(state), config)
             
             # Extract response
             if result.get("error"):
@@ -839,59 +1135,59 @@ Mantén respuestas cortas y conversacionales (2-3 oraciones máximo)."""
         return f"Error processing message: {str(e)}"
 
 
-# Enhanced checkpointer for production with store support
-def get_checkpointer_with_store():
-    """Get checkpointer and store for production use"""
-    postgres_uri = os.getenv("POSTGRES_URI")
-    
-    # Try PostgreSQL first
-    if postgres_uri:
-        try:
-            from langgraph.checkpoint.postgres import PostgresSaver
-            from langgraph.store.postgres import PostgresStore
-            checkpointer = PostgresSaver.from_conn_string(postgres_uri)
-            store = PostgresStore.from_conn_string(postgres_uri)
-            return checkpointer, store
-        except ImportError:
-            logger.warning("PostgreSQL packages not available, using memory-based solutions")
-    
-    # Try Redis if configured
-    redis_url = os.getenv("REDIS_URL")
-    if redis_url:
-        try:
-            from langgraph.checkpoint.redis import RedisSaver
-            from langgraph.store.redis import RedisStore
-            checkpointer = RedisSaver.from_conn_string(redis_url)
-            store = RedisStore.from_conn_string(redis_url)
-            return checkpointer, store
-        except ImportError:
-            logger.warning("Redis packages not available, using memory-based solutions")
-    
-    # Default to memory-based solutions for development
-    from langgraph.checkpoint.memory import MemorySaver
-    return MemorySaver(), InMemoryStore()
-
 # Compile graph with optional checkpointer
-def compile_graph_with_config(enable_checkpointing: bool = False):
-    """Compile graph with optional checkpointing and store"""
+def _compile_with_persistence(checkpointer, store, delta_checkpoints: Optional[bool]):
+    memory_config = get_config().memory
+    if delta_checkpoints is None:
+        delta_checkpoints = memory_config.delta_checkpoints
+    graph_workflow = workflow
+    if delta_checkpoints:
+        graph_workflow = build_workflow(delta_state_schema(State, snapshot_every=memory_config.snapshot_every))
+    # Nodes reach the store at runtime through get_store()
+    return graph_workflow.compile(checkpointer=checkpointer, store=store)
+
+
+def compile_graph_with_config(enable_checkpointing: bool = False, delta_checkpoints: Optional[bool] = None):
+    """Compile graph with optional checkpointing and store
+    
+    Args:
+        enable_checkpointing: Persist state with the configured checkpointer
+        delta_checkpoints: Checkpoint only new messages per step (with periodic
+            full snapshots) instead of the whole history, defaults to
+            ``memory.delta_checkpoints``
+    """
     if enable_checkpointing:
         checkpointer, store = get_checkpointer_with_store()
-        compiled = workflow.compile(checkpointer=checkpointer)
-        # Attach store to compiled graph for runtime access
-        compiled.store = store
-        return compiled
+        return _compile_with_persistence(checkpointer, store, delta_checkpoints)
+    return workflow.compile()
+
+
+async def acompile_graph_with_config(enable_checkpointing: bool = False, delta_checkpoints: Optional[bool] = None):
+    """Compile graph like ``compile_graph_with_config`` with the async persistence backend
+    
+    Use this from the event loop with Postgres: the pooled async saver and
+    store never block it, while the sync ones cannot run async graphs.
+    """
+    if enable_checkpointing:
+        checkpointer, store = await get_async_checkpointer_with_store()
+        return _compile_with_persistence(checkpointer, store, delta_checkpoints)
     return workflow.compile()
 
 
 # Export for cloud deployment
 __all__ = [
     "graph", 
+    "get_graph",
+    "aget_graph",
+    "thread_config",
+    "get_system_prompt",
     "process_ghl_message", 
     "State",
     "AgentConfig",
     "stream_graph_updates",
     "get_checkpointer_with_store",
     "compile_graph_with_config",
+    "acompile_graph_with_config",
     "should_book_appointment",
     "should_calculate_consumption",
     "get_conversation_stage",
@@ -899,6 +1195,8 @@ __all__ = [
     "CustomerPreferences",
     "load_conversation_memory",
     "save_conversation_memory",
+    "aload_memory_context",
+    "asave_memory_records",
     "enrich_contact_info",
     "calculate_consumption_parallel"
 ]
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""Shared LLM gateway - pooled HTTP clients, concurrency limits, token budgets and backoff"""
+from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+import asyncio
+import os
+import random
+import re
+import time
+import httpx
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+import structlog
+
+from ghl_agent.config_loader import get_config, LLMGatewayConfig
+from ghl_agent.metrics import record_llm_tokens, track_llm
+from ghl_agent.usage import record_usage
+from ghl_agent.tracing import span
+
+logger = structlog.get_logger()
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    """Errors worth retrying - everything else is a caller/config problem
+
+    Resolved on the first call so importing the gateway stays cheap.
+    """
+    import openai
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError
+    )
+
+# Rough prompt size estimate, used until the provider reports real usage
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 500
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI rate limit reset values like "1s", "6m0s" or "20ms" into seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_from_error(error: Exception) -> Optional[float]:
+    """Get the server-requested wait from rate limit headers, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    for header in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        delay = parse_reset_duration(headers.get(header))
+        if delay is not None:
+            return delay
+    return None
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Estimate prompt tokens for a list of messages"""
+    chars = sum(len(str(message.content)) for message in messages)
+    return chars // CHARS_PER_TOKEN + DEFAULT_COMPLETION_TOKENS
+
+
+class TokenBudget:
+    """Token bucket enforcing a tokens-per-minute budget"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: int):
+        """Wait until the budget can cover the requested tokens"""
+        tokens = min(float(tokens), self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+    def adjust(self, delta: int):
+        """Correct the budget once actual usage is known (positive = used more)"""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+    def refund(self, tokens: int):
+        """Return tokens reserved for a call that never completed"""
+        self.adjust(-min(tokens, int(self.capacity)))
+
+
+class LLMGateway:
+    """Single entry point for LLM calls from this worker"""
+
+    def __init__(self, settings: LLMGatewayConfig):
+        self.settings = settings
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._model_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._budgets: Dict[str, TokenBudget] = {}
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.settings.max_connections,
+            max_keepalive_connections=self.settings.max_keepalive_connections
+        )
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """Pooled sync HTTP client shared by all chat models"""
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                limits=self._limits(),
+                timeout=self.settings.request_timeout_seconds
+            )
+        return self._http_client
+
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Pooled async HTTP client shared by all chat models"""
+        if self._async_http_client is None:
+            self._async_http_client = httpx.AsyncClient(
+                limits=self._limits(),
+                timeout=self.settings.request_timeout_seconds
+            )
+        return self._async_http_client
+
+    def chat_model_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments that route a ChatOpenAI instance through the gateway"""
+        return {
+            "http_client": self.http_client,
+            "http_async_client": self.async_http_client,
+            "timeout": self.settings.request_timeout_seconds,
+            "max_retries": 0  # retries are handled by the gateway
+        }
+
+    def _ensure_loop_primitives(self):
+        """(Re)create asyncio primitives when used from a new event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._global_semaphore = asyncio.Semaphore(self.settings.max_concurrency)
+            self._model_semaphores = {}
+            self._budgets = {}
+
+    def _model_semaphore(self, model_name: str) -> asyncio.Semaphore:
+        if model_name not in self._model_semaphores:
+            self._model_semaphores[model_name] = asyncio.Semaphore(self.settings.per_model_concurrency)
+        return self._model_semaphores[model_name]
+
+    def _budget(self, model_name: str) -> Optional[TokenBudget]:
+        tokens_per_minute = self.settings.tokens_per_minute.get(model_name)
+        if not tokens_per_minute:
+            return None
+        if model_name not in self._budgets:
+            self._budgets[model_name] = TokenBudget(tokens_per_minute)
+        return self._budgets[model_name]
+
+    def backoff_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Delay before the next attempt - server hint if present, else full-jitter exponential"""
+        retry_after = retry_after_from_error(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.settings.backoff_max_seconds) + random.uniform(0, self.settings.backoff_base_seconds)
+        ceiling = min(self.settings.backoff_max_seconds, self.settings.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def ainvoke(self, runnable: Runnable, messages: List[BaseMessage], model_name: str, **kwargs) -> Any:
+        """Invoke a model runnable under the concurrency limits, token budget and retry policy"""
+        self._ensure_loop_primitives()
+        budget = self._budget(model_name)
+        estimated = estimate_tokens(messages)
+        max_retries = self.settings.max_retries
+
+        # Reserved once per logical call, not per attempt - failed attempts are not billed
+        if budget:
+            await budget.acquire(estimated)
+        try:
+            for attempt in range(max_retries + 1):
+                try:
+                    async with self._global_semaphore, self._model_semaphore(model_name):
+                        with span("llm.request", model=model_name, attempt=attempt + 1) as llm_span, track_llm(model_name):
+                            response = await runnable.ainvoke(messages, **kwargs)
+                            usage = getattr(response, "usage_metadata", None)
+                            if usage:
+                                llm_span.set_attribute("llm.input_tokens", usage.get("input_tokens", 0))
+                                llm_span.set_attribute("llm.output_tokens", usage.get("output_tokens", 0))
+                except retryable_errors() as e:
+                    if attempt == max_retries:
+                        raise
+                    delay = self.backoff_delay(attempt, e)
+                    logger.warning("LLM request failed, retrying",
+                                   model=model_name,
+                                   attempt=attempt + 1,
+                                   delay=round(delay, 2),
+                                   error_type=type(e).__name__)
+                    await asyncio.sleep(delay)
+                    continue
+                break
+        except BaseException:
+            # Errors and cancellation: the reservation was never used
+            if budget:
+                budget.refund(estimated)
+            raise
+
+        record_llm_tokens(model_name, usage)
+        record_usage(model_name, usage)
+        if budget and usage:
+            budget.adjust(usage.get("total_tokens", estimated) - estimated)
+        return response
+
+    async def warm_up(self, base_url: Optional[str] = None):
+        """Open a pooled connection to the provider ahead of the first call"""
+        base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        response = await self.async_http_client.head(base_url)
+        logger.info("LLM connection warmed up", status=response.status_code)
+
+    async def aclose(self):
+        """Close pooled HTTP clients (at shutdown - cached chat models keep references to them)"""
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+
+# Global gateway instance
+_gateway: Optional[LLMGateway] = None
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the worker-wide LLM gateway"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(get_config().llm_gateway)
+    return _gateway
+
+
+__all__ = ["LLMGateway", "TokenBudget", "get_llm_gateway", "parse_reset_duration", "estimate_tokens"]
@@ -0,0 +1,280 @@
+"""Model tier policy - cheap model for routine turns, large model only when needed"""
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+import math
+import time
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, AIMessage
+from langchain_core.runnables import Runnable
+import structlog
+
+from ghl_agent.config_loader import get_config
+from ghl_agent.agent.llm_gateway import get_llm_gateway
+from ghl_agent.metrics import metrics_suppressed
+
+logger = structlog.get_logger()
+
+TIER_FAST = "fast"
+TIER_SMART = "smart"
+
+# Run tags on tiered calls - a draft may be discarded by an escalation, so
+# streaming holds its tokens back until the tier decision is made
+DRAFT_TAG = "tier_draft"
+ESCALATION_TAG = "tier_escalation"
+
+# Tools whose results mean the next turn has to reason about products
+RECOMMENDATION_TOOLS = {"calculate_battery_runtime", "recommend_battery_system"}
+
+
+# Builds chat models instead of ChatOpenAI when set (offline tests and benchmarks)
+ChatModelFactory = Callable[[str, float, bool], BaseChatModel]
+_chat_model_factory: Optional[ChatModelFactory] = None
+
+# Model every tier resolves to in the current context only (warm-up dry runs)
+_model_override: ContextVar[Optional[BaseChatModel]] = ContextVar("chat_model_override", default=None)
+
+
+@contextmanager
+def use_chat_model(model: BaseChatModel):
+    """Route every tier to ``model`` inside the block, without touching other requests"""
+    token = _model_override.set(model)
+    try:
+        yield model
+    finally:
+        _model_override.reset(token)
+
+
+def set_chat_model_factory(factory: Optional[ChatModelFactory]) -> Optional[ChatModelFactory]:
+    """Swap the chat model factory (None restores ChatOpenAI) and drop cached models
+
+    Returns:
+        The previous factory, so callers can restore it
+    """
+    global _chat_model_factory
+    previous, _chat_model_factory = _chat_model_factory, factory
+    get_chat_model.cache_clear()
+    return previous
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model_name: str, temperature: float, logprobs: bool = False) -> BaseChatModel:
+    """Get a shared chat model instance for a model name and temperature"""
+    if _chat_model_factory is not None:
+        return _chat_model_factory(model_name, temperature, logprobs)
+
+    # langchain_openai pulls in the whole OpenAI SDK, so load it with the first model
+    from langchain_openai import ChatOpenAI
+
+    kwargs = {"model": model_name, "temperature": temperature, **get_llm_gateway().chat_model_kwargs()}
+    if logprobs:
+        kwargs["logprobs"] = True
+    return ChatOpenAI(**kwargs)
+
+
+def tier_model_name(tier: str, model_name: Optional[str] = None) -> str:
+    """Resolve the model name used for a tier"""
+    return model_name or get_config().models.tiers[tier].name
+
+
+def get_tier_model(tier: str, model_name: Optional[str] = None, temperature: Optional[float] = None) -> BaseChatModel:
+    """Get the chat model for a tier
+
+    Args:
+        tier: Tier name from the ``models.tiers`` config section
+        model_name: Override for the configured model name
+        temperature: Override for the configured temperature
+    """
+    override = _model_override.get()
+    if override is not None:
+        return override
+    tier_config = get_config().models.tiers[tier]
+    return get_chat_model(
+        tier_model_name(tier, model_name),
+        tier_config.temperature if temperature is None else temperature,
+        tier == TIER_FAST
+    )
+
+
+def tier_for_task(task: str, enable_tiering: Optional[bool] = None) -> str:
+    """Resolve the tier a task is routed to"""
+    models_config = get_config().models
+    if enable_tiering is None:
+        enable_tiering = models_config.enable_tiering
+    if not enable_tiering:
+        return TIER_SMART
+    return models_config.routing.get(task, TIER_SMART)
+
+
+def is_recommendation_turn(state: Dict[str, Any], messages: List[BaseMessage]) -> bool:
+    """Check if this turn needs product reasoning rather than triage/extraction"""
+    if state.get("housing_type") and (state.get("equipment_list") or state.get("total_consumption")):
+        return True
+
+    # Results from sizing tools are waiting to be explained to the customer
+    for message in reversed(messages):
+        if isinstance(message, AIMessage):
+            return any(tc["name"] in RECOMMENDATION_TOOLS for tc in message.tool_calls or [])
+    return False
+
+
+def select_turn_tier(state: Dict[str, Any], messages: List[BaseMessage], enable_tiering: Optional[bool] = None) -> str:
+    """Pick the tier for an agent turn"""
+    task = "recommendation" if is_recommendation_turn(state, messages) else "triage"
+    return tier_for_task(task, enable_tiering)
+
+
+def estimate_confidence(response: AIMessage) -> float:
+    """Estimate how confident the model was in a response (0.0 - 1.0)
+
+    Malformed tool calls and empty responses are treated as zero confidence.
+    When token logprobs are available, the geometric mean token probability is
+    used; otherwise well-formed responses are trusted.
+    """
+    if getattr(response, "invalid_tool_calls", None):
+        return 0.0
+    if not response.tool_calls and not response.content:
+        return 0.0
+
+    logprobs = (response.response_metadata or {}).get("logprobs") or {}
+    tokens = logprobs.get("content") or []
+    if tokens:
+        mean_logprob = sum(token["logprob"] for token in tokens) / len(tokens)
+        return math.exp(mean_logprob)
+    return 1.0
+
+
+class TierStats:
+    """In-process latency, token and cost counters per model tier"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _tier(self, tier: str) -> Dict[str, float]:
+        return self._stats.setdefault(tier, {
+            "calls": 0,
+            "errors": 0,
+            "escalations": 0,
+            "latency_seconds": 0.0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cost_usd": 0.0
+        })
+
+    def record(self, tier: str, latency: float, response: Optional[AIMessage] = None, error: bool = False):
+        """Record a model call for a tier"""
+        if metrics_suppressed():
+            return
+        stats = self._tier(tier)
+        stats["calls"] += 1
+        stats["latency_seconds"] += latency
+        if error:
+            stats["errors"] += 1
+        usage = getattr(response, "usage_metadata", None) if response is not None else None
+        if usage:
+            tier_config = get_config().models.tiers.get(tier)
+            input_tokens = usage.get("input_tokens", 0)
+            output_tokens = usage.get("output_tokens", 0)
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            if tier_config:
+                stats["cost_usd"] += (
+                    input_tokens / 1000 * tier_config.input_cost_per_1k +
+                    output_tokens / 1000 * tier_config.output_cost_per_1k
+                )
+
+    def record_escalation(self, from_tier: str):
+        """Record an escalation away from a tier"""
+        if not metrics_suppressed():
+            self._tier(from_tier)["escalations"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Get a copy of the counters with average latency per tier"""
+        result = {}
+        for tier, stats in self._stats.items():
+            result[tier] = dict(stats)
+            result[tier]["avg_latency_seconds"] = (
+                stats["latency_seconds"] / stats["calls"] if stats["calls"] else 0.0
+            )
+        return result
+
+
+tier_stats = TierStats()
+
+
+async def _timed_invoke(
+    prepare: Callable[[BaseChatModel, str], Runnable],
+    messages: List[BaseMessage],
+    tier: str,
+    model_name: Optional[str],
+    tag: Optional[str] = None
+) -> AIMessage:
+    """Invoke a tier's model through the LLM gateway and record tier stats"""
+    runnable = prepare(get_tier_model(tier, model_name), tier)
+    if tag:
+        runnable = runnable.with_config(tags=[tag])
+    started = time.perf_counter()
+    try:
+        response = await get_llm_gateway().ainvoke(runnable, messages, tier_model_name(tier, model_name))
+    except Exception:
+        tier_stats.record(tier, time.perf_counter() - started, error=True)
+        raise
+    tier_stats.record(tier, time.perf_counter() - started, response)
+    return response
+
+
+async def invoke_with_tiering(
+    messages: List[BaseMessage],
+    tier: str,
+    prepare: Callable[[BaseChatModel, str], Runnable] = lambda model, tier: model,
+    escalation_threshold: Optional[float] = None,
+    model_names: Optional[Dict[str, str]] = None
+) -> Tuple[AIMessage, str]:
+    """Invoke the tier's model, escalating to the smart tier on low confidence
+
+    Args:
+        messages: Prompt messages
+        tier: Tier to start with
+        prepare: Turns a chat model and its tier into the runnable to call (e.g. binds tools)
+        escalation_threshold: Minimum confidence for fast-tier answers
+        model_names: Optional tier -> model name overrides
+
+    Returns:
+        The response and the tier that produced it
+    """
+    if escalation_threshold is None:
+        escalation_threshold = get_config().models.escalation_threshold
+    model_names = model_names or {}
+
+    if tier == TIER_SMART:
+        return await _timed_invoke(prepare, messages, tier, model_names.get(tier)), tier
+
+    response = await _timed_invoke(prepare, messages, tier, model_names.get(tier), DRAFT_TAG)
+
+    confidence = estimate_confidence(response)
+    if confidence >= escalation_threshold:
+        return response, tier
+
+    logger.info("Escalating to smart model tier", from_tier=tier, confidence=round(confidence, 3))
+    tier_stats.record_escalation(tier)
+    response = await _timed_invoke(prepare, messages, TIER_SMART, model_names.get(TIER_SMART), ESCALATION_TAG)
+    return response, TIER_SMART
+
+
+__all__ = [
+    "TIER_FAST",
+    "TIER_SMART",
+    "DRAFT_TAG",
+    "ESCALATION_TAG",
+    "get_chat_model",
+    "set_chat_model_factory",
+    "use_chat_model",
+    "get_tier_model",
+    "tier_for_task",
+    "select_turn_tier",
+    "estimate_confidence",
+    "invoke_with_tiering",
+    "tier_stats",
+    "TierStats"
+]
@@ -2,10 +2,11 @@
 from typing import TypedDict, Dict, Any, List, Optional
 from langgraph.graph import StateGraph, END, START
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
 import structlog
 from datetime import datetime
 
+from ghl_agent.agent.model_tiers import invoke_with_tiering, tier_for_task
+
 logger = structlog.get_logger()
 
 # Reflection state
@@ -21,11 +22,8 @@ class ReflectionState(TypedDict):
     pain_points: Optional[List[str]]
     opportunities: Optional[List[str]]
 
-# Initialize reflection model
-reflection_model = ChatOpenAI(
-    model="gpt-4-turbo-preview",
-    temperature=0.3  # Lower temperature for more consistent analysis
-)
+# Lower temperature for more consistent analysis
+REFLECTION_TEMPERATURE = 0.3
 
 REFLECTION_PROMPT = """Analiza esta conversación y extrae información valiosa para mejorar el servicio al cliente.
 
@@ -66,7 +64,11 @@ async def analyze_conversation(state: ReflectionState) -> ReflectionState:
         ]
         
         # Get analysis
-        response = await reflection_model.ainvoke(analysis_messages)
+        response, _ = await invoke_with_tiering(
+            analysis_messages,
+            tier_for_task("reflection"),
+            prepare=lambda m, tier: m.bind(temperature=REFLECTION_TEMPERATURE)
+        )
         content = response.content
         
         # Parse response (simple parsing, could be enhanced with structured output)
@@ -222,8 +224,21 @@ reflection_workflow.add_edge("analyze", "patterns")
 reflection_workflow.add_edge("patterns", "recommendations")
 reflection_workflow.add_edge("recommendations", END)
 
-# Compile reflection graph
-reflection_graph = reflection_workflow.compile()
+# Compile reflection graph on first use
+_reflection_graph = None
+
+def get_reflection_graph():
+    """Get the compiled reflection graph, compiling it on first use"""
+    global _reflection_graph
+    if _reflection_graph is None:
+        # Stateless analysis - never inherit (and write to) the calling graph's checkpointer
+        _reflection_graph = reflection_workflow.compile(checkpointer=False)
+    return _reflection_graph
+
+def __getattr__(name: str):
+    if name == "reflection_graph":
+        return get_reflection_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 async def reflect_on_conversation(
     messages: List[BaseMessage],
@@ -236,7 +251,7 @@ async def reflect_on_conversation(
             "contact_id": contact_id
         }
         
-        result = await reflection_graph.ainvoke(state)
+        result = await get_reflection_graph().ainvoke(state)
         
         return result.get("extracted_insights", {})
         
@@ -245,4 +260,4 @@ async def reflect_on_conversation(
         return {}
 
 # Export
-__all__ = ["reflection_graph", "reflect_on_conversation", "ReflectionState"]
\ No newline at end of file
+__all__ = ["reflection_graph", "get_reflection_graph", "reflect_on_conversation", "ReflectionState"]
\ No newline at end of file
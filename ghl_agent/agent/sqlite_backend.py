@@ -0,0 +1,135 @@
+"""SQLite checkpointer and store for single-node deployments
+
+Durable persistence without external services: checkpoints and the memory
+store live in one SQLite file in WAL mode, so readers never block the
+writer and commits only fsync the log. Requires ``langgraph-checkpoint-sqlite``.
+
+LangGraph's SQLite saver and store are synchronous (their async siblings
+need an aiosqlite connection per event loop). The subclasses here run the
+async methods in worker threads instead - both classes already serialize
+access to their connection with a lock.
+"""
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Sequence, Tuple
+from pathlib import Path
+import asyncio
+import sqlite3
+import threading
+import structlog
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.store.sqlite import SqliteStore
+
+from ghl_agent.agent.checkpointing import DEFAULT_SQLITE_PATH
+
+logger = structlog.get_logger()
+
+# Compiled statements kept per connection - the store's queries vary with batch shape
+STATEMENT_CACHE_SIZE = 256
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # Durable across process crashes; a power loss can drop the last commits
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # KiB
+)
+
+
+def connect(path: str, autocommit: bool = False) -> sqlite3.Connection:
+    """Open a connection tuned for the WAL backend
+
+    Args:
+        path: Database file (parent directories are created)
+        autocommit: Leave transactions to the caller (the store issues its own BEGIN/COMMIT)
+    """
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        **({"isolation_level": None} if autocommit else {})
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """SqliteSaver whose async methods run the sync ones in worker threads"""
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[Any]:
+        # The sync iterator holds the connection lock between items - drain it in one go
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = ""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aget_delta_channel_history(self, *, config, channels: Sequence[str]) -> Mapping[str, Any]:
+        return await asyncio.to_thread(lambda: self.get_delta_channel_history(config=config, channels=channels))
+
+
+class ThreadedSqliteStore(SqliteStore):
+    """SqliteStore whose async batch runs in a worker thread
+
+    ``batch`` runs all operations in one transaction, so callers that
+    write several items should batch their PutOps instead of calling
+    ``put`` per item.
+    """
+
+    async def abatch(self, ops: Iterable[Any]) -> List[Any]:
+        return await asyncio.to_thread(self.batch, list(ops))
+
+
+# Database path -> shared (checkpointer, store)
+_backends: Dict[str, Tuple[ThreadedSqliteSaver, ThreadedSqliteStore]] = {}
+_backends_lock = threading.Lock()
+
+
+def get_sqlite_checkpointer_with_store(path: str = DEFAULT_SQLITE_PATH) -> Tuple[ThreadedSqliteSaver, ThreadedSqliteStore]:
+    """Shared checkpointer and store for a database file (one pair per process)"""
+    with _backends_lock:
+        if path not in _backends:
+            from ghl_agent.serialization import get_serializer
+
+            # Separate connections: the saver commits per call, the store manages its own transactions
+            checkpointer = ThreadedSqliteSaver(connect(path), serde=get_serializer())
+            store = ThreadedSqliteStore(connect(path, autocommit=True))
+            checkpointer.setup()
+            store.setup()
+            _backends[path] = (checkpointer, store)
+            logger.info("SQLite persistence ready", path=path)
+        return _backends[path]
+
+
+def close_sqlite_backends():
+    """Fold the WAL into the database and close connections (at shutdown)"""
+    with _backends_lock:
+        for checkpointer, store in _backends.values():
+            for conn in (checkpointer.conn, store.conn):
+                try:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning("Failed to close SQLite connection", error=str(e))
+        _backends.clear()
+
+
+__all__ = [
+    "ThreadedSqliteSaver",
+    "ThreadedSqliteStore",
+    "get_sqlite_checkpointer_with_store",
+    "close_sqlite_backends",
+    "connect"
+]
@@ -0,0 +1,87 @@
+"""Stage-scoped tool exposure and its prompt/tool-call accounting"""
+from typing import Dict, Any, List, Optional, Tuple
+import json
+from langchain_core.messages import AIMessage
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+import structlog
+
+from ghl_agent.config_loader import get_config
+from ghl_agent.metrics import metrics_suppressed
+
+logger = structlog.get_logger()
+
+# Rough characters per token for schema size estimates
+CHARS_PER_TOKEN = 4
+
+
+def tools_for_stage(stage: Optional[str]) -> Optional[List[str]]:
+    """Get the tool names exposed in a conversation stage
+
+    Returns:
+        Tool names from the ``stage_tools`` config map, or None for all tools
+    """
+    if not stage:
+        return None
+    return get_config().stage_tools.get(stage)
+
+
+class StageToolStats:
+    """Per-stage counters for exposed tools, tool calls and prompt savings"""
+
+    def __init__(self, tools: List[BaseTool]):
+        self.tools = list(tools)
+        self._schema_tokens: Optional[Dict[str, int]] = None
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def schema_tokens(self) -> Dict[str, int]:
+        """Estimated schema tokens per tool, computed on the first turn"""
+        if self._schema_tokens is None:
+            self._schema_tokens = {
+                tool.name: len(json.dumps(convert_to_openai_tool(tool))) // CHARS_PER_TOKEN
+                for tool in self.tools
+            }
+        return self._schema_tokens
+
+    @property
+    def all_tools_tokens(self) -> int:
+        return sum(self.schema_tokens.values())
+
+    def prompt_tokens(self, tool_names: Optional[List[str]]) -> int:
+        """Estimated prompt tokens spent on tool schemas for a subset"""
+        if tool_names is None:
+            return self.all_tools_tokens
+        return sum(self.schema_tokens.get(name, 0) for name in tool_names)
+
+    def record(self, stage: Optional[str], tool_names: Optional[List[str]], response: AIMessage):
+        """Record one model turn for a stage"""
+        if metrics_suppressed():
+            return
+        stats = self._stats.setdefault(stage or "unknown", {
+            "turns": 0,
+            "tools_exposed": 0,
+            "tool_calls": 0,
+            "schema_tokens": 0,
+            "schema_tokens_saved": 0,
+            "calls_by_tool": {}
+        })
+        schema_tokens = self.prompt_tokens(tool_names)
+        stats["turns"] += 1
+        stats["tools_exposed"] = len(tool_names) if tool_names is not None else len(self.schema_tokens)
+        stats["schema_tokens"] += schema_tokens
+        stats["schema_tokens_saved"] += self.all_tools_tokens - schema_tokens
+        for tool_call in response.tool_calls or []:
+            stats["tool_calls"] += 1
+            stats["calls_by_tool"][tool_call["name"]] = stats["calls_by_tool"].get(tool_call["name"], 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get a copy of the per-stage counters"""
+        result = {}
+        for stage, stats in self._stats.items():
+            result[stage] = {**stats, "calls_by_tool": dict(stats["calls_by_tool"])}
+            result[stage]["tool_calls_per_turn"] = stats["tool_calls"] / stats["turns"] if stats["turns"] else 0.0
+        return result
+
+
+__all__ = ["tools_for_stage", "StageToolStats"]
@@ -0,0 +1,348 @@
+"""Product catalog service with hot reload and change notifications
+
+The catalog file (``catalog.yaml`` next to this module by default) is the
+single source of product, pricing and commission data. It is parsed and
+validated once per change into an immutable ``CatalogSnapshot`` holding
+the product data plus its lookup structures. Reloads swap the snapshot
+atomically and notify subscribers with the sections that changed, so
+dependents only rebuild what they use.
+"""
+from typing import Dict, List, Optional, Any, Mapping, Callable, FrozenSet, Iterable, Literal, Tuple, Union
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from types import MappingProxyType
+import asyncio
+import hashlib
+import json
+import threading
+import yaml
+from pydantic import BaseModel, ConfigDict, Field
+import structlog
+
+from ghl_agent.config_loader import get_config
+from ghl_agent.tools.pricing import TierTable, PricePoints
+from ghl_agent.tools.sizing_engine import SizingEngine, parse_price
+
+logger = structlog.get_logger()
+
+DEFAULT_CATALOG_PATH = Path(__file__).parent / "catalog.yaml"
+
+CATALOG_SECTIONS = ("batteries", "portable_options", "featured", "solar_panel_pricing", "commission_structure")
+
+# Called with the new snapshot and the names of the sections that changed
+CatalogSubscriber = Callable[["CatalogSnapshot", FrozenSet[str]], None]
+
+
+class BatteryProduct(BaseModel):
+    """Manufacturer battery entry"""
+    model_config = ConfigDict(extra="allow")
+
+    name: str
+    capacity_wh: int = Field(gt=0)
+    best_for: Literal["casa", "apartamento", "ambos"]
+    price: Optional[Union[str, float]] = None
+    features: List[str] = Field(default_factory=list)
+
+
+class PortableOption(BaseModel):
+    """Portable power station used for quick sizing"""
+    model: str
+    capacity_wh: int = Field(gt=0)
+    price_range: str
+    best_for: Literal["casa", "apartamento", "ambos"]
+    features: List[str] = Field(default_factory=list)
+
+
+class FeaturedProduct(BaseModel):
+    """Product listed in the system prompt"""
+    model_config = ConfigDict(extra="allow")
+
+    name: str
+    capacity_wh: int = Field(gt=0)
+    best_for: str
+
+
+class CommissionTier(BaseModel):
+    """Sales commission tier"""
+    min: float
+    max: Optional[float] = None
+    commission: float
+
+
+class CatalogFile(BaseModel):
+    """Schema of the catalog file"""
+    batteries: Dict[str, Dict[str, BatteryProduct]]
+    portable_options: List[PortableOption] = Field(default_factory=list)
+    featured: Dict[str, List[FeaturedProduct]] = Field(default_factory=dict)
+    solar_panel_pricing: Dict[int, float] = Field(min_length=1)
+    commission_structure: List[CommissionTier] = Field(default_factory=list)
+
+
+class CatalogIndex:
+    """Immutable lookup structures over the battery catalog
+
+    Built once per catalog load. Records are sorted by ``capacity_wh`` and
+    partitioned by ``best_for`` (each partition also holds "ambos" products),
+    so range and housing queries are a bisect plus a slice. Records are shared
+    between queries and must be treated as read-only.
+    """
+
+    def __init__(self, products: Mapping[str, Mapping[str, Any]]):
+        records = []
+        for product_id, info in products.items():
+            record = {"id": product_id, **info, "price_value": parse_price(info.get("price"))}
+            if "price_with_install" in info:
+                record["price_with_install_value"] = parse_price(info["price_with_install"])
+            records.append(record)
+        records.sort(key=lambda record: record["capacity_wh"])
+
+        self.records: Tuple[Dict[str, Any], ...] = tuple(records)
+        self.capacities: Tuple[float, ...] = tuple(record["capacity_wh"] for record in records)
+        self.by_id: Mapping[str, Dict[str, Any]] = {record["id"]: record for record in records}
+
+        self.by_housing: Dict[str, Tuple[Tuple[float, ...], Tuple[Dict[str, Any], ...]]] = {}
+        for housing_type in {record["best_for"] for record in records} | {"ambos"}:
+            partition = tuple(r for r in records if r["best_for"] in (housing_type, "ambos"))
+            self.by_housing[housing_type] = (tuple(r["capacity_wh"] for r in partition), partition)
+
+    def capacity_range(self, min_wh: float, max_wh: float, housing_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Products with min_wh <= capacity_wh <= max_wh, sorted by capacity"""
+        if housing_type is None:
+            capacities, records = self.capacities, self.records
+        else:
+            # Unknown housing types only match "ambos" products
+            capacities, records = self.by_housing.get(housing_type, self.by_housing["ambos"])
+        return list(records[bisect_left(capacities, min_wh):bisect_right(capacities, max_wh)])
+
+
+def sizing_products(
+    portable_options: Iterable[Mapping[str, Any]],
+    batteries: Mapping[str, Mapping[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Combine the portable options and the manufacturer batteries for sizing"""
+    products = [
+        {
+            "id": option["model"],
+            "name": option["model"],
+            "capacity_wh": option["capacity_wh"],
+            "price": option["price_range"],
+            "price_range": option["price_range"],
+            "best_for": option["best_for"],
+            "features": option["features"]
+        }
+        for option in portable_options
+    ]
+    products.extend({"id": product_id, **product} for product_id, product in batteries.items())
+    return products
+
+
+def _section_digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class CatalogSnapshot:
+    """One validated catalog load and the structures derived from it
+
+    Structures whose source sections did not change are reused from the
+    previous snapshot instead of being rebuilt.
+    """
+
+    def __init__(self, data: Mapping[str, Any], version: int = 1, previous: Optional["CatalogSnapshot"] = None):
+        self.version = version
+        self.digests: Dict[str, str] = {section: _section_digest(data[section]) for section in CATALOG_SECTIONS}
+
+        def unchanged(*sections: str) -> bool:
+            return previous is not None and all(previous.digests[s] == self.digests[s] for s in sections)
+
+        # Flatten categories into one id -> product map
+        batteries = {}
+        for category, products in data["batteries"].items():
+            for product_id, product in products.items():
+                batteries[product_id] = {**product, "category": category}
+        self.batteries: Mapping[str, Dict[str, Any]] = MappingProxyType(batteries)
+        self.portable_options: Tuple[Dict[str, Any], ...] = tuple(data["portable_options"])
+        self.featured: Mapping[str, List[Dict[str, Any]]] = MappingProxyType(dict(data["featured"]))
+        self.solar_panel_pricing: Mapping[int, float] = MappingProxyType(dict(data["solar_panel_pricing"]))
+        self.commission_structure: Tuple[Dict[str, Any], ...] = tuple(data["commission_structure"])
+
+        if unchanged("batteries"):
+            self.index = previous.index
+        else:
+            self.index = CatalogIndex(self.batteries)
+        if unchanged("batteries", "portable_options"):
+            self.sizing = previous.sizing
+        else:
+            self.sizing = SizingEngine(sizing_products(self.portable_options, self.batteries))
+        if unchanged("commission_structure"):
+            self.commission_tiers = previous.commission_tiers
+        else:
+            self.commission_tiers = TierTable.from_tiers(self.commission_structure, value_key="commission")
+        if unchanged("solar_panel_pricing"):
+            self.solar_panel_prices = previous.solar_panel_prices
+        else:
+            self.solar_panel_prices = PricePoints(self.solar_panel_pricing)
+
+
+class CatalogService:
+    """Loads the catalog, polls the file for changes and notifies subscribers"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        catalog_config = get_config().catalog
+        self.path = Path(path or catalog_config.path or DEFAULT_CATALOG_PATH)
+        self.poll_interval = catalog_config.poll_interval_seconds
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[CatalogSubscriber, Optional[FrozenSet[str]]]] = []
+        self._mtime: Optional[float] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.reload(force=True)
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Current catalog snapshot"""
+        return self._snapshot
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _read(self) -> Dict[str, Any]:
+        """Parse and validate the catalog file"""
+        path = self.path
+        if not path.exists() and path != DEFAULT_CATALOG_PATH:
+            logger.warning(f"Catalog file not found at {path}, using bundled catalog")
+            path = DEFAULT_CATALOG_PATH
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = yaml.safe_load(f) or {}
+        if not raw.get("featured"):
+            raw["featured"] = get_config().products
+
+        validated = CatalogFile(**raw)
+        data = validated.model_dump(exclude_none=True)
+        # Keep unknown product fields (specs, runtime examples, ...) as written
+        data["batteries"] = {
+            category: {product_id: dict(raw["batteries"][category][product_id]) for product_id in products}
+            for category, products in data["batteries"].items()
+        }
+        data["featured"] = {
+            category: [dict(product) for product in raw["featured"][category]]
+            for category in data["featured"]
+        }
+        return data
+
+    def reload(self, force: bool = False) -> FrozenSet[str]:
+        """Reload the catalog if the file changed
+
+        Args:
+            force: Reload even if the file modification time is unchanged
+
+        Returns:
+            Names of the sections that changed (empty if nothing changed)
+        """
+        with self._lock:
+            mtime = self._stat()
+            if not force and mtime == self._mtime:
+                return frozenset()
+            self._mtime = mtime
+
+            previous = self._snapshot
+            try:
+                data = self._read()
+            except Exception as e:
+                if previous is None:
+                    raise
+                logger.error("Catalog reload failed, keeping current catalog", error=str(e), path=str(self.path))
+                return frozenset()
+
+            version = previous.version + 1 if previous else 1
+            snapshot = CatalogSnapshot(data, version, previous)
+            changed = frozenset(
+                section for section in CATALOG_SECTIONS
+                if previous is None or previous.digests[section] != snapshot.digests[section]
+            )
+            if previous is not None and not changed:
+                return changed
+            self._snapshot = snapshot
+            subscribers = list(self._subscribers)
+
+        logger.info("Catalog loaded", version=snapshot.version, changed=sorted(changed), products=len(snapshot.batteries))
+        if previous is not None:
+            for callback, sections in subscribers:
+                if sections is None or sections & changed:
+                    try:
+                        callback(snapshot, changed)
+                    except Exception as e:
+                        logger.error("Catalog subscriber failed", callback=getattr(callback, "__name__", repr(callback)), error=str(e))
+        return changed
+
+    def subscribe(self, callback: CatalogSubscriber, sections: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Call ``callback(snapshot, changed_sections)`` after reloads
+
+        Args:
+            callback: Function to notify
+            sections: Only notify when one of these sections changed (all by default)
+
+        Returns:
+            Function that removes the subscription
+        """
+        entry = (callback, frozenset(sections) if sections is not None else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    async def watch(self, interval: Optional[float] = None):
+        """Poll the catalog file until cancelled, reloading off the event loop"""
+        interval = interval or self.poll_interval
+        logger.info("Watching catalog for changes", path=str(self.path), interval=interval)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.error("Catalog watch error", error=str(e))
+
+
+# Global catalog service
+_catalog_service = None
+
+# Subscriptions registered before the catalog was first loaded
+_pending_subscribers: List[Tuple[CatalogSubscriber, Optional[Iterable[str]]]] = []
+
+def get_catalog_service() -> CatalogService:
+    """Get global catalog service"""
+    global _catalog_service
+    if _catalog_service is None:
+        _catalog_service = CatalogService()
+        for callback, sections in _pending_subscribers:
+            _catalog_service.subscribe(callback, sections)
+        _pending_subscribers.clear()
+    return _catalog_service
+
+def subscribe_catalog(callback: CatalogSubscriber, sections: Optional[Iterable[str]] = None):
+    """Subscribe to catalog changes without loading the catalog"""
+    if _catalog_service is None:
+        _pending_subscribers.append((callback, sections))
+    else:
+        _catalog_service.subscribe(callback, sections)
+
+def get_catalog() -> CatalogSnapshot:
+    """Get the current catalog snapshot"""
+    return get_catalog_service().snapshot
+
+
+__all__ = [
+    "CatalogService",
+    "CatalogSnapshot",
+    "CatalogIndex",
+    "CATALOG_SECTIONS",
+    "get_catalog_service",
+    "get_catalog",
+    "subscribe_catalog",
+    "sizing_products"
+]
@@ -1,14 +1,82 @@
 """Configuration loader for the GHL Agent"""
 import os
+import re
+import asyncio
+import threading
 import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Callable, Tuple, NamedTuple, TypeVar
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 import structlog
 
 logger = structlog.get_logger()
 
-class BusinessConfig(BaseModel):
+# How often watchers check the config file for changes
+CONFIG_POLL_INTERVAL = 5.0
+
+# Reply to over-budget tenants when the config has no budget_exceeded template
+DEFAULT_BUDGET_EXCEEDED_TEMPLATE = (
+    "¡Gracias por escribirnos! Un especialista de nuestro equipo revisará tu mensaje "
+    "y te contactará muy pronto."
+)
+
+# Called with the new configuration snapshot after a reload
+ConfigSubscriber = Callable[["Config"], None]
+
+T = TypeVar("T")
+
+# ${VAR} or ${VAR:-default}, anywhere inside a string
+ENV_VAR_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}")
+
+_MISSING = object()
+
+def interpolate_env(value: Any, missing: Optional[set] = None) -> Any:
+    """Substitute environment variables in strings, lists and dicts
+
+    Unset (or empty) variables use their ``:-default``; without a default the
+    placeholder is left as is and its name is added to ``missing``.
+    """
+    if isinstance(value, str):
+        if "${" not in value:
+            return value
+
+        def substitute(match: re.Match) -> str:
+            env_value = os.getenv(match.group(1))
+            if env_value:
+                return env_value
+            if match.group(2) is not None:
+                return match.group(2)
+            if missing is not None:
+                missing.add(match.group(1))
+            return match.group(0)
+
+        return ENV_VAR_PATTERN.sub(substitute, value)
+    if isinstance(value, dict):
+        return {key: interpolate_env(item, missing) for key, item in value.items()}
+    if isinstance(value, list):
+        return [interpolate_env(item, missing) for item in value]
+    return value
+
+def flatten_config(raw_config: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Map every dot path ("business", "business.name", ...) to its value"""
+    flat = {}
+    for key, value in raw_config.items():
+        path = f"{prefix}{key}"
+        flat[path] = value
+        if isinstance(value, dict):
+            flat.update(flatten_config(value, f"{path}."))
+    return flat
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+class ConfigModel(BaseModel):
+    """Base for config sections - snapshots are replaced on reload, never mutated"""
+    model_config = ConfigDict(frozen=True)
+
+class BusinessConfig(ConfigModel):
     """Business configuration"""
     name: str
     email: str
@@ -16,38 +84,102 @@ class BusinessConfig(BaseModel):
     timezone: str
     language: str = "es"
 
-class QualificationConfig(BaseModel):
+class QualificationConfig(ConfigModel):
     """Lead qualification settings"""
     min_budget: int = 5000
     max_response_time: int = 300
     business_hours: Dict[str, Any]
 
-class CalendarConfig(BaseModel):
+class CalendarConfig(ConfigModel):
     """Calendar settings"""
     appointment_duration: int = 60
     buffer_time: int = 15
     days_ahead: int = 7
     preferred_slots: Dict[str, str]
 
-class MemoryConfig(BaseModel):
+class MemoryConfig(ConfigModel):
     """Memory persistence settings"""
     enable_persistence: bool = True
     store_type: str = "memory"
     retention_days: int = 90
+    serializer: str = "compact"  # checkpoint serde: compact or jsonplus
+    compression_threshold_bytes: Optional[int] = 1024  # zstd-compress larger checkpoint values, null disables
+    delta_checkpoints: bool = False  # checkpoint new messages per step instead of the whole history
+    snapshot_every: int = 20  # full message snapshot every N updates in delta mode
+    pool_min_size: int = 1  # Postgres connections kept open by the app's async pool
+    pool_max_size: int = 10
+    sync_pool_max_size: int = 2  # on-demand pool for sync callers (scripts, compile_graph_with_config)
+    prepare_threshold: Optional[int] = 0  # executions before psycopg prepares a statement, null disables
 
-class BehaviorConfig(BaseModel):
+class BehaviorConfig(ConfigModel):
     """Agent behavior settings"""
     enable_human_review: bool = False
     parallel_tool_calls: bool = True
     max_retry_attempts: int = 3
     response_delay: int = 2
 
-class Config(BaseModel):
+class ModelTierConfig(ConfigModel):
+    """Settings for a single model tier"""
+    name: str
+    temperature: float = 0.7
+    input_cost_per_1k: float = 0.0
+    output_cost_per_1k: float = 0.0
+    cached_input_cost_per_1k: Optional[float] = None  # prompt-cache reads, defaults to the input price
+
+class ModelsConfig(ConfigModel):
+    """Model tier policy"""
+    enable_tiering: bool = True
+    tiers: Dict[str, ModelTierConfig] = Field(default_factory=lambda: {
+        "fast": ModelTierConfig(name="gpt-4o-mini", temperature=0.7,
+                                input_cost_per_1k=0.00015, output_cost_per_1k=0.0006),
+        "smart": ModelTierConfig(name="gpt-4-turbo-preview", temperature=0.7,
+                                 input_cost_per_1k=0.01, output_cost_per_1k=0.03)
+    })
+    # Task -> tier name
+    routing: Dict[str, str] = Field(default_factory=lambda: {
+        "triage": "fast",
+        "extraction": "fast",
+        "reflection": "fast",
+        "recommendation": "smart"
+    })
+    escalation_threshold: float = 0.5
+
+class LLMGatewayConfig(ConfigModel):
+    """Shared LLM client, concurrency and rate limit settings"""
+    max_concurrency: int = 16  # in-flight requests across all models
+    per_model_concurrency: int = 8  # in-flight requests per model
+    tokens_per_minute: Dict[str, int] = Field(default_factory=dict)  # model -> TPM budget, missing = unlimited
+    max_retries: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 20.0
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    request_timeout_seconds: float = 60.0
+
+class UsageBudgetsConfig(ConfigModel):
+    """Daily limits - None means unlimited"""
+    contact_daily_tokens: Optional[int] = None  # beyond this a contact's turns use the fast tier only
+    tenant_daily_cost_usd: Optional[float] = None  # beyond this replies use the budget_exceeded template
+
+class UsageConfig(ConfigModel):
+    """Token and cost accounting settings"""
+    enabled: bool = True
+    flush_interval_seconds: float = 10.0
+    default_tenant: Optional[str] = None  # tenant for runs without a location id, defaults to GHL_LOCATION_ID
+    budgets: UsageBudgetsConfig = Field(default_factory=UsageBudgetsConfig)
+
+class CatalogConfig(ConfigModel):
+    """Product catalog file and reload settings"""
+    path: Optional[str] = None  # defaults to ghl_agent/catalog.yaml
+    poll_interval_seconds: float = 5.0
+
+class Config(ConfigModel):
     """Complete configuration"""
     business: BusinessConfig
     qualification: QualificationConfig
-    products: Dict[str, Any]
+    products: Dict[str, Any] = Field(default_factory=dict)  # prompt products when the catalog has no "featured" section
     equipment_consumption: Dict[str, int]
+    equipment_aliases: Dict[str, str] = Field(default_factory=dict)
     templates: Dict[str, str]
     triage: Dict[str, Any]
     calendar: CalendarConfig
@@ -55,6 +187,22 @@ class Config(BaseModel):
     memory: MemoryConfig
     behavior: BehaviorConfig
     logging: Dict[str, Any]
+    models: ModelsConfig = Field(default_factory=ModelsConfig)
+    llm_gateway: LLMGatewayConfig = Field(default_factory=LLMGatewayConfig)
+    stage_tools: Dict[str, List[str]] = Field(default_factory=dict)
+    catalog: CatalogConfig = Field(default_factory=CatalogConfig)
+    usage: UsageConfig = Field(default_factory=UsageConfig)
+
+class ConfigSnapshot(NamedTuple):
+    """One loaded configuration: raw values, flattened paths and the validated model"""
+    raw: Dict[str, Any]
+    flat: Dict[str, Any]
+    config: "Config"
+    typed: Dict[Tuple[str, Any], Any]  # memoized get_as results
+
+    @classmethod
+    def build(cls, raw_config: Dict[str, Any]) -> "ConfigSnapshot":
+        return cls(raw_config, flatten_config(raw_config), Config(**raw_config), {})
 
 class ConfigLoader:
     """Load and manage configuration"""
@@ -66,8 +214,10 @@ class ConfigLoader:
             config_path: Path to config file. If None, looks in standard locations
         """
         self.config_path = self._find_config_file(config_path)
-        self._raw_config = None
-        self._config = None
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._subscribers: List[ConfigSubscriber] = []
         self._load_config()
     
     def _find_config_file(self, config_path: Optional[str] = None) -> Path:
@@ -93,48 +243,46 @@ class ConfigLoader:
         logger.warning(f"No config file found, using default at {default}")
         return default
     
+    def _stat(self) -> Optional[float]:
+        """Modification time of the config file, None if it does not exist"""
+        try:
+            return self.config_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+    
+    def _parse(self) -> ConfigSnapshot:
+        """Read, substitute and validate the config file without touching the current snapshot"""
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            raw_config = yaml.safe_load(f) or {}
+        
+        # Substitute environment variables
+        missing = set()
+        raw_config = interpolate_env(raw_config, missing)
+        for env_var in sorted(missing):
+            logger.warning(f"Environment variable {env_var} not found")
+        
+        # Validate and index
+        return ConfigSnapshot.build(raw_config)
+    
     def _load_config(self):
         """Load configuration from file"""
+        self._mtime = self._stat()
         try:
             if not self.config_path.exists():
                 logger.warning(f"Config file not found at {self.config_path}, using defaults")
                 self._use_defaults()
                 return
             
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self._raw_config = yaml.safe_load(f)
-            
-            # Substitute environment variables
-            self._substitute_env_vars()
-            
-            # Validate and create config object
-            self._config = Config(**self._raw_config)
+            self._snapshot = self._parse()
             logger.info("Configuration loaded successfully")
             
         except Exception as e:
             logger.error(f"Error loading config: {e}")
             self._use_defaults()
     
-    def _substitute_env_vars(self):
-        """Substitute environment variables in config"""
-        def substitute_in_dict(d: Dict[str, Any]):
-            for key, value in d.items():
-                if isinstance(value, str) and value.startswith("${") and value.endswith("}"):
-                    env_var = value[2:-1]
-                    env_value = os.getenv(env_var)
-                    if env_value:
-                        d[key] = env_value
-                    else:
-                        logger.warning(f"Environment variable {env_var} not found")
-                elif isinstance(value, dict):
-                    substitute_in_dict(value)
-        
-        if self._raw_config:
-            substitute_in_dict(self._raw_config)
-    
     def _use_defaults(self):
         """Use default configuration"""
-        self._raw_config = {
+        raw_config = {
             "business": {
                 "name": "Battery Solutions",
                 "email": "info@example.com",
@@ -158,7 +306,8 @@ class ConfigLoader:
                 "abanico": 60
             },
             "templates": {
-                "greeting": "¡Hola! Soy tu especialista en baterías. ¿Cómo puedo ayudarte?"
+                "greeting": "¡Hola! Soy tu especialista en baterías. ¿Cómo puedo ayudarte?",
+                "budget_exceeded": DEFAULT_BUDGET_EXCEEDED_TEMPLATE
             },
             "triage": {
                 "auto_respond": ["información", "precio"],
@@ -194,12 +343,12 @@ class ConfigLoader:
                 "trace_all_conversations": True
             }
         }
-        self._config = Config(**self._raw_config)
+        self._snapshot = ConfigSnapshot.build(raw_config)
     
     @property
     def config(self) -> Config:
         """Get configuration object"""
-        return self._config
+        return self._snapshot.config
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by dot notation
@@ -211,35 +360,127 @@ class ConfigLoader:
         Returns:
             Configuration value
         """
-        parts = key.split('.')
-        value = self._raw_config
+        return self._snapshot.flat.get(key, default)
+    
+    def get_as(self, key: str, cast: Callable[[Any], T], default: Optional[T] = None) -> Optional[T]:
+        """Get a configuration value converted with ``cast`` (e.g. int, float, bool)
+        
+        Conversions are memoized until the next reload. Values that are
+        missing, None or fail to convert return ``default``.
+        """
+        snapshot = self._snapshot
+        cache_key = (key, cast)
+        result = snapshot.typed.get(cache_key, _MISSING)
+        if result is _MISSING:
+            value = snapshot.flat.get(key)
+            try:
+                result = (_to_bool if cast is bool else cast)(value) if value is not None else _MISSING
+            except (TypeError, ValueError):
+                logger.warning("Config value has wrong type", key=key, expected=getattr(cast, "__name__", str(cast)))
+                result = _MISSING
+            snapshot.typed[cache_key] = result
+        return default if result is _MISSING else result
+    
+    def reload(self, force: bool = True) -> bool:
+        """Reload configuration from file
+        
+        The file is parsed and validated before anything is swapped, so a
+        broken edit keeps the current configuration.
         
-        for part in parts:
-            if isinstance(value, dict) and part in value:
-                value = value[part]
-            else:
-                return default
+        Args:
+            force: Reload even if the file modification time is unchanged
         
-        return value
+        Returns:
+            True if a new configuration snapshot was published
+        """
+        with self._lock:
+            mtime = self._stat()
+            if not force and mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            
+            logger.info("Reloading configuration")
+            try:
+                snapshot = self._parse()
+            except Exception as e:
+                logger.error(f"Error reloading config, keeping current configuration: {e}")
+                return False
+            
+            if snapshot.raw == self._snapshot.raw:
+                return False
+            self._snapshot = snapshot
+            config = snapshot.config
+            subscribers = list(self._subscribers)
+        
+        logger.info("Configuration reloaded", subscribers=len(subscribers))
+        for callback in subscribers:
+            try:
+                callback(config)
+            except Exception as e:
+                logger.error("Config subscriber failed", callback=getattr(callback, "__name__", repr(callback)), error=str(e))
+        return True
     
-    def reload(self):
-        """Reload configuration from file"""
-        logger.info("Reloading configuration")
-        self._load_config()
+    def check_for_changes(self) -> bool:
+        """Reload only if the config file changed since the last load"""
+        return self.reload(force=False)
+    
+    def subscribe(self, callback: ConfigSubscriber) -> Callable[[], None]:
+        """Call ``callback(config)`` after every reload that changes the configuration
+        
+        Returns:
+            Function that removes the subscription
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+    
+    async def watch(self, interval: float = CONFIG_POLL_INTERVAL):
+        """Poll the config file until cancelled, reloading off the event loop"""
+        logger.info("Watching config for changes", path=str(self.config_path), interval=interval)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.check_for_changes)
+            except Exception as e:
+                logger.error("Config watch error", error=str(e))
 
 # Global config instance
 _config_loader = None
 
-def get_config() -> Config:
-    """Get global configuration"""
+# Subscribers registered before the config was first loaded
+_pending_subscribers: List[ConfigSubscriber] = []
+
+def get_config_loader() -> ConfigLoader:
+    """Get global config loader"""
     global _config_loader
     if _config_loader is None:
         _config_loader = ConfigLoader()
-    return _config_loader.config
+        for callback in _pending_subscribers:
+            _config_loader.subscribe(callback)
+        _pending_subscribers.clear()
+    return _config_loader
 
-def get_config_value(key: str, default: Any = None) -> Any:
-    """Get specific configuration value"""
-    global _config_loader
+def get_config() -> Config:
+    """Get the current configuration snapshot"""
+    return get_config_loader().config
+
+def get_config_value(key: str, default: Any = None, cast: Optional[Callable[[Any], Any]] = None) -> Any:
+    """Get specific configuration value, optionally converted with ``cast``"""
+    if cast is not None:
+        return get_config_loader().get_as(key, cast, default)
+    return get_config_loader().get(key, default)
+
+def subscribe_config(callback: ConfigSubscriber) -> Callable[[], None]:
+    """Recompute derived state (prompts, matchers, ...) when the configuration changes
+    
+    Subscribing does not load the configuration.
+    """
     if _config_loader is None:
-        _config_loader = ConfigLoader()
-    return _config_loader.get(key, default)
\ No newline at end of file
+        _pending_subscribers.append(callback)
+        return lambda: _pending_subscribers.remove(callback) if callback in _pending_subscribers else None
+    return _config_loader.subscribe(callback)
@@ -1,11 +1,13 @@
 """Custom webhook app for LangGraph deployment"""
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import json
 import structlog
 import os
-from typing import Dict, Any
+import sys
+from typing import Dict, Any, AsyncIterator, Optional
 from pathlib import Path
 
 # Configure logging
@@ -24,8 +26,7 @@ if IS_DEPLOYMENT:
     except ImportError:
         logger.warning("LangGraph SDK not available in deployment")
 else:
-    # For local testing, use the agent directly
-    from ghl_agent.agent.graph import process_ghl_message
+    # For local testing, use the agent directly (imported on first request)
     client = "local"
 
 @asynccontextmanager
@@ -46,9 +47,48 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("Running in local mode - using direct agent invocation")
     
+    # Warn early if configured checkpoint compression cannot run here
+    from ghl_agent.serialization import check_compression
+    check_compression()
+    
+    # Pick up config and catalog edits without restarting workers
+    from ghl_agent.config_loader import get_config_loader
+    from ghl_agent.catalog import get_catalog_service
+    watchers = [
+        asyncio.create_task(get_config_loader().watch()),
+        asyncio.create_task(get_catalog_service().watch())
+    ]
+    
+    # Optionally warm caches, graphs and pools; /health and the agent endpoints answer 503 until done
+    from ghl_agent.warmup import WARMUP_ON_STARTUP, warmup_status, warm_up, close_pools
+    if WARMUP_ON_STARTUP:
+        warmup_status.begin()
+        watchers.append(asyncio.create_task(warm_up()))
+    
+    # Periodically write token/cost counters to the store
+    from ghl_agent.config_loader import get_config
+    from ghl_agent.usage import usage_ledger
+    if get_config().usage.enabled:
+        await usage_ledger.open()
+        watchers.append(usage_ledger.start_flusher())
+    
     yield
     
-    # Shutdown (if needed)
+    # Shutdown
+    for watcher in watchers:
+        watcher.cancel()
+    await usage_ledger.flush()
+    # Fold the SQLite WAL back into the database file if that backend was used
+    sqlite_backend = sys.modules.get("ghl_agent.agent.sqlite_backend")
+    if sqlite_backend is not None:
+        sqlite_backend.close_sqlite_backends()
+    from ghl_agent.agent.checkpointing import close_postgres_backends
+    await close_postgres_backends()
+    await close_pools()
+    from ghl_agent.tracing import shutdown_tracing
+    shutdown_tracing()
+    from ghl_agent.profiling import profiler
+    profiler.stop_sampler()
     logger.info("Shutting down webhook app")
 
 # Create FastAPI app with lifespan
@@ -59,9 +99,31 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Seconds clients are asked to wait before retrying during warm-up
+WARMUP_RETRY_AFTER_SECONDS = 5
+
+def _require_warm():
+    """Reject agent traffic (503) until warm-up has finished"""
+    from ghl_agent.warmup import warmup_status
+    if not warmup_status.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Warming up",
+            headers={"Retry-After": str(WARMUP_RETRY_AFTER_SECONDS)}
+        )
+
 @app.post("/webhook/ghl")
 async def handle_ghl_webhook(request: Request):
     """Handle GoHighLevel webhook and invoke agent"""
+    from ghl_agent.tracing import span, extract_context
+    _require_warm()
+    # Continue the caller's trace when a traceparent header is sent
+    with span("webhook.ghl", context=extract_context(request.headers)) as current_span:
+        return await _process_ghl_webhook(request, current_span)
+
+async def _process_ghl_webhook(request: Request, current_span):
+    """Parse the webhook payload and hand the message to the agent"""
+    from ghl_agent.tracing import span
     try:
         data = await request.json()
         
@@ -101,6 +163,9 @@ async def handle_ghl_webhook(request: Request):
             elif isinstance(data.get("message"), str):
                 message_body = data.get("message")
         
+        current_span.set_attribute("ghl.contact_id", contact_id or "")
+        current_span.set_attribute("ghl.webhook_type", data.get("type") or "custom")
+        
         # Basic validation
         if not contact_id or not message_body:
             logger.warning(f"Missing required fields: contact_id={contact_id}, message_body={message_body}, data_keys={list(data.keys())}")
@@ -113,31 +178,34 @@ async def handle_ghl_webhook(request: Request):
                 thread_id = f"ghl-{contact_id}"
                 
                 # Try to get existing thread
-                try:
-                    thread = await client.threads.get(thread_id)
-                    logger.info(f"Found existing thread: {thread_id}")
-                except:
-                    # Create new thread if it doesn't exist
-                    thread = await client.threads.create(
+                with span("thread.lookup", thread_id=thread_id):
+                    try:
+                        thread = await client.threads.get(thread_id)
+                        logger.info(f"Found existing thread: {thread_id}")
+                    except:
+                        # Create new thread if it doesn't exist
+                        thread = await client.threads.create(
+                            thread_id=thread_id,
+                            metadata={
+                                "contact_id": contact_id,
+                                "conversation_id": conversation_id,
+                                "location_id": data.get("locationId")
+                            }
+                        )
+                        logger.info(f"Created new thread: {thread_id}")
+                
+                # Create a run with the message
+                with span("run.create", thread_id=thread_id):
+                    run = await client.runs.create(
                         thread_id=thread_id,
-                        metadata={
+                        assistant_id="ghl_agent",  # This must match the name in langgraph.json
+                        input={
+                            "messages": [{"role": "human", "content": message_body}],
                             "contact_id": contact_id,
                             "conversation_id": conversation_id,
                             "location_id": data.get("locationId")
                         }
                     )
-                    logger.info(f"Created new thread: {thread_id}")
-                
-                # Create a run with the message
-                run = await client.runs.create(
-                    thread_id=thread_id,
-                    assistant_id="ghl_agent",  # This must match the name in langgraph.json
-                    input={
-                        "messages": [{"role": "human", "content": message_body}],
-                        "contact_id": contact_id,
-                        "conversation_id": conversation_id
-                    }
-                )
                 
                 logger.info(f"Created run: {run['run_id']} for thread: {thread_id}")
                 
@@ -160,11 +228,15 @@ async def handle_ghl_webhook(request: Request):
         else:
             # Local mode - use direct invocation
             try:
-                response = await process_ghl_message(
-                    contact_id=contact_id,
-                    conversation_id=conversation_id,
-                    message=message_body
-                )
+                from ghl_agent.agent.graph import process_ghl_message
+                from ghl_agent.profiling import profile_run
+                with span("agent.run", contact_id=contact_id, conversation_id=conversation_id), profile_run("webhook"):
+                    response = await process_ghl_message(
+                        contact_id=contact_id,
+                        conversation_id=conversation_id,
+                        message=message_body,
+                        location_id=data.get("locationId")
+                    )
                 
                 logger.info(f"Agent response: {response[:100]}...")
                 
@@ -187,16 +259,96 @@ async def handle_ghl_webhook(request: Request):
         logger.error(f"Webhook error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def _format_sse(event: str, data: Any) -> str:
+    """Format a single Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def _stream_run_events(
+    contact_id: str,
+    conversation_id: str,
+    message_body: str,
+    location_id: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Yield SSE frames for an agent run in either deployment or local mode"""
+    run_input = {
+        "messages": [{"role": "human", "content": message_body}],
+        "contact_id": contact_id,
+        "conversation_id": conversation_id,
+        "location_id": location_id
+    }
+    try:
+        if IS_DEPLOYMENT and client and client != "local":
+            # Deployment mode - proxy the platform's run stream for the contact thread
+            thread_id = f"ghl-{contact_id}"
+            try:
+                await client.threads.get(thread_id)
+            except Exception:
+                await client.threads.create(
+                    thread_id=thread_id,
+                    metadata={"contact_id": contact_id, "conversation_id": conversation_id, "location_id": location_id}
+                )
+            async for part in client.runs.stream(
+                thread_id,
+                "ghl_agent",
+                input=run_input,
+                stream_mode=["updates", "messages-tuple"]
+            ):
+                yield _format_sse(part.event, part.data)
+        else:
+            # Local mode - stream events from the in-process graph
+            from ghl_agent.agent.graph import stream_graph_updates
+            async for event in stream_graph_updates(run_input):
+                yield _format_sse(event["event"], event)
+    except Exception as e:
+        logger.error(f"Error streaming agent run: {str(e)}")
+        yield _format_sse("error", {"event": "error", "error": str(e)})
+
+@app.post("/agent/stream")
+async def stream_agent_run(request: Request):
+    """Run the agent for a message and stream node, tool and token events via SSE"""
+    _require_warm()
+    data = await request.json()
+    contact_id = data.get("contact_id") or data.get("contactId")
+    conversation_id = data.get("conversation_id") or data.get("conversationId")
+    location_id = data.get("location_id") or data.get("locationId")
+    message_body = data.get("message")
+    if isinstance(message_body, dict):
+        message_body = message_body.get("body") or message_body.get("text")
+
+    if not contact_id or not message_body:
+        raise HTTPException(status_code=400, detail="contact_id and message are required")
+
+    logger.info("Streaming agent run", contact_id=contact_id)
+    return StreamingResponse(
+        _stream_run_events(contact_id, conversation_id, message_body, location_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
+    """Health check endpoint - not ready (503) while the worker is warming up"""
+    from ghl_agent.warmup import warmup_status
+    health = {
+        "status": "healthy" if warmup_status.ready else "warming_up",
         "service": "battery-consultation",
-        "webhooks": "ready",
+        "webhooks": "ready" if warmup_status.ready else "warming_up",
         "mode": "deployment" if IS_DEPLOYMENT else "local",
-        "client_initialized": client is not None
+        "client_initialized": client is not None,
+        "warmup": warmup_status.snapshot()
     }
+    if not warmup_status.ready:
+        return JSONResponse(content=health, status_code=503)
+    return health
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for nodes, tools, GHL requests, LLM calls and the store"""
+    from ghl_agent.metrics import METRICS_ENABLED, render_metrics
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (install prometheus_client, METRICS_ENABLED=true)")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/")
 async def root():
@@ -206,7 +358,9 @@ async def root():
         "version": "2.0.0",
         "endpoints": [
             "/webhook/ghl",
+            "/agent/stream",
             "/health",
+            "/metrics",
             "/inbox",
             "/inbox/conversations",
             "/inbox/metrics"
@@ -214,6 +368,10 @@ async def root():
         "mode": "deployment" if IS_DEPLOYMENT else "local"
     }
 
+# Operator endpoints (profiling) - only served when ADMIN_TOKEN is set
+from ghl_agent.admin import create_admin_router
+app.include_router(create_admin_router())
+
 # Add inbox functionality
 try:
     from ghl_agent.inbox.api import create_inbox_router
@@ -0,0 +1,239 @@
+"""Local stand-ins for the chat model and the GoHighLevel API
+
+Used by the startup warm-up dry run and the benchmarks to run the agent end
+to end without network access or API keys.
+"""
+from typing import Dict, List, Optional, Any, Callable, Iterator
+from collections import Counter
+from contextlib import contextmanager
+import asyncio
+import json
+import re
+import time
+import uuid
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, AIMessage, AIMessageChunk, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
+import structlog
+
+from ghl_agent.tools.ghl_tools import endpoint_template
+
+logger = structlog.get_logger()
+
+# Rough characters per token for fake usage metadata
+CHARS_PER_TOKEN = 4
+
+_CONTACT_ID = re.compile(r"Contact ID actual: (\S+)")
+_EQUIPMENT_WORDS = ("nevera", "tv", "televisor", "abanico", "microondas", "computadora", "router", "luces", "aire")
+
+Responder = Callable[[List[BaseMessage]], AIMessage]
+
+
+def _contact_id(messages: List[BaseMessage]) -> str:
+    for message in messages:
+        if isinstance(message, SystemMessage):
+            match = _CONTACT_ID.search(message.content)
+            if match:
+                return match.group(1)
+    return "contact-local"
+
+
+REFLECTION_ANSWER = """SENTIMIENTO: positivo
+TEMAS CLAVE: baterías, apagones
+PUNTOS DE DOLOR: apagones frecuentes
+OPORTUNIDADES: consulta personalizada
+RESUMEN: Cliente interesado en respaldo para apagones
+PRÓXIMA ACCIÓN: agendar consulta"""
+
+
+def default_responder(messages: List[BaseMessage]) -> AIMessage:
+    """Follow the agent's happy path for the latest customer message
+
+    Saves housing type and sizes mentioned equipment, replies through
+    ``send_ghl_message`` and finishes with plain text once tool results are in.
+    Reflection prompts get a fixed analysis in the expected line format.
+    """
+    if messages and isinstance(messages[0], SystemMessage) and "SENTIMIENTO:" in messages[0].content:
+        return AIMessage(content=REFLECTION_ANSWER)
+
+    last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+    if any(isinstance(m, ToolMessage) for m in messages[last_human + 1:]):
+        return AIMessage(content="Listo, te envié la información por WhatsApp.")
+
+    text = messages[last_human].content.lower() if last_human >= 0 else ""
+    contact_id = _contact_id(messages)
+    tool_calls = []
+
+    housing_type = "apartamento" if "apartamento" in text else "casa" if "casa" in text else None
+    if housing_type:
+        tool_calls.append({"name": "update_conversation_state", "args": {"housing_type": housing_type}})
+    equipment = [word for word in _EQUIPMENT_WORDS if word in text]
+    if equipment:
+        tool_calls.append({
+            "name": "calculate_battery_runtime",
+            "args": {"equipment_list": equipment, "battery_capacity_wh": 2048}
+        })
+        reply = "Con esos equipos te recomiendo una batería de 2kWh o más. ¿Deseas una consulta personalizada?"
+    elif housing_type:
+        reply = "Perfecto. ¿Qué equipos deseas energizar durante un apagón?"
+    else:
+        reply = "¡Hola! Soy tu especialista en baterías. ¿Vives en casa o apartamento?"
+    tool_calls.append({"name": "send_ghl_message", "args": {"contact_id": contact_id, "message": reply}})
+
+    return AIMessage(
+        content="",
+        tool_calls=[{**call, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"} for call in tool_calls]
+    )
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that answers with a responder function after a fixed delay"""
+
+    responder: Optional[Responder] = None
+    latency_seconds: float = 0.0
+    model_name: str = "scripted"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any):
+        # Tool schemas do not change scripted answers
+        return self.bind(tools=[getattr(tool, "name", str(tool)) for tool in tools])
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[str]]) -> AIMessage:
+        self.calls += 1
+        message = (self.responder or default_responder)(messages)
+        if not tools and message.tool_calls:
+            # Without bound tools a real model can only answer in text
+            message = AIMessage(content=message.content)
+        input_tokens = sum(len(str(m.content)) for m in messages) // CHARS_PER_TOKEN
+        output_tokens = (len(message.content) + len(json.dumps([c["args"] for c in message.tool_calls]))) // CHARS_PER_TOKEN
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
+        message.response_metadata = {"model_name": self.model_name}
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        message = self._respond(messages, kwargs.get("tools"))
+        for word in message.content.split(" ") if message.content else []:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+                for index, call in enumerate(message.tool_calls)
+            ],
+            usage_metadata=message.usage_metadata,
+            response_metadata=message.response_metadata
+        ))
+
+
+class FakeGHL:
+    """In-memory GoHighLevel API served through ``httpx.MockTransport``
+
+    Outbound WhatsApp messages are recorded in ``sent_messages`` (with a
+    ``perf_counter`` timestamp) and passed to ``on_send``.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, on_send: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.latency_seconds = latency_seconds
+        self.on_send = on_send
+        self.sent_messages: List[Dict[str, Any]] = []
+        self.contacts: Dict[str, Dict[str, Any]] = {}
+        self.requests: Counter = Counter()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def _contact(self, contact_id: str) -> Dict[str, Any]:
+        return self.contacts.setdefault(contact_id, {
+            "id": contact_id,
+            "name": f"Cliente {contact_id[-4:]}",
+            "phone": "+17875550100",
+            "email": f"{contact_id}@example.com",
+            "tags": [],
+            "customFields": {}
+        })
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        method, parts = request.method, request.url.path.strip("/").split("/")
+        self.requests[f"{method} {endpoint_template(request.url.path)}"] += 1
+
+        if method == "HEAD":
+            return httpx.Response(200)
+        if method == "POST" and parts == ["conversations", "messages"]:
+            payload = json.loads(request.content or b"{}")
+            record = {
+                "id": f"msg_{uuid.uuid4().hex[:12]}",
+                "contact_id": payload.get("contactId"),
+                "conversation_id": payload.get("conversationId"),
+                "message": payload.get("message"),
+                "sent_at": time.perf_counter()
+            }
+            self.sent_messages.append(record)
+            if self.on_send:
+                self.on_send(record)
+            return httpx.Response(200, json={"messageId": record["id"], "conversationId": record["conversation_id"]})
+        if parts[0] == "contacts" and len(parts) == 2:
+            contact = self._contact(parts[1])
+            if method == "PUT":
+                contact.update(json.loads(request.content or b"{}"))
+            return httpx.Response(200, json=contact)
+        if parts[0] == "conversations" and parts[-1] == "messages" and method == "GET":
+            return httpx.Response(200, json={"messages": []})
+        if parts[0] == "calendars" and parts[-1] == "free-slots":
+            return httpx.Response(200, json={"slots": [
+                {"date": "2025-01-15", "time": "10:00", "available": True},
+                {"date": "2025-01-15", "time": "14:00", "available": True}
+            ]})
+        if parts[0] == "calendars" and parts[-1] == "appointments" and method == "POST":
+            return httpx.Response(200, json={"id": f"appt_{uuid.uuid4().hex[:12]}", "status": "confirmed"})
+        return httpx.Response(404, json={"error": f"No fake route for {method} {request.url.path}"})
+
+
+@contextmanager
+def installed_fakes(model: Optional[BaseChatModel] = None, ghl: Optional[FakeGHL] = None) -> Iterator[Dict[str, Any]]:
+    """Route chat models and GHL requests to stand-ins for the duration of the block
+
+    Yields:
+        Dict with the ``model`` and ``ghl`` stand-ins in use
+    """
+    from ghl_agent.agent.model_tiers import set_chat_model_factory
+    from ghl_agent.tools.ghl_tools import ghl_client
+
+    model = model or ScriptedChatModel()
+    ghl = ghl or FakeGHL()
+    previous_factory = set_chat_model_factory(lambda model_name, temperature, logprobs: model)
+    previous_transport = ghl_client.transport
+    ghl_client.use_transport(ghl.transport())
+    try:
+        yield {"model": model, "ghl": ghl}
+    finally:
+        set_chat_model_factory(previous_factory)
+        ghl_client.use_transport(previous_transport)
+
+
+__all__ = ["ScriptedChatModel", "FakeGHL", "default_responder", "installed_fakes"]
@@ -2,15 +2,16 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List, Optional
 from langgraph.store.base import BaseStore
-from ghl_agent.agent.graph import get_checkpointer_with_store
+from ghl_agent.agent.checkpointing import get_async_checkpointer_with_store
+from ghl_agent.usage import usage_ledger
 from .inbox_ui import AgentInbox
 import structlog
 
 logger = structlog.get_logger()
 
-def get_inbox_store() -> BaseStore:
-    """Get store instance for inbox"""
-    _, store = get_checkpointer_with_store()
+async def get_inbox_store() -> BaseStore:
+    """Get store instance for inbox (the app's async backend)"""
+    _, store = await get_async_checkpointer_with_store()
     return store
 
 def create_inbox_router() -> APIRouter:
@@ -31,8 +32,8 @@ def create_inbox_router() -> APIRouter:
             # Filter by status if provided
             if status:
                 status_map = {
-                    "new": lambda c: c.get("stage") == "greeting",
-                    "in_progress": lambda c: c.get("stage") in ["discovery", "qualification"],
+                    "new": lambda c: c.get("stage") == "discovery",
+                    "in_progress": lambda c: c.get("stage") in ["qualification", "recommendation"],
                     "qualified": lambda c: c.get("stage") == "scheduling",
                     "completed": lambda c: c.get("appointment_scheduled", False)
                 }
@@ -81,6 +82,32 @@ def create_inbox_router() -> APIRouter:
             logger.error("Failed to get metrics", error=str(e))
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.get("/usage")
+    async def get_usage(
+        day: Optional[str] = None,
+        tenant: Optional[str] = None,
+        contact_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Token and cost usage for a day (default today), by contact, stage and model"""
+        try:
+            return await usage_ledger.report(tenant, day, contact_id)
+        except Exception as e:
+            logger.error("Failed to get usage", error=str(e))
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/conversations/{contact_id}/usage")
+    async def get_conversation_usage(
+        contact_id: str,
+        day: Optional[str] = None,
+        tenant: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Token and cost usage for one contact, by stage and model"""
+        try:
+            return await usage_ledger.report(tenant, day, contact_id)
+        except Exception as e:
+            logger.error("Failed to get conversation usage", error=str(e))
+            raise HTTPException(status_code=500, detail=str(e))
+    
     @router.post("/conversations/{contact_id}/flag")
     async def flag_conversation(
         contact_id: str,
@@ -96,7 +123,7 @@ def create_inbox_router() -> APIRouter:
                 "reason": reason,
                 "flagged_at": datetime.now().isoformat()
             }
-            store.put(namespace, str(uuid.uuid4()), flag_data)
+            await store.aput(namespace, str(uuid.uuid4()), flag_data)
             
             logger.info("Conversation flagged", contact_id=contact_id, reason=reason)
             return {"status": "flagged", "contact_id": contact_id}
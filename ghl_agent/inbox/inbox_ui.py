@@ -21,7 +21,7 @@ class AgentInbox:
             conversations = []
             
             # Get all conversation memories
-            memories = self.store.search(namespace)
+            memories = await self.store.asearch(namespace)
             
             for memory in memories[:limit]:
                 conv_data = memory.value
@@ -29,7 +29,7 @@ class AgentInbox:
                 
                 # Get latest insights if available
                 insights_namespace = ("insights", contact_id)
-                insights = self.store.search(insights_namespace)
+                insights = await self.store.asearch(insights_namespace)
                 latest_insight = insights[0].value if insights else {}
                 
                 conversations.append({
@@ -61,7 +61,7 @@ class AgentInbox:
         try:
             # Get conversation memory
             conv_namespace = ("conversation", contact_id)
-            conv_memories = self.store.search(conv_namespace)
+            conv_memories = await self.store.asearch(conv_namespace)
             
             if not conv_memories:
                 return {"error": "Conversation not found"}
@@ -70,11 +70,11 @@ class AgentInbox:
             
             # Get insights
             insights_namespace = ("insights", contact_id)
-            insights = self.store.search(insights_namespace)
+            insights = await self.store.asearch(insights_namespace)
             
             # Get preferences
             pref_namespace = ("preferences", contact_id)
-            preferences = self.store.search(pref_namespace)
+            preferences = await self.store.asearch(pref_namespace)
             
             return {
                 "contact_id": contact_id,
@@ -0,0 +1,259 @@
+"""Prometheus metrics for graph nodes, tools, GHL requests, LLM calls, spend, equipment matching and store operations
+
+Metrics are on when ``prometheus_client`` is installed and ``METRICS_ENABLED``
+is not "false". When off, every ``track_*`` helper returns one shared no-op
+timer, so instrumented hot paths only pay for a function call. The same
+happens inside ``suppressed_metrics()`` blocks (e.g. warm-up dry runs).
+"""
+from typing import Dict, Any, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import asyncio
+import os
+import time
+import structlog
+
+logger = structlog.get_logger()
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true" and prometheus_client is not None
+
+# Seconds - from in-process tools up to slow LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+
+_suppressed: ContextVar[bool] = ContextVar("metrics_suppressed", default=False)
+
+
+@contextmanager
+def suppressed_metrics():
+    """Do not record metrics or in-process stats in the block (e.g. warm-up dry runs)"""
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def metrics_suppressed() -> bool:
+    """Whether the current context is inside ``suppressed_metrics()``"""
+    return _suppressed.get()
+
+
+def _recording() -> bool:
+    return METRICS_ENABLED and not _suppressed.get()
+
+
+class Timer:
+    """Observes its block's duration on exit, labelled with the outcome
+
+    The outcome is ``error`` when the block raises; code that handles its
+    own errors can set ``outcome`` explicitly.
+    """
+
+    __slots__ = ("histogram", "labels", "outcome", "_started")
+
+    def __init__(self, histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.outcome = OUTCOME_OK
+
+    def __enter__(self) -> "Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.outcome == OUTCOME_OK:
+            self.outcome = OUTCOME_ERROR
+        self.histogram.labels(outcome=self.outcome, **self.labels).observe(time.perf_counter() - self._started)
+        return False
+
+
+class _NoopTimer:
+    """Stand-in for Timer when metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    # Assigning an outcome is accepted and ignored
+    outcome = property(lambda self: OUTCOME_OK, lambda self, value: None)
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+if METRICS_ENABLED:
+    NODE_DURATION = prometheus_client.Histogram(
+        "ghl_agent_node_duration_seconds", "Graph node run time",
+        ["node", "stage", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    TOOL_DURATION = prometheus_client.Histogram(
+        "ghl_agent_tool_duration_seconds", "Tool call run time",
+        ["tool", "stage", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    GHL_REQUEST_DURATION = prometheus_client.Histogram(
+        "ghl_agent_ghl_request_duration_seconds", "GoHighLevel API request time per attempt",
+        ["method", "endpoint", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    LLM_REQUEST_DURATION = prometheus_client.Histogram(
+        "ghl_agent_llm_request_duration_seconds", "LLM request time per attempt",
+        ["model", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    LLM_TOKENS = prometheus_client.Counter(
+        "ghl_agent_llm_tokens", "LLM tokens by direction",
+        ["model", "direction"]
+    )
+    LLM_COST = prometheus_client.Counter(
+        "ghl_agent_llm_cost_usd", "Estimated LLM spend in USD",
+        ["model", "stage"]
+    )
+    BUDGET_ACTIONS = prometheus_client.Counter(
+        "ghl_agent_budget_actions", "Turns downgraded or templated by usage budgets",
+        ["action"]
+    )
+    EQUIPMENT_MATCHES = prometheus_client.Counter(
+        "ghl_agent_equipment_matches", "Equipment name lookups by how they resolved (miss when unknown)",
+        ["kind"]
+    )
+    STORE_DURATION = prometheus_client.Histogram(
+        "ghl_agent_store_operation_duration_seconds", "Memory store operation time",
+        ["operation", "namespace", "outcome"], buckets=LATENCY_BUCKETS
+    )
+
+
+def track_node(node: str, stage: Optional[str] = None):
+    """Time a graph node run"""
+    if not _recording():
+        return _NOOP_TIMER
+    return Timer(NODE_DURATION, {"node": node, "stage": stage or "unknown"})
+
+
+def track_tool(tool: str, stage: Optional[str] = None):
+    """Time a tool call"""
+    if not _recording():
+        return _NOOP_TIMER
+    return Timer(TOOL_DURATION, {"tool": tool, "stage": stage or "unknown"})
+
+
+def track_ghl_request(method: str, endpoint: str):
+    """Time a GHL API request - ``endpoint`` must be a route template, not a raw path"""
+    if not _recording():
+        return _NOOP_TIMER
+    return Timer(GHL_REQUEST_DURATION, {"method": method, "endpoint": endpoint})
+
+
+def track_llm(model: str):
+    """Time an LLM request attempt"""
+    if not _recording():
+        return _NOOP_TIMER
+    return Timer(LLM_REQUEST_DURATION, {"model": model})
+
+
+# Namespace label of batches that span several namespace roots
+BATCH_NAMESPACE = "batch"
+
+
+def track_store(operation: str, *namespaces: Tuple[str, ...]):
+    """Time a store operation, labelled with the namespace root (e.g. "conversation")
+
+    Batches pass every namespace they touch; those spanning several roots
+    are labelled "batch" rather than after their first operation.
+    """
+    if not _recording():
+        return _NOOP_TIMER
+    roots = {namespace[0] for namespace in namespaces if namespace}
+    label = roots.pop() if len(roots) == 1 else (BATCH_NAMESPACE if roots else "")
+    return Timer(STORE_DURATION, {"operation": operation, "namespace": label})
+
+
+def record_llm_tokens(model: str, usage: Optional[Dict[str, Any]]):
+    """Count input and output tokens from a response's ``usage_metadata``"""
+    if not _recording() or not usage:
+        return
+    LLM_TOKENS.labels(model=model, direction="input").inc(usage.get("input_tokens", 0))
+    LLM_TOKENS.labels(model=model, direction="output").inc(usage.get("output_tokens", 0))
+
+
+def record_llm_cost(model: str, stage: str, cost_usd: float, cached_tokens: int = 0):
+    """Count a call's estimated cost and cached prompt tokens"""
+    if not _recording():
+        return
+    LLM_COST.labels(model=model, stage=stage).inc(cost_usd)
+    if cached_tokens:
+        LLM_TOKENS.labels(model=model, direction="cached").inc(cached_tokens)
+
+
+def record_budget_action(action: str):
+    """Count a turn handled by a usage budget"""
+    if _recording():
+        BUDGET_ACTIONS.labels(action=action).inc()
+
+
+def record_equipment_match(kind: str):
+    """Count an equipment name lookup by match kind (exact, alias, plural, fuzzy or miss)"""
+    if _recording():
+        EQUIPMENT_MATCHES.labels(kind=kind).inc()
+
+
+def _outcome(result: Any) -> str:
+    # Nodes report handled failures through the "error" state key
+    if isinstance(result, dict) and result.get("error"):
+        return OUTCOME_ERROR
+    return OUTCOME_OK
+
+
+def instrument_node(name: str, node):
+    """Wrap a graph node so each run is timed with the stage it started in"""
+    if not METRICS_ENABLED:
+        return node
+
+    if asyncio.iscoroutinefunction(node):
+        @wraps(node)
+        async def timed_node(state, *args, **kwargs):
+            with track_node(name, state.get("conversation_stage")) as timer:
+                result = await node(state, *args, **kwargs)
+                timer.outcome = _outcome(result)
+                return result
+    else:
+        @wraps(node)
+        def timed_node(state, *args, **kwargs):
+            with track_node(name, state.get("conversation_stage")) as timer:
+                result = node(state, *args, **kwargs)
+                timer.outcome = _outcome(result)
+                return result
+    return timed_node
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format and its content type"""
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+__all__ = [
+    "METRICS_ENABLED",
+    "suppressed_metrics",
+    "metrics_suppressed",
+    "track_node",
+    "track_tool",
+    "track_ghl_request",
+    "track_llm",
+    "track_store",
+    "record_llm_tokens",
+    "record_llm_cost",
+    "record_budget_action",
+    "record_equipment_match",
+    "instrument_node",
+    "render_metrics"
+]
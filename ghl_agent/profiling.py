@@ -0,0 +1,202 @@
+"""Opt-in profiling: a stack-sampling thread and per-run cProfile
+
+Configured from the environment:
+    PROFILE_SAMPLE_RATE   Share of agent runs profiled with cProfile, 0.0-1.0 (default 0)
+    PROFILE_DIR           Output directory (default profiles/)
+
+The sampler walks every thread's stack at a fixed interval and writes folded
+stacks (``frame;frame;frame count``) that ``flamegraph.pl`` or speedscope read
+directly. Per-run profiles are ``.prof`` files for ``pstats``/snakeviz - note
+that cProfile sees everything the event loop runs meanwhile, not just the
+profiled run.
+"""
+from typing import Dict, Any, List, Optional
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+import cProfile
+import os
+import random
+import sys
+import sysconfig
+import threading
+import time
+import structlog
+
+logger = structlog.get_logger()
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+
+DEFAULT_INTERVAL_SECONDS = 0.01
+# Stacks deeper than this are truncated at the root end
+MAX_STACK_DEPTH = 128
+# Leaf frames of threads blocked waiting - skipped unless idle stacks are requested
+IDLE_FRAMES = {"Condition.wait", "Event.wait", "Queue.get", "EpollSelector.select", "KqueueSelector.select", "_worker"}
+
+# Path prefixes stripped from labels so they stay short and stable across hosts
+_PATH_PREFIXES = sorted(
+    {path + os.sep for key in ("purelib", "platlib", "stdlib", "platstdlib") if (path := sysconfig.get_paths().get(key))},
+    key=len,
+    reverse=True
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    else:
+        index = filename.rfind("ghl_agent" + os.sep)
+        if index != -1:
+            filename = filename[index:]
+    return f"{filename}:{code.co_qualname}"
+
+
+def folded_stack(frame) -> str:
+    """Root-first ``;``-joined labels for a frame's stack"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Background thread sampling all thread stacks into folded-stack counts"""
+
+    def __init__(self, interval_seconds: float = DEFAULT_INTERVAL_SECONDS, include_idle: bool = False):
+        self.interval_seconds = interval_seconds
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not self.include_idle and frame.f_code.co_qualname in IDLE_FRAMES:
+                    continue
+                self.stacks[folded_stack(frame)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def write(self, directory: Path = PROFILE_DIR) -> Path:
+        """Write the folded stacks to ``directory`` and return the file path"""
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"sampler-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def top_frames(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Leaf frames with the most samples (self time)"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"frame": frame, "samples": count, "share": round(count / total, 4)}
+            for frame, count in leaves.most_common(limit)
+        ]
+
+
+class Profiler:
+    """Worker-wide profiling state behind the admin endpoints"""
+
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.sampler: Optional[StackSampler] = None
+        self.last_sampler_file: Optional[Path] = None
+        self.profiled_runs = 0
+        # cProfile cannot nest, so at most one run is profiled at a time
+        self._run_lock = threading.Lock()
+
+    def start_sampler(self, interval_seconds: float = DEFAULT_INTERVAL_SECONDS, include_idle: bool = False) -> StackSampler:
+        if self.sampler is not None and self.sampler.running:
+            raise RuntimeError("Sampler already running")
+        self.sampler = StackSampler(interval_seconds, include_idle)
+        self.sampler.start()
+        logger.info("Stack sampler started", interval_ms=round(interval_seconds * 1000, 2))
+        return self.sampler
+
+    def stop_sampler(self) -> Optional[Path]:
+        """Stop the sampler and write its stacks, returning the file path"""
+        if self.sampler is None or not self.sampler.running:
+            return None
+        self.sampler.stop()
+        self.last_sampler_file = self.sampler.write()
+        logger.info("Stack sampler stopped", samples=self.sampler.samples, path=str(self.last_sampler_file))
+        return self.last_sampler_file
+
+    @contextmanager
+    def profile_run(self, name: str):
+        """cProfile the block for a ``sample_rate`` share of calls"""
+        if not self.sample_rate or random.random() >= self.sample_rate or not self._run_lock.acquire(blocking=False):
+            yield None
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                yield profile
+            finally:
+                profile.disable()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            path = PROFILE_DIR / f"run-{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.profiled_runs}.prof"
+            profile.dump_stats(path)
+            self.profiled_runs += 1
+            logger.info("Run profiled", name=name, path=str(path))
+        finally:
+            self._run_lock.release()
+
+    def status(self) -> Dict[str, Any]:
+        sampler = self.sampler
+        return {
+            "sample_rate": self.sample_rate,
+            "profiled_runs": self.profiled_runs,
+            "profile_dir": str(PROFILE_DIR),
+            "sampler": {
+                "running": bool(sampler and sampler.running),
+                "samples": sampler.samples if sampler else 0,
+                "interval_ms": round(sampler.interval_seconds * 1000, 2) if sampler else None,
+                "last_file": str(self.last_sampler_file) if self.last_sampler_file else None
+            },
+            "files": sorted(path.name for path in PROFILE_DIR.glob("*")) if PROFILE_DIR.exists() else []
+        }
+
+
+# Global profiler instance
+profiler = Profiler()
+
+
+def profile_run(name: str):
+    """Profile an agent run with the worker's profiler (a no-op unless sampled)"""
+    return profiler.profile_run(name)
+
+
+__all__ = ["StackSampler", "Profiler", "profiler", "profile_run", "folded_stack"]
@@ -0,0 +1,220 @@
+"""Compact serialization for checkpoints and store records
+
+``CompactSerializer`` is a drop-in checkpoint serde. Messages - most of a
+checkpoint's bytes - are packed as positional msgpack arrays against an
+interned field table instead of full pydantic dumps, and fields left at
+their defaults are omitted:
+
+    [type code, content, id, {field index: value}]
+
+Everything else goes through LangGraph's msgpack encoding. Payloads above
+``compression_threshold`` bytes are zstd-compressed when ``zstandard`` is
+installed (the ``compression`` extra) - every node reading the checkpoints
+needs it then. Data written by the default serializer ("msgpack", "json" and,
+with ``pickle_fallback``, "pickle") still loads, so existing checkpoints
+keep working without a migration.
+"""
+from typing import Dict, Any, Optional, Tuple
+import ormsgpack
+import structlog
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+# Private helpers - LangGraph's own msgpack hooks for non-message values. They
+# are not a stable API, so langgraph-checkpoint is pinned exactly and
+# tests/test_serialization.py round-trips real checkpoints against it
+from langgraph.checkpoint.serde.jsonplus import _msgpack_default, _option
+
+from ghl_agent.config_loader import get_config
+
+logger = structlog.get_logger()
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    # Full snapshots of delta-checkpointed channels (langgraph>=1.2, private too)
+    from langgraph.checkpoint.serde.jsonplus import EXT_DELTA_SNAPSHOT
+    from langgraph.checkpoint.serde.types import _DeltaSnapshot
+except ImportError:
+    EXT_DELTA_SNAPSHOT = _DeltaSnapshot = None
+
+TYPE_COMPACT = "compact"
+TYPE_COMPACT_ZSTD = "compact+zstd"
+
+# Application ext code - LangGraph uses 0-7
+MESSAGE_EXT = 64
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+ZSTD_LEVEL = 3
+
+# Interned schema - append only, indices are persisted
+MESSAGE_TYPES = (HumanMessage, AIMessage, SystemMessage, ToolMessage)
+MESSAGE_FIELDS = (
+    "name",
+    "additional_kwargs",
+    "response_metadata",
+    "tool_calls",
+    "invalid_tool_calls",
+    "usage_metadata",
+    "tool_call_id",
+    "status",
+    "artifact"
+)
+
+_TYPE_CODES = {cls: code for code, cls in enumerate(MESSAGE_TYPES)}
+# Per message type: (field index, field name, default) for interned fields it has
+_TYPE_FIELDS = {
+    cls: tuple(
+        (index, field, cls.model_fields[field].get_default(call_default_factory=True))
+        for index, field in enumerate(MESSAGE_FIELDS)
+        if field in cls.model_fields
+    )
+    for cls in MESSAGE_TYPES
+}
+
+
+def _pack_message(message: BaseMessage) -> list:
+    cls = type(message)
+    extras = {}
+    for index, field, default in _TYPE_FIELDS[cls]:
+        value = getattr(message, field)
+        if value != default:
+            extras[index] = value
+    packed = [_TYPE_CODES[cls], message.content, message.id]
+    if extras:
+        packed.append(extras)
+    return packed
+
+
+def _unpack_message(packed: list) -> BaseMessage:
+    kwargs = {"content": packed[1], "id": packed[2]}
+    if len(packed) > 3:
+        for index, value in packed[3].items():
+            kwargs[MESSAGE_FIELDS[index]] = value
+    return MESSAGE_TYPES[packed[0]](**kwargs)
+
+
+def _default(obj: Any) -> Any:
+    # Exact classes only - chunks and custom subclasses keep the generic encoding
+    if type(obj) in _TYPE_CODES:
+        return ormsgpack.Ext(MESSAGE_EXT, _pack(_pack_message(obj)))
+    # Snapshot contents are message lists - pack them compactly too
+    if _DeltaSnapshot is not None and isinstance(obj, _DeltaSnapshot):
+        return ormsgpack.Ext(EXT_DELTA_SNAPSHOT, _pack(obj.value))
+    return _msgpack_default(obj)
+
+
+def _pack(obj: Any) -> bytes:
+    return ormsgpack.packb(obj, default=_default, option=_option)
+
+
+class CompactSerializer(JsonPlusSerializer):
+    """Checkpoint serde with interned message encoding and zstd compression
+
+    Args:
+        compression_threshold: Compress payloads larger than this many bytes,
+            None to never compress
+        pickle_fallback: Pickle values msgpack cannot encode, and load
+            legacy "pickle" payloads
+    """
+
+    def __init__(
+        self,
+        compression_threshold: Optional[int] = DEFAULT_COMPRESSION_THRESHOLD,
+        pickle_fallback: bool = False,
+        **kwargs: Any
+    ):
+        super().__init__(pickle_fallback=pickle_fallback, **kwargs)
+        self.compression_threshold = compression_threshold if zstandard is not None else None
+        self._generic_ext_hook = self._unpack_ext_hook
+        self._unpack_ext_hook = self._ext_hook
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if zstandard is not None else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == MESSAGE_EXT:
+            return _unpack_message(self._unpack(data))
+        if _DeltaSnapshot is not None and code == EXT_DELTA_SNAPSHOT:
+            return _DeltaSnapshot(self._unpack(data))
+        return self._generic_ext_hook(code, data)
+
+    def _unpack(self, data: bytes) -> Any:
+        return ormsgpack.unpackb(data, ext_hook=self._ext_hook, option=ormsgpack.OPT_NON_STR_KEYS)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if obj is None or isinstance(obj, (bytes, bytearray)):
+            return super().dumps_typed(obj)
+        try:
+            data = _pack(obj)
+        except ormsgpack.MsgpackEncodeError:
+            # Pickles when pickle_fallback is set, raises otherwise
+            return super().dumps_typed(obj)
+        if self.compression_threshold is not None and len(data) > self.compression_threshold:
+            return TYPE_COMPACT_ZSTD, self._compressor.compress(data)
+        return TYPE_COMPACT, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == TYPE_COMPACT:
+            return self._unpack(payload)
+        if type_ == TYPE_COMPACT_ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError("zstandard is required to read compressed checkpoints (the compression extra)")
+            return self._unpack(self._decompressor.decompress(payload))
+        # Legacy payloads from the default serializer
+        return super().loads_typed(data)
+
+
+_compression_warning_logged = False
+
+
+def check_compression() -> bool:
+    """Whether the configured checkpoint compression can run
+
+    Logs a warning (once per process) when ``memory.compression_threshold_bytes``
+    is set but ``zstandard`` is not installed.
+    """
+    global _compression_warning_logged
+    memory = get_config().memory
+    if memory.serializer == "jsonplus" or memory.compression_threshold_bytes is None or zstandard is not None:
+        return True
+    if not _compression_warning_logged:
+        _compression_warning_logged = True
+        logger.warning(
+            "Checkpoint compression configured but zstandard is not installed - "
+            "writing uncompressed checkpoints (pip install 'ghl-langgraph-agent[compression]')",
+            compression_threshold_bytes=memory.compression_threshold_bytes
+        )
+    return False
+
+
+def get_serializer(**kwargs: Any):
+    """Checkpoint serde selected by ``memory.serializer`` ("compact" or "jsonplus")"""
+    memory = get_config().memory
+    if memory.serializer == "jsonplus":
+        return JsonPlusSerializer(**kwargs)
+    if memory.serializer != "compact":
+        logger.warning("Unknown serializer, using compact", serializer=memory.serializer)
+    check_compression()
+    return CompactSerializer(compression_threshold=memory.compression_threshold_bytes, **kwargs)
+
+
+def compact_record(model) -> Dict[str, Any]:
+    """Store value for a pydantic record without fields left unset or at their defaults
+
+    Readers rebuild the full record with ``Model(**value)``; fields that are
+    omitted come back as their defaults.
+    """
+    return model.model_dump(mode="json", exclude_defaults=True)
+
+
+__all__ = [
+    "CompactSerializer",
+    "get_serializer",
+    "check_compression",
+    "compact_record",
+    "TYPE_COMPACT",
+    "TYPE_COMPACT_ZSTD"
+]
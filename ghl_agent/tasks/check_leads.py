@@ -1,19 +1,57 @@
 """Task for checking and processing new leads"""
 
 import asyncio
+import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Pattern, Tuple
 import structlog
 from ghl_agent.tools.ghl_tools import get_ghl_contact_info
-from ghl_agent.config_loader import get_config
+from ghl_agent.config_loader import Config, get_config, subscribe_config
 
 logger = structlog.get_logger()
 
+# (config key, triage action, label) in priority order
+TRIAGE_RULES = (
+    ("ignore", "ignored", "ignore"),
+    ("notify_human", "notify_human", "notify"),
+    ("auto_respond", "auto_respond", "auto-respond")
+)
+
+def build_triage_matchers(triage: Dict[str, Any]) -> List[Tuple[str, str, Pattern, List[str]]]:
+    """Compile each triage pattern list into a single regex
+
+    Returns:
+        (action, label, regex, configured patterns) per rule with patterns
+    """
+    matchers = []
+    for key, action, label in TRIAGE_RULES:
+        patterns = [pattern for pattern in triage.get(key, []) if pattern]
+        if patterns:
+            regex = re.compile("|".join(re.escape(pattern.lower()) for pattern in patterns))
+            matchers.append((action, label, regex, patterns))
+    return matchers
+
+# Triage matchers, built on first use and dropped when the configuration changes
+_triage_matchers: Optional[List[Tuple[str, str, Pattern, List[str]]]] = None
+
+def get_triage_matchers() -> List[Tuple[str, str, Pattern, List[str]]]:
+    """Triage matchers for the current config"""
+    global _triage_matchers
+    if _triage_matchers is None:
+        _triage_matchers = build_triage_matchers(get_config().triage)
+    return _triage_matchers
+
+def _reset_triage_matchers(config: Config):
+    """Recompile the triage patterns on next use"""
+    global _triage_matchers
+    _triage_matchers = None
+
+subscribe_config(_reset_triage_matchers)
+
 class LeadChecker:
     """Check and process new leads from various sources"""
     
     def __init__(self):
-        self.config = get_config()
         self.processed_leads = set()  # Track processed lead IDs
     
     async def check_new_leads(
@@ -109,28 +147,14 @@ class LeadChecker:
         """
         message = lead.get("message", "").lower()
         
-        # Check ignore patterns
-        for pattern in self.config.triage.get("ignore", []):
-            if pattern.lower() in message:
-                return {
-                    "action": "ignored",
-                    "reason": f"Contains ignore pattern: {pattern}"
-                }
-        
-        # Check notify patterns
-        for pattern in self.config.triage.get("notify_human", []):
-            if pattern.lower() in message:
-                return {
-                    "action": "notify_human",
-                    "reason": f"Contains notify pattern: {pattern}"
-                }
-        
-        # Check auto-respond patterns
-        for pattern in self.config.triage.get("auto_respond", []):
-            if pattern.lower() in message:
+        # Check ignore, notify and auto-respond patterns
+        for action, label, matcher, patterns in get_triage_matchers():
+            if matcher.search(message):
+                # Report the first configured pattern, as written in the config
+                pattern = next(pattern for pattern in patterns if pattern.lower() in message)
                 return {
-                    "action": "auto_respond",
-                    "reason": f"Contains auto-respond pattern: {pattern}"
+                    "action": action,
+                    "reason": f"Contains {label} pattern: {pattern}"
                 }
         
         # Default to auto-respond for battery-related queries
@@ -1,8 +1,12 @@
 """Battery calculation and consultation tools"""
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from langchain_core.tools import tool
 import structlog
 
+from ghl_agent.catalog import get_catalog
+from ghl_agent.tools.equipment_matcher import EquipmentMatcher
+from ghl_agent.config_loader import Config, get_config, subscribe_config
+
 logger = structlog.get_logger()
 
 # Equipment power consumption in watts
@@ -22,51 +26,48 @@ EQUIPMENT_CONSUMPTION = {
     "ventilador_techo": 75
 }
 
-# Battery options
-BATTERY_OPTIONS = [
-    {
-        "model": "EcoFlow DELTA 2",
-        "capacity_wh": 1024,
-        "price_range": "$999 - $1,199",
-        "best_for": "apartamento",
-        "features": ["Portátil", "Recarga por LUMA en 1.2 horas", "Múltiples salidas AC/USB"]
-    },
-    {
-        "model": "Jackery Explorer 2000 Pro",
-        "capacity_wh": 2160,
-        "price_range": "$2,199 - $2,499",
-        "best_for": "apartamento",
-        "features": ["Ultra portátil", "Carga rápida", "Panel solar opcional"]
-    },
-    {
-        "model": "BLUETTI AC200P",
-        "capacity_wh": 2000,
-        "price_range": "$1,799 - $1,999",
-        "best_for": "casa",
-        "features": ["Gran capacidad", "Múltiples opciones de carga", "Inversor potente"]
-    },
-    {
-        "model": "Goal Zero Yeti 3000X",
-        "capacity_wh": 3032,
-        "price_range": "$3,199 - $3,499",
-        "best_for": "casa",
-        "features": ["Alta capacidad", "Expansible", "Compatible con paneles solares"]
-    },
-    {
-        "model": "EcoFlow DELTA Pro",
-        "capacity_wh": 3600,
-        "price_range": "$3,599 - $3,999",
-        "best_for": "casa",
-        "features": ["Capacidad profesional", "Expandible a 25kWh", "Smart Home Ready"]
-    },
-    {
-        "model": "Anker PowerHouse 767",
-        "capacity_wh": 2048,
-        "price_range": "$1,999 - $2,299",
-        "best_for": "ambos",
-        "features": ["10 años garantía", "Carga ultra rápida", "App control"]
-    }
-]
+
+def build_equipment_matcher(config: Optional[Config] = None, stats: Optional[Dict[str, int]] = None) -> EquipmentMatcher:
+    """Matcher over the built-in table, with config consumption values and aliases on top"""
+    config = config or get_config()
+    return EquipmentMatcher.from_tables(
+        EQUIPMENT_CONSUMPTION,
+        config.equipment_consumption,
+        aliases=config.equipment_aliases,
+        stats=stats
+    )
+
+
+# Built on first lookup and rebuilt on next use after a config change
+_equipment_matcher: Optional[EquipmentMatcher] = None
+_equipment_matcher_stale = False
+
+
+def get_equipment_matcher() -> EquipmentMatcher:
+    """Get the equipment matcher for the current config
+
+    Rebuilds keep the match stats. The cache is kept too unless the
+    equipment tables or aliases changed (its results would be stale).
+    """
+    global _equipment_matcher, _equipment_matcher_stale
+    if _equipment_matcher is None:
+        _equipment_matcher = build_equipment_matcher()
+    elif _equipment_matcher_stale:
+        current = _equipment_matcher
+        rebuilt = build_equipment_matcher(stats=current.stats)
+        if (rebuilt.consumption, rebuilt.aliases) != (current.consumption, current.aliases):
+            _equipment_matcher = rebuilt
+    _equipment_matcher_stale = False
+    return _equipment_matcher
+
+
+def _reset_equipment_matcher(config: Config):
+    """Rebuild the matcher from the reloaded equipment tables on next use"""
+    global _equipment_matcher_stale
+    _equipment_matcher_stale = True
+
+
+subscribe_config(_reset_equipment_matcher)
 
 
 @tool
@@ -75,7 +76,7 @@ def calculate_battery_runtime(equipment_list: List[str], battery_capacity_wh: fl
     Calculate how long a battery will last with given equipment.
     
     Args:
-        equipment_list: List of equipment names in Spanish (e.g., ["nevera", "tv", "abanico"])
+        equipment_list: List of equipment names in Spanish (e.g., ["nevera", "2 abanicos", "aire acondicionado"])
         battery_capacity_wh: Battery capacity in watt-hours
     
     Returns:
@@ -86,18 +87,31 @@ def calculate_battery_runtime(equipment_list: List[str], battery_capacity_wh: fl
         equipment_details = []
         unknown_equipment = []
         
+        equipment_matcher = get_equipment_matcher()
         for equipment in equipment_list:
-            equipment_lower = equipment.lower().strip()
-            if equipment_lower in EQUIPMENT_CONSUMPTION:
-                watts = EQUIPMENT_CONSUMPTION[equipment_lower]
+            match = equipment_matcher.match(equipment)
+            if match and match.quantity == 0:
+                # "0 neveras" - the customer does not want it powered
+                continue
+            if match:
+                watts = match.watts * match.quantity
                 total_consumption += watts
                 equipment_details.append({
                     "name": equipment,
+                    "matched": match.key,
+                    "quantity": match.quantity,
                     "watts": watts
                 })
             else:
                 unknown_equipment.append(equipment)
         
+        if unknown_equipment:
+            logger.info(
+                "Unmatched equipment",
+                equipment=unknown_equipment,
+                hit_rate=round(equipment_matcher.hit_rate, 3)
+            )
+        
         if total_consumption > 0:
             runtime_hours = battery_capacity_wh / total_consumption
             runtime_formatted = f"{runtime_hours:.1f} horas"
@@ -143,29 +157,19 @@ def recommend_battery_system(housing_type: str, total_consumption_watts: float,
     Returns:
         Dictionary with battery recommendations
     """
+    if not total_consumption_watts > 0:
+        # Runtimes would be infinite and every product would rank the same
+        return {
+            "error": "El consumo total debe ser mayor que 0 W. Pregunta qué equipos desean energizar.",
+            "recommendations": []
+        }
     try:
-        recommendations = []
-        
         # Calculate minimum battery capacity needed for 6-8 hours
         min_capacity_6h = total_consumption_watts * 6
         min_capacity_8h = total_consumption_watts * 8
         
-        # Filter batteries based on housing type and capacity
-        for battery in BATTERY_OPTIONS:
-            if battery["best_for"] in [housing_type, "ambos"]:
-                if battery["capacity_wh"] >= min_capacity_6h:
-                    runtime = battery["capacity_wh"] / total_consumption_watts
-                    recommendations.append({
-                        "model": battery["model"],
-                        "capacity_wh": battery["capacity_wh"],
-                        "runtime_hours": round(runtime, 1),
-                        "price_range": battery["price_range"],
-                        "features": battery["features"],
-                        "suitable": runtime >= 6
-                    })
-        
-        # Sort by runtime
-        recommendations.sort(key=lambda x: x["runtime_hours"], reverse=True)
+        # Score the whole catalog: products covering 8h first, then cheapest
+        recommendations = get_catalog().sizing.recommend(housing_type, total_consumption_watts, top_k=3)
         
         # Additional recommendations based on housing type
         installation_notes = []
@@ -182,7 +186,7 @@ def recommend_battery_system(housing_type: str, total_consumption_watts: float,
             "total_consumption_watts": total_consumption_watts,
             "minimum_capacity_6h": min_capacity_6h,
             "minimum_capacity_8h": min_capacity_8h,
-            "recommendations": recommendations[:3],  # Top 3 recommendations
+            "recommendations": recommendations,  # Top 3 recommendations
             "installation_notes": installation_notes
         }
         
@@ -226,14 +230,14 @@ El cliente está interesado en recibir orientación personalizada sobre sistemas
     return message.strip()
 
 
-@tool
+@tool(response_format="content_and_artifact")
 def update_conversation_state(
     housing_type: Optional[str] = None,
     equipment_list: Optional[List[str]] = None,
     customer_name: Optional[str] = None,
     customer_phone: Optional[str] = None,
     interested_in_consultation: Optional[bool] = None
-) -> str:
+) -> Tuple[str, Dict[str, Any]]:
     """
     Update conversation state with extracted information.
     
@@ -245,24 +249,30 @@ def update_conversation_state(
         interested_in_consultation: True if customer wants consultation
         
     Returns:
-        Confirmation of what was updated
+        Confirmation of what was updated, plus the state updates as the tool artifact
     """
     updates = []
+    state_updates: Dict[str, Any] = {}
     
     if housing_type:
         updates.append(f"housing_type: {housing_type}")
+        state_updates["housing_type"] = housing_type
     if equipment_list:
         updates.append(f"equipment: {', '.join(equipment_list)}")
+        state_updates["equipment_list"] = list(equipment_list)
     if customer_name:
         updates.append(f"name: {customer_name}")
+        state_updates["customer_name"] = customer_name
     if customer_phone:
         updates.append(f"phone: {customer_phone}")
+        state_updates["customer_phone"] = customer_phone
     if interested_in_consultation is not None:
         updates.append(f"consultation: {'yes' if interested_in_consultation else 'no'}")
+        state_updates["interested_in_consultation"] = interested_in_consultation
     
     if updates:
-        return f"State updated: {'; '.join(updates)}"
-    return "No updates provided"
+        return f"State updated: {'; '.join(updates)}", state_updates
+    return "No updates provided", state_updates
 
 
 # Export all tools
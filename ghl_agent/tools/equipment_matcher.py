@@ -0,0 +1,244 @@
+"""Fast equipment name matching for consumption lookups"""
+from typing import Dict, List, Optional, Any, Mapping, Tuple, NamedTuple, Set
+from collections import OrderedDict
+import re
+import unicodedata
+import structlog
+
+from ghl_agent.metrics import record_equipment_match
+
+logger = structlog.get_logger()
+
+# Common ways customers name equipment -> consumption table key
+DEFAULT_EQUIPMENT_ALIASES = {
+    "refrigerador": "nevera",
+    "refrigeradora": "nevera",
+    "refri": "nevera",
+    "fridge": "nevera",
+    "congelador": "freezer",
+    "tv": "tv",
+    "tele": "tv",
+    "television": "tv",
+    "televisor": "tv",
+    "ventilador": "abanico",
+    "fan": "abanico",
+    "ventilador_de_techo": "ventilador_techo",
+    "abanico_de_techo": "ventilador_techo",
+    "celular": "celulares",
+    "telefono": "celulares",
+    "cargador": "celulares",
+    "cargador_de_celular": "celulares",
+    "luz": "bombilla_led",
+    "bombilla": "bombilla_led",
+    "bombillo": "bombilla_led",
+    "foco": "bombilla_led",
+    "lampara": "bombilla_led",
+    "router": "router_internet",
+    "modem": "router_internet",
+    "wifi": "router_internet",
+    "internet": "router_internet",
+    "computador": "computadora",
+    "laptop": "computadora",
+    "pc": "computadora",
+    "ordenador": "computadora",
+    "microonda": "microondas",
+    "horno_microondas": "microondas",
+    "aire": "aire_acondicionado_pequeno",
+    "aire_acondicionado": "aire_acondicionado_pequeno",
+    "ac": "aire_acondicionado_pequeno",
+    "a_c": "aire_acondicionado_pequeno",
+    "consola_de_aire": "aire_acondicionado_pequeno",
+    "lavadora_de_ropa": "lavadora",
+    "maquina_de_cafe": "cafetera",
+}
+
+# Jaccard similarity over character trigrams required for a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+# Lead the best fuzzy candidate needs over the next-best piece of equipment
+FUZZY_MARGIN = 0.1
+
+# Connecting words ignored when comparing multi-word names
+STOPWORDS = frozenset({"de", "del", "la", "el", "los", "las", "para", "con", "y"})
+
+# Distinct input strings whose matches are remembered
+CACHE_SIZE = 1024
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_QUANTITY = re.compile(r"^(\d+)\s*(?:x\s*)?(.+)$")
+
+
+def normalize_equipment_name(name: str) -> str:
+    """Lowercase, fold accents and join words with underscores ("Aire Acondicionado" -> "aire_acondicionado")"""
+    folded = unicodedata.normalize("NFKD", name.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return _NON_WORD.sub("_", folded).strip("_")
+
+
+def singularize(name: str) -> str:
+    """Strip Spanish/English plural endings from each word of a normalized name"""
+    words = []
+    for word in name.split("_"):
+        if len(word) > 4 and word.endswith("ces"):
+            word = word[:-3] + "z"  # luces -> luz
+        elif len(word) > 4 and word.endswith("es") and word[-3] in "rlndj":
+            word = word[:-2]  # televisores -> televisor
+        elif len(word) > 2 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]  # neveras -> nevera, tvs -> tv
+        words.append(word)
+    return "_".join(words)
+
+
+def _trigrams(text: str) -> frozenset:
+    padded = f"  {text.replace('_', ' ')} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _similarity(left: frozenset, right: frozenset) -> float:
+    return len(left & right) / len(left | right)
+
+
+def _content_words(name: str) -> List[str]:
+    return [word for word in name.split("_") if word and word not in STOPWORDS]
+
+
+class EquipmentMatch(NamedTuple):
+    """A resolved equipment name"""
+    key: str
+    watts: int
+    quantity: int  # 0 for an explicit "0 neveras" - callers skip the item
+    kind: str  # exact, alias, plural, fuzzy
+
+
+class EquipmentMatcher:
+    """Resolves free-text equipment names to consumption table entries
+
+    Lookups go exact key -> alias -> plural-stripped -> trigram fuzzy match,
+    and results are memoized per input string in a bounded LRU. A fuzzy match
+    must clear ``FUZZY_THRESHOLD``, lead the next-best equipment by
+    ``FUZZY_MARGIN`` and, for multi-word names, account for every word (so
+    "maquina de oxigeno" is unknown rather than a coffee maker).
+    """
+
+    def __init__(
+        self,
+        consumption: Mapping[str, int],
+        aliases: Optional[Mapping[str, str]] = None,
+        stats: Optional[Dict[str, int]] = None
+    ):
+        self.consumption: Dict[str, int] = {
+            normalize_equipment_name(key): watts for key, watts in consumption.items()
+        }
+        self.aliases: Dict[str, str] = {}
+        for alias, key in {**DEFAULT_EQUIPMENT_ALIASES, **(aliases or {})}.items():
+            key = normalize_equipment_name(key)
+            if key in self.consumption:
+                self.aliases[normalize_equipment_name(alias)] = key
+
+        # Every known spelling, including plural-stripped keys, for plural and fuzzy lookups.
+        # Table keys win over aliases with the same spelling ("televisor")
+        self._names: Dict[str, str] = dict(self.aliases)
+        self._names.update({key: key for key in self.consumption})
+        self._singular: Dict[str, str] = {singularize(name): key for name, key in self.aliases.items()}
+        self._singular.update({singularize(key): key for key in self.consumption})
+        self._trigram_index: List[Tuple[frozenset, str]] = [
+            (_trigrams(name), key) for name, key in self._names.items()
+        ]
+        # Words of every spelling of a key, for the multi-word check
+        self._key_words: Dict[str, Set[str]] = {}
+        for name, key in self._names.items():
+            self._key_words.setdefault(key, set()).update(_content_words(singularize(name)))
+        self._key_word_trigrams: Dict[str, List[frozenset]] = {
+            key: [_trigrams(word) for word in words] for key, words in self._key_words.items()
+        }
+        self._cache: "OrderedDict[str, Optional[EquipmentMatch]]" = OrderedDict()
+        # Pass a previous matcher's stats to keep counting across rebuilds
+        self.stats = stats if stats is not None else {"exact": 0, "alias": 0, "plural": 0, "fuzzy": 0, "miss": 0}
+
+    @classmethod
+    def from_tables(
+        cls,
+        *tables: Mapping[str, int],
+        aliases: Optional[Mapping[str, str]] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> "EquipmentMatcher":
+        """Build from several consumption tables, later tables overriding earlier ones"""
+        merged: Dict[str, int] = {}
+        for table in tables:
+            merged.update({normalize_equipment_name(key): watts for key, watts in table.items()})
+        return cls(merged, aliases, stats)
+
+    def _resolve(self, name: str) -> Optional[Tuple[str, str]]:
+        if name in self.consumption:
+            return name, "exact"
+        if name in self.aliases:
+            return self.aliases[name], "alias"
+        singular = singularize(name)
+        if singular in self._singular:
+            return self._singular[singular], "plural"
+
+        query = _trigrams(singular)
+        scores: Dict[str, float] = {}
+        for trigrams, key in self._trigram_index:
+            score = _similarity(query, trigrams)
+            if score > scores.get(key, 0.0):
+                scores[key] = score
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < FUZZY_THRESHOLD:
+            return None
+        best_key, best_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if best_score - runner_up < FUZZY_MARGIN or not self._covers_words(singular, best_key):
+            return None
+        return best_key, "fuzzy"
+
+    def _covers_words(self, name: str, key: str) -> bool:
+        """Whether every content word of a multi-word name is (nearly) a word of the key's spellings"""
+        words = _content_words(name)
+        if len(words) < 2:
+            return True
+        for word in words:
+            if word in self._key_words[key]:
+                continue
+            trigrams = _trigrams(word)
+            if not any(_similarity(trigrams, known) >= FUZZY_THRESHOLD for known in self._key_word_trigrams[key]):
+                return False
+        return True
+
+    def match(self, equipment: str) -> Optional[EquipmentMatch]:
+        """Resolve an equipment name like "2 neveras" or "aire acondicionado" """
+        if equipment in self._cache:
+            self._cache.move_to_end(equipment)
+            result = self._cache[equipment]
+        else:
+            text = equipment.strip().lower()
+            quantity = 1
+            quantity_match = _QUANTITY.match(text)
+            if quantity_match:
+                quantity, text = int(quantity_match.group(1)), quantity_match.group(2)
+            resolved = self._resolve(normalize_equipment_name(text))
+            result = None
+            if resolved:
+                key, kind = resolved
+                result = EquipmentMatch(key, self.consumption[key], quantity, kind)
+            self._cache[equipment] = result
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+        kind = result.kind if result else "miss"
+        self.stats[kind] += 1
+        record_equipment_match(kind)
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that resolved to a known piece of equipment"""
+        total = sum(self.stats.values())
+        return (total - self.stats["miss"]) / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Match counters and hit rate"""
+        return {**self.stats, "hit_rate": self.hit_rate}
+
+
+__all__ = ["EquipmentMatcher", "EquipmentMatch", "normalize_equipment_name", "singularize"]
@@ -1,5 +1,8 @@
+import asyncio
 import httpx
 from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
@@ -8,14 +11,50 @@ from tenacity import retry, stop_after_attempt, wait_exponential, RetryError
 import os
 
 from ghl_agent.config import settings
+from ghl_agent.metrics import track_ghl_request
+from ghl_agent.tracing import span
 
 logger = structlog.get_logger()
 
+# Path segments that belong to GHL routes - any other segment is an id
+GHL_ROUTE_SEGMENTS = {"contacts", "conversations", "messages", "calendars", "free-slots", "appointments"}
+
+
+def endpoint_template(endpoint: str) -> str:
+    """Route of a request path with ids replaced, e.g. ``/contacts/{id}``"""
+    return "/" + "/".join(
+        segment if segment in GHL_ROUTE_SEGMENTS else "{id}"
+        for segment in endpoint.strip("/").split("/")
+    )
+
+
+# HTTP client for the current context only (warm-up dry runs against a fake GHL)
+_http_client_override: ContextVar[Optional[httpx.AsyncClient]] = ContextVar("ghl_http_client", default=None)
+
+
+@contextmanager
+def use_http_client(http_client: httpx.AsyncClient):
+    """Send GHL requests made inside the block through ``http_client``
+
+    Other requests keep using the pooled client. The caller owns and closes
+    ``http_client``.
+    """
+    token = _http_client_override.set(http_client)
+    try:
+        yield http_client
+    finally:
+        _http_client_override.reset(token)
+
 
 class GHLClient:
-    """Client for GoHighLevel API operations"""
+    """Client for GoHighLevel API operations
+    
+    Requests share one pooled ``httpx.AsyncClient`` so TLS connections are
+    reused. ``transport`` replaces the network (e.g. ``httpx.MockTransport``
+    for local stand-ins).
+    """
     
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.base_url = settings.ghl_api_base_url
         self.headers = {
             "Authorization": f"Bearer {settings.ghl_api_key}",
@@ -23,6 +62,57 @@ class GHLClient:
             "Version": "2021-07-28"
         }
         self.location_id = settings.ghl_location_id
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Clients replaced by use_transport, closed by the next aclose()
+        self._retired: List[httpx.AsyncClient] = []
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client for the running event loop"""
+        override = _http_client_override.get()
+        if override is not None:
+            return override
+        loop = asyncio.get_running_loop()
+        # Pooled connections belong to the loop that opened them
+        if self._client is None or self._client_loop is not loop:
+            # Use longer timeout in deployment environment
+            is_deployment = bool(os.getenv("LANGGRAPH_AUTH_TYPE"))
+            timeout_seconds = float(os.getenv("GHL_TIMEOUT_SECONDS", "60" if is_deployment else "30"))
+            self._client = httpx.AsyncClient(
+                timeout=timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("GHL_MAX_CONNECTIONS", "20")),
+                    max_keepalive_connections=int(os.getenv("GHL_MAX_KEEPALIVE_CONNECTIONS", "10"))
+                ),
+                transport=self.transport
+            )
+            self._client_loop = loop
+        return self._client
+    
+    def use_transport(self, transport: Optional[httpx.AsyncBaseTransport]):
+        """Route requests through another transport (None restores the network)"""
+        self.transport = transport
+        if self._client is not None and self._client_loop is not None and not self._client_loop.is_closed():
+            self._retired.append(self._client)
+        self._client = None
+        self._client_loop = None
+    
+    async def warm_up(self):
+        """Open a pooled connection to the API host ahead of the first request"""
+        response = await self.client.head(self.base_url)
+        logger.info("GHL connection warmed up", status=response.status_code)
+    
+    async def aclose(self):
+        """Close pooled connections, including clients replaced by use_transport"""
+        retired, self._retired = self._retired, []
+        for retired_client in retired:
+            await retired_client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
     
     @retry(
         stop=stop_after_attempt(int(os.getenv("GHL_RETRY_ATTEMPTS", "3"))),
@@ -30,17 +120,16 @@ class GHLClient:
     )
     async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Make HTTP request to GHL API with retry logic"""
-        # Use longer timeout in deployment environment
-        is_deployment = bool(os.getenv("LANGGRAPH_AUTH_TYPE"))
-        timeout_seconds = float(os.getenv("GHL_TIMEOUT_SECONDS", "60" if is_deployment else "30"))
-        
-        async with httpx.AsyncClient(timeout=timeout_seconds) as client:
-            response = await client.request(
+        route = endpoint_template(endpoint)
+        with span(f"ghl {method} {route}", **{"http.request.method": method, "ghl.endpoint": route}) as request_span, \
+                track_ghl_request(method, route):
+            response = await self.client.request(
                 method=method,
                 url=f"{self.base_url}{endpoint}",
                 headers=self.headers,
                 **kwargs
             )
+            request_span.set_attribute("http.response.status_code", response.status_code)
             
             # Log the response for debugging
             if response.status_code >= 400:
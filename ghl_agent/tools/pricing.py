@@ -0,0 +1,92 @@
+"""Tier and price-point lookups backed by bisect, with NumPy batch variants"""
+from typing import Dict, Any, Sequence, Tuple
+from bisect import bisect_right
+import numpy as np
+
+
+class TierTable:
+    """Step function over sorted lower bounds
+
+    A value belongs to the tier with the greatest lower bound <= value; values
+    below the first bound get ``below``. The last tier is open-ended.
+    """
+
+    def __init__(self, lower_bounds: Sequence[float], values: Sequence[float], below: float = 0.0):
+        pairs = sorted(zip(lower_bounds, values))
+        self.lower_bounds: Tuple[float, ...] = tuple(float(bound) for bound, _ in pairs)
+        self.values: Tuple[float, ...] = tuple(float(value) for _, value in pairs)
+        self.below = float(below)
+        self._bounds_array = np.array(self.lower_bounds)
+        # Index 0 holds the "below" value so searchsorted results index directly
+        self._values_array = np.array((self.below,) + self.values)
+
+    @classmethod
+    def from_tiers(cls, tiers: Sequence[Dict[str, Any]], min_key: str = "min", value_key: str = "value", below: float = 0.0) -> "TierTable":
+        """Build from a list of tier dicts, e.g. the catalog's ``commission_structure`` section"""
+        return cls([tier[min_key] for tier in tiers], [tier[value_key] for tier in tiers], below)
+
+    def lookup(self, value: float) -> float:
+        """Tier value for a single input"""
+        index = bisect_right(self.lower_bounds, value)
+        return self.values[index - 1] if index else self.below
+
+    def lookup_batch(self, values: Sequence[float]) -> np.ndarray:
+        """Tier values for many inputs in one pass"""
+        indices = np.searchsorted(self._bounds_array, np.asarray(values, dtype=float), side="right")
+        return self._values_array[indices]
+
+
+class PricePoints:
+    """Sparse price points (e.g. panel count -> installed price)
+
+    Lookups between known points interpolate linearly or snap to the nearest
+    point. Below the first point the minimum price applies; above the last
+    point the final per-unit rate is extrapolated.
+    """
+
+    def __init__(self, points: Dict[float, float]):
+        if not points:
+            raise ValueError("PricePoints needs at least one price point")
+        keys = sorted(points)
+        self.keys: Tuple[float, ...] = tuple(float(key) for key in keys)
+        self.prices: Tuple[float, ...] = tuple(float(points[key]) for key in keys)
+        if len(keys) > 1:
+            self.tail_rate = (self.prices[-1] - self.prices[-2]) / (self.keys[-1] - self.keys[-2])
+        else:
+            self.tail_rate = 0.0
+
+    def _extrapolate(self, key: float) -> float:
+        return self.prices[-1] + (key - self.keys[-1]) * self.tail_rate
+
+    def lookup(self, key: float, mode: str = "interpolate") -> float:
+        """Price for a single key ("interpolate" or "nearest")"""
+        if key <= self.keys[0]:
+            return self.prices[0]
+        if key >= self.keys[-1]:
+            return self._extrapolate(key)
+        index = bisect_right(self.keys, key)
+        low_key, high_key = self.keys[index - 1], self.keys[index]
+        low_price, high_price = self.prices[index - 1], self.prices[index]
+        if mode == "nearest":
+            return low_price if key - low_key <= high_key - key else high_price
+        return low_price + (key - low_key) / (high_key - low_key) * (high_price - low_price)
+
+    def lookup_batch(self, keys: Sequence[float], mode: str = "interpolate") -> np.ndarray:
+        """Prices for many keys in one pass"""
+        keys = np.asarray(keys, dtype=float)
+        known_keys = np.array(self.keys)
+        known_prices = np.array(self.prices)
+        if len(known_keys) == 1:
+            return np.full(keys.shape, known_prices[0])
+        if mode == "nearest":
+            upper = np.clip(np.searchsorted(known_keys, keys), 1, len(known_keys) - 1)
+            lower = upper - 1
+            use_lower = (keys - known_keys[lower]) <= (known_keys[upper] - keys)
+            prices = np.where(use_lower, known_prices[lower], known_prices[upper])
+        else:
+            prices = np.interp(keys, known_keys, known_prices)
+        prices = np.where(keys <= known_keys[0], known_prices[0], prices)
+        return np.where(keys >= known_keys[-1], known_prices[-1] + (keys - known_keys[-1]) * self.tail_rate, prices)
+
+
+__all__ = ["TierTable", "PricePoints"]
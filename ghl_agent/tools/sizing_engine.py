@@ -0,0 +1,152 @@
+"""Vectorized battery sizing over the full product catalog"""
+from typing import Dict, List, Optional, Any, Mapping, Sequence
+import re
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+HOUSING_TYPES = ("casa", "apartamento")
+
+# Outage windows the recommendations are sized for
+MIN_COVERAGE_HOURS = 6
+TARGET_COVERAGE_HOURS = 8
+
+_PRICE_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Parse prices like 999, "$12,999.00" or "$999 - $1,199" (lower bound) into floats"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = _PRICE_NUMBER.search(value)
+    if not match:
+        return None
+    return float(match.group().replace(",", ""))
+
+
+class SizingEngine:
+    """Scores every catalog product against consumption in one NumPy pass
+
+    Products are mappings with ``name``, ``capacity_wh``, ``best_for`` and
+    ``price`` (number or price string); ``price_range`` and ``features`` are
+    passed through to results when present.
+    """
+
+    def __init__(self, products: Sequence[Mapping[str, Any]]):
+        self.products = tuple(products)
+        self.capacity_wh = np.array([float(p["capacity_wh"]) for p in self.products])
+        prices = [parse_price(p.get("price", p.get("price_range"))) for p in self.products]
+        self.price = np.array([np.nan if price is None else price for price in prices])
+        self.price_per_wh = self.price / self.capacity_wh
+
+        best_for = np.array([p.get("best_for", "ambos") for p in self.products])
+        self.housing_masks = {
+            housing: (best_for == housing) | (best_for == "ambos")
+            for housing in HOUSING_TYPES
+        }
+        self._all_products = np.ones(len(self.products), dtype=bool)
+
+        # Cheapest first (unknown prices last), bigger battery breaks ties
+        order = np.lexsort((-self.capacity_wh, np.nan_to_num(self.price, nan=np.inf)))
+        self.price_rank = np.empty(len(self.products), dtype=np.int64)
+        self.price_rank[order] = np.arange(len(self.products))
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _housing_mask(self, housing_type: Optional[str]) -> np.ndarray:
+        return self.housing_masks.get(housing_type, self._all_products)
+
+    def score(self, consumption_watts: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Runtime and coverage gaps for every (lead, product) pair
+
+        Returns:
+            Arrays of shape (leads, products): ``runtime_hours``,
+            ``gap_6h_wh`` and ``gap_8h_wh`` (missing Wh, 0 when covered)
+        """
+        watts = np.asarray(consumption_watts, dtype=float).reshape(-1, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            runtime = np.where(watts > 0, self.capacity_wh / watts, np.inf)
+        return {
+            "runtime_hours": runtime,
+            "gap_6h_wh": np.maximum(0.0, watts * MIN_COVERAGE_HOURS - self.capacity_wh),
+            "gap_8h_wh": np.maximum(0.0, watts * TARGET_COVERAGE_HOURS - self.capacity_wh)
+        }
+
+    def rank_batch(
+        self,
+        housing_types: Sequence[Optional[str]],
+        consumption_watts: Sequence[float],
+        top_k: int = 3
+    ) -> np.ndarray:
+        """Rank products for many leads at once
+
+        Products must fit the housing type and cover the 6h window. Those that
+        also cover 8h come first, then cheapest first.
+
+        Returns:
+            Product indices of shape (leads, top_k), -1 where fewer products qualify
+        """
+        return self._rank(self.score(consumption_watts), housing_types, top_k)
+
+    def _rank(self, scores: Dict[str, np.ndarray], housing_types: Sequence[Optional[str]], top_k: int) -> np.ndarray:
+        housing = np.array(
+            [self._housing_mask(h) for h in housing_types], dtype=bool
+        ).reshape(len(housing_types), len(self.products))
+        eligible = housing & (scores["gap_6h_wh"] == 0)
+        covers_target = scores["gap_8h_wh"] == 0
+
+        n_products = len(self.products)
+        sort_key = (~eligible) * (2 * n_products) + (~covers_target) * n_products + self.price_rank
+        ranked = np.argsort(sort_key, axis=1, kind="stable")[:, :top_k]
+        ranked_eligible = np.take_along_axis(eligible, ranked, axis=1)
+        return np.where(ranked_eligible, ranked, -1)
+
+    def _result(self, index: int, runtime: float, gap_6h: float, gap_8h: float) -> Dict[str, Any]:
+        product = self.products[index]
+        price = self.price[index]
+        return {
+            "model": product.get("name") or product.get("model"),
+            "capacity_wh": product["capacity_wh"],
+            # No load means no meaningful runtime (and inf is not valid JSON)
+            "runtime_hours": round(float(runtime), 1) if np.isfinite(runtime) else None,
+            "price_range": product.get("price_range") or product.get("price"),
+            "price": None if np.isnan(price) else float(price),
+            "price_per_wh": None if np.isnan(price) else round(float(self.price_per_wh[index]), 3),
+            "coverage_gap_6h_wh": float(gap_6h),
+            "coverage_gap_8h_wh": float(gap_8h),
+            "features": list(product.get("features", [])),
+            "suitable": bool(runtime >= MIN_COVERAGE_HOURS)
+        }
+
+    def recommend_batch(
+        self,
+        housing_types: Sequence[Optional[str]],
+        consumption_watts: Sequence[float],
+        top_k: int = 3
+    ) -> List[List[Dict[str, Any]]]:
+        """Ranked recommendations for many leads (e.g. nightly re-scoring)"""
+        scores = self.score(consumption_watts)
+        ranked = self._rank(scores, housing_types, top_k)
+        results = []
+        for row, indices in enumerate(ranked):
+            results.append([
+                self._result(
+                    index,
+                    scores["runtime_hours"][row, index],
+                    scores["gap_6h_wh"][row, index],
+                    scores["gap_8h_wh"][row, index]
+                )
+                for index in indices if index >= 0
+            ])
+        return results
+
+    def recommend(self, housing_type: Optional[str], consumption_watts: float, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Ranked recommendations for a single lead"""
+        return self.recommend_batch([housing_type], [consumption_watts], top_k)[0]
+
+
+__all__ = ["SizingEngine", "parse_price", "MIN_COVERAGE_HOURS", "TARGET_COVERAGE_HOURS"]
@@ -0,0 +1,162 @@
+"""OpenTelemetry tracing from the webhook through graph nodes, tools, LLM and GHL calls
+
+Configured from the environment:
+    TRACING_EXPORTER       "otlp", "file" or "none" (default)
+    TRACING_FILE           JSON-lines output for the file exporter (default traces.jsonl)
+    TRACING_SAMPLE_RATIO   Share of new traces to record, 0.0-1.0 (default 1.0)
+
+The OTLP exporter reads the standard ``OTEL_EXPORTER_OTLP_*`` variables and
+``OTEL_SERVICE_NAME`` names the service. Requires ``opentelemetry-sdk`` (and
+``opentelemetry-exporter-otlp-proto-http`` for OTLP); without them, or with
+the exporter set to "none", ``span`` returns a shared no-op.
+"""
+from typing import Any, Optional, Mapping
+from contextlib import nullcontext
+from functools import wraps
+import asyncio
+import os
+import structlog
+
+logger = structlog.get_logger()
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+
+SERVICE_NAME = "ghl-agent"
+
+
+class _NoopSpan:
+    """Stand-in for a span when tracing is off"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN_CONTEXT = nullcontext(_NoopSpan())
+
+# Set up on first use; None after setup means tracing is off
+_tracer = None
+_provider = None
+_configured = False
+
+
+def _build_exporter():
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if TRACING_EXPORTER == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        # One span per line so the file can be tailed and grepped
+        return ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    raise ValueError(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}")
+
+
+def setup_tracing():
+    """Install the tracer provider and exporter (once)
+
+    Returns:
+        The tracer, or None when tracing is off
+    """
+    global _tracer, _provider, _configured
+    if _configured:
+        return _tracer
+    _configured = True
+    if TRACING_EXPORTER == "none":
+        return None
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        # Upstream sampling decisions (traceparent) win; new traces are sampled by ratio
+        _provider = TracerProvider(
+            resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", SERVICE_NAME)}),
+            sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO))
+        )
+        _provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+        trace.set_tracer_provider(_provider)
+        _tracer = trace.get_tracer("ghl_agent")
+        logger.info("Tracing enabled", exporter=TRACING_EXPORTER, sample_ratio=TRACING_SAMPLE_RATIO)
+    except Exception as e:
+        # Missing SDK/exporter packages or a bad exporter setting - run without traces
+        logger.warning("Tracing disabled", exporter=TRACING_EXPORTER, error=str(e))
+        _tracer = None
+    return _tracer
+
+
+def shutdown_tracing():
+    """Flush pending spans (at shutdown)"""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def span(name: str, context: Optional[Any] = None, **attributes: Any):
+    """Start a span as the current span for the block
+
+    Args:
+        name: Span name
+        context: Parent context (e.g. from ``extract_context``), defaults to the current one
+        **attributes: Span attributes - None values are dropped
+
+    Exceptions leaving the block are recorded on the span.
+    """
+    tracer = _tracer if _configured else setup_tracing()
+    if tracer is None:
+        return _NOOP_SPAN_CONTEXT
+    return tracer.start_as_current_span(
+        name,
+        context=context,
+        attributes={key: value for key, value in attributes.items() if value is not None}
+    )
+
+
+def mark_error(current_span, description: str):
+    """Mark a span failed for errors that are handled instead of raised"""
+    if current_span.is_recording():
+        from opentelemetry.trace import Status, StatusCode
+        current_span.set_status(Status(StatusCode.ERROR, description))
+
+
+def extract_context(headers: Mapping[str, str]):
+    """Parent context from incoming W3C ``traceparent`` headers, if tracing is on"""
+    if (_tracer if _configured else setup_tracing()) is None:
+        return None
+    from opentelemetry.propagate import extract
+    return extract(headers)
+
+
+def trace_node(name: str, node):
+    """Wrap a graph node so each run gets a span"""
+    if TRACING_EXPORTER == "none":
+        return node
+
+    if asyncio.iscoroutinefunction(node):
+        @wraps(node)
+        async def traced_node(state, *args, **kwargs):
+            with span(f"node.{name}", stage=state.get("conversation_stage")) as current:
+                result = await node(state, *args, **kwargs)
+                if isinstance(result, dict) and result.get("error"):
+                    mark_error(current, str(result["error"]))
+                return result
+    else:
+        @wraps(node)
+        def traced_node(state, *args, **kwargs):
+            with span(f"node.{name}", stage=state.get("conversation_stage")) as current:
+                result = node(state, *args, **kwargs)
+                if isinstance(result, dict) and result.get("error"):
+                    mark_error(current, str(result["error"]))
+                return result
+    return traced_node
+
+
+__all__ = ["setup_tracing", "shutdown_tracing", "span", "mark_error", "extract_context", "trace_node"]
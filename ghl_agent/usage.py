@@ -0,0 +1,359 @@
+"""Token and cost accounting per tenant, day, contact, stage and model
+
+LLM calls made inside a ``usage_scope`` are attributed to its tenant (GHL
+location id), contact and conversation stage. Counters are aggregated in
+memory and flushed to the store as one compact item per
+(tenant, day, contact, stage, model):
+
+    namespace ("usage", tenant, "2025-01-15"), key "contact|stage|model"
+    value {"contact_id", "stage", "model",
+           "input_tokens", "output_tokens", "cached_tokens", "calls", "cost_usd"}
+
+Key parts are percent-encoded, so a "|" in an id cannot shift fields;
+readers take contact, stage and model from the value.
+
+Daily totals also drive budgets: over-budget contacts are downgraded to the
+fast tier and over-budget tenants get template replies.
+"""
+from typing import Dict, Any, List, Optional, NamedTuple, Tuple
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+import asyncio
+import os
+import threading
+import structlog
+from langgraph.store.base import GetOp, PutOp
+
+from ghl_agent.config_loader import get_config, ModelTierConfig
+from ghl_agent.metrics import record_llm_cost, track_store
+
+logger = structlog.get_logger()
+
+USAGE_NAMESPACE = "usage"
+COUNTER_FIELDS = ("input_tokens", "output_tokens", "cached_tokens", "calls", "cost_usd")
+# Items read per store search when loading a tenant's day
+MAX_DAY_ITEMS = 10000
+
+BUDGET_DOWNGRADE = "downgrade"
+BUDGET_TEMPLATE = "template"
+
+
+class UsageScope(NamedTuple):
+    tenant: str
+    contact_id: str
+    stage: str
+
+
+_scope: ContextVar[Optional[UsageScope]] = ContextVar("usage_scope", default=None)
+_suppressed: ContextVar[bool] = ContextVar("usage_suppressed", default=False)
+
+
+def default_tenant() -> str:
+    return get_config().usage.default_tenant or os.getenv("GHL_LOCATION_ID") or "default"
+
+
+@contextmanager
+def usage_scope(tenant: Optional[str], contact_id: str, stage: Optional[str]):
+    """Attribute LLM usage in the block to a tenant, contact and stage"""
+    token = _scope.set(UsageScope(tenant or default_tenant(), contact_id or "unknown", stage or "unknown"))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+@contextmanager
+def suppressed_usage():
+    """Do not account LLM usage in the block (e.g. warm-up dry runs)"""
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def usage_day(now: Optional[datetime] = None) -> str:
+    """Accounting day in the business timezone (UTC if unknown)"""
+    now = now or datetime.now(timezone.utc)
+    try:
+        from zoneinfo import ZoneInfo
+        now = now.astimezone(ZoneInfo(get_config().business.timezone))
+    except Exception:
+        pass
+    return now.date().isoformat()
+
+
+def price_for(model: str) -> Optional[ModelTierConfig]:
+    """Tier settings (with prices) for a model name"""
+    for tier_config in get_config().models.tiers.values():
+        if tier_config.name == model:
+            return tier_config
+    return None
+
+
+def usage_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """USD cost of a call - cached prompt tokens use the cached input price"""
+    prices = price_for(model)
+    if prices is None:
+        return 0.0
+    cached_price = prices.input_cost_per_1k if prices.cached_input_cost_per_1k is None else prices.cached_input_cost_per_1k
+    return (
+        (input_tokens - cached_tokens) / 1000 * prices.input_cost_per_1k +
+        cached_tokens / 1000 * cached_price +
+        output_tokens / 1000 * prices.output_cost_per_1k
+    )
+
+
+class CounterKey(NamedTuple):
+    tenant: str
+    day: str
+    contact_id: str
+    stage: str
+    model: str
+
+
+def _item_key(key: CounterKey) -> str:
+    """Store key of a counter item - percent-encoded parts joined by "|" """
+    return "|".join(quote(part, safe="") for part in (key.contact_id, key.stage, key.model))
+
+
+def _item_fields(item) -> Tuple[str, str, str]:
+    """(contact_id, stage, model) of a stored counter item"""
+    if "contact_id" in item.value:
+        return item.value["contact_id"], item.value["stage"], item.value["model"]
+    # Items written before the fields were stored
+    contact_id, stage, model = (unquote(part) for part in item.key.split("|", 2))
+    return contact_id, stage, model
+
+
+def _empty_counters() -> Dict[str, float]:
+    return dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def _add(target: Dict[str, float], delta: Dict[str, float]):
+    for field in COUNTER_FIELDS:
+        target[field] = target.get(field, 0) + delta.get(field, 0)
+
+
+class UsageLedger:
+    """In-memory usage counters with periodic flushes to the store
+
+    ``record`` only touches memory. Store reads and writes are async and
+    serialized with each other, so a tenant's day is seeded from a store
+    state that matches the pending counters.
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        # Guards the in-memory counters only - never held across store I/O
+        self._lock = threading.Lock()
+        # Serializes flushes and day seeding (created per event loop)
+        self._io_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Periodic flush task, started on first use in processes without the app lifespan
+        self._flusher: Optional[asyncio.Task] = None
+        # Counters not yet written to the store
+        self._pending: Dict[CounterKey, Dict[str, float]] = defaultdict(_empty_counters)
+        # (tenant, day) -> {"cost_usd": float, "contact_tokens": {contact: tokens}} for budget checks
+        self._totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    async def get_store(self):
+        """The app's store, with non-blocking async methods"""
+        if self._store is None:
+            from ghl_agent.agent.checkpointing import get_async_checkpointer_with_store
+            _, self._store = await get_async_checkpointer_with_store()
+        return self._store
+
+    async def open(self):
+        """Resolve the store up front (at startup) instead of on the first turn"""
+        try:
+            await self.get_store()
+        except Exception as e:
+            # Retried on the first flush or budget check
+            logger.warning("Usage store unavailable", error=str(e))
+
+    def _ensure_loop_primitives(self) -> asyncio.Lock:
+        """(Re)create asyncio primitives when used from a new event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._io_lock = asyncio.Lock()
+        return self._io_lock
+
+    async def _day_totals(self, tenant: str, day: str) -> Dict[str, Any]:
+        """Budget totals for a tenant's day, seeded from the store on first use"""
+        totals = self._totals.get((tenant, day))
+        if totals is not None:
+            return totals
+        async with self._ensure_loop_primitives():
+            totals = self._totals.get((tenant, day))
+            if totals is not None:
+                return totals
+            seeded = {"cost_usd": 0.0, "contact_tokens": defaultdict(int)}
+            try:
+                store = await self.get_store()
+                for item in await store.asearch((USAGE_NAMESPACE, tenant, day), limit=MAX_DAY_ITEMS):
+                    contact_id = _item_fields(item)[0]
+                    seeded["cost_usd"] += item.value.get("cost_usd", 0.0)
+                    seeded["contact_tokens"][contact_id] += item.value.get("input_tokens", 0) + item.value.get("output_tokens", 0)
+            except Exception as e:
+                logger.warning("Failed to load usage totals", tenant=tenant, day=day, error=str(e))
+            with self._lock:
+                # No flush runs while seeding: unflushed counters are not in the store yet
+                for key, counters in self._pending.items():
+                    if (key.tenant, key.day) == (tenant, day):
+                        seeded["cost_usd"] += counters["cost_usd"]
+                        seeded["contact_tokens"][key.contact_id] += counters["input_tokens"] + counters["output_tokens"]
+                # Only the current day is needed for budgets
+                self._totals = {key: value for key, value in self._totals.items() if key[1] == day}
+                self._totals[(tenant, day)] = seeded
+            return seeded
+
+    def start_flusher(self) -> Optional[asyncio.Task]:
+        """Start the periodic flush in the running event loop unless it is already running there
+
+        Called by the app lifespan, and on first use wherever the ledger is
+        used without it (e.g. the LangGraph server, which only loads the graph).
+
+        Returns:
+            The flush task, None outside an event loop
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self.run_flusher())
+        return self._flusher
+
+    def record(self, model: str, usage: Optional[Dict[str, Any]], scope: Optional[UsageScope] = None):
+        """Account a response's ``usage_metadata`` to the current usage scope"""
+        scope = scope or _scope.get()
+        if not usage or scope is None or _suppressed.get() or not get_config().usage.enabled:
+            return
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        cost = usage_cost(model, input_tokens, output_tokens, cached_tokens)
+        day = usage_day()
+
+        with self._lock:
+            _add(self._pending[CounterKey(scope.tenant, day, scope.contact_id, scope.stage, model)], {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cached_tokens": cached_tokens,
+                "calls": 1,
+                "cost_usd": cost
+            })
+            # Days not seeded yet pick the counters up from _pending when they are
+            totals = self._totals.get((scope.tenant, day))
+            if totals is not None:
+                totals["cost_usd"] += cost
+                totals["contact_tokens"][scope.contact_id] += input_tokens + output_tokens
+        record_llm_cost(model, scope.stage, cost, cached_tokens)
+        self.start_flusher()
+
+    async def flush(self) -> int:
+        """Merge pending counters into the store
+
+        Returns:
+            Number of store items written
+        """
+        async with self._ensure_loop_primitives():
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(_empty_counters)
+            if not pending:
+                return 0
+            keys = list(pending)
+            try:
+                store = await self.get_store()
+                # One batch of reads and one of writes - a single transaction each on SQL stores
+                gets = [GetOp((USAGE_NAMESPACE, key.tenant, key.day), _item_key(key)) for key in keys]
+                with track_store("get", *(get.namespace for get in gets)):
+                    items = await store.abatch(gets)
+                puts = []
+                for key, get, item in zip(keys, gets, items):
+                    counters = dict(item.value) if item else _empty_counters()
+                    _add(counters, pending[key])
+                    counters.update(contact_id=key.contact_id, stage=key.stage, model=key.model)
+                    puts.append(PutOp(get.namespace, get.key, counters))
+                with track_store("put", *(put.namespace for put in puts)):
+                    await store.abatch(puts)
+            except Exception as e:
+                # Keep the deltas for the next flush
+                logger.error("Failed to flush usage", items=len(keys), error=str(e))
+                with self._lock:
+                    for counter_key, delta in pending.items():
+                        _add(self._pending[counter_key], delta)
+                return 0
+            return len(puts)
+
+    async def run_flusher(self, interval: Optional[float] = None):
+        """Flush periodically until cancelled"""
+        while True:
+            await asyncio.sleep(interval or get_config().usage.flush_interval_seconds)
+            await self.flush()
+
+    async def budget_action(self, tenant: Optional[str], contact_id: str) -> Optional[str]:
+        """Budget response for a contact's next turn: None, downgrade or template"""
+        usage_config = get_config().usage
+        budgets = usage_config.budgets
+        if not usage_config.enabled:
+            return None
+        self.start_flusher()
+        if budgets.tenant_daily_cost_usd is None and budgets.contact_daily_tokens is None:
+            return None
+        totals = await self._day_totals(tenant or default_tenant(), usage_day())
+        with self._lock:
+            if budgets.tenant_daily_cost_usd is not None and totals["cost_usd"] >= budgets.tenant_daily_cost_usd:
+                return BUDGET_TEMPLATE
+            if budgets.contact_daily_tokens is not None and totals["contact_tokens"][contact_id] >= budgets.contact_daily_tokens:
+                return BUDGET_DOWNGRADE
+        return None
+
+    async def report(self, tenant: Optional[str] = None, day: Optional[str] = None, contact_id: Optional[str] = None) -> Dict[str, Any]:
+        """Usage for a tenant's day, broken down by contact, stage and model"""
+        tenant = tenant or default_tenant()
+        day = day or usage_day()
+        await self.flush()
+
+        store = await self.get_store()
+        rows: List[Dict[str, Any]] = []
+        for item in await store.asearch((USAGE_NAMESPACE, tenant, day), limit=MAX_DAY_ITEMS):
+            row_contact, stage, model = _item_fields(item)
+            if contact_id and row_contact != contact_id:
+                continue
+            rows.append({**item.value, "contact_id": row_contact, "stage": stage, "model": model})
+
+        totals = _empty_counters()
+        breakdowns = {"by_contact": {}, "by_stage": {}, "by_model": {}}
+        for row in rows:
+            _add(totals, row)
+            for breakdown, field in (("by_contact", "contact_id"), ("by_stage", "stage"), ("by_model", "model")):
+                _add(breakdowns[breakdown].setdefault(row[field], _empty_counters()), row)
+        return {"tenant": tenant, "day": day, "totals": totals, **breakdowns, "rows": rows}
+
+
+# Global usage ledger
+usage_ledger = UsageLedger()
+
+
+def record_usage(model: str, usage: Optional[Dict[str, Any]]):
+    """Account an LLM response to the current usage scope (no-op outside one)"""
+    usage_ledger.record(model, usage)
+
+
+__all__ = [
+    "BUDGET_DOWNGRADE",
+    "BUDGET_TEMPLATE",
+    "UsageLedger",
+    "usage_ledger",
+    "usage_scope",
+    "suppressed_usage",
+    "record_usage",
+    "usage_cost",
+    "usage_day"
+]
@@ -0,0 +1,175 @@
+"""Optional startup warm-up so the first webhook does not pay for cold caches
+
+Enabled with ``WARMUP_ON_STARTUP=true``. Steps run in order and a failing step
+is logged and skipped - warm-up never blocks a worker from becoming ready.
+Until it finishes, ``/health``, ``/webhook/ghl`` and ``/agent/stream`` answer 503.
+"""
+from typing import Dict, Any, List, Optional, Callable
+import asyncio
+import os
+import sys
+import time
+import structlog
+
+logger = structlog.get_logger()
+
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+# Run one scripted conversation turn through the graph against local stand-ins
+WARMUP_DRY_RUN = os.getenv("WARMUP_DRY_RUN", "true").lower() == "true"
+
+DRY_RUN_MESSAGE = "Hola, vivo en casa y quiero energizar la nevera y el tv"
+
+
+class WarmupStatus:
+    """Progress of the warm-up phase, reported by ``/health``"""
+
+    def __init__(self):
+        # Workers that skip warm-up are ready immediately
+        self.ready = True
+        self.started_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def begin(self):
+        self.ready = False
+        self.started_at = time.perf_counter()
+        self.steps = {}
+
+    def record(self, step: str, duration_ms: float, error: Optional[str] = None):
+        self.steps[step] = {"duration_ms": round(duration_ms, 2), "ok": error is None}
+        if error:
+            self.steps[step]["error"] = error
+
+    def finish(self):
+        self.ready = True
+
+    def snapshot(self) -> Dict[str, Any]:
+        total_ms = None
+        if self.started_at is not None:
+            total_ms = round(sum(step["duration_ms"] for step in self.steps.values()), 2)
+        return {"ready": self.ready, "total_ms": total_ms, "steps": dict(self.steps)}
+
+
+# Global warm-up status
+warmup_status = WarmupStatus()
+
+
+def _prime_caches():
+    from ghl_agent.config_loader import get_config
+    from ghl_agent.catalog import get_catalog
+    from ghl_agent.agent.graph import get_system_prompt
+    from ghl_agent.tools.battery_tools import get_equipment_matcher
+
+    get_config()
+    get_catalog()
+    get_system_prompt()
+    get_equipment_matcher()
+
+
+def _compile_graphs():
+    from ghl_agent.agent.graph import get_graph
+    from ghl_agent.agent.reflection import get_reflection_graph
+
+    get_graph()
+    get_reflection_graph()
+
+
+async def _dry_run():
+    import httpx
+    from ghl_agent.agent.graph import workflow
+    from ghl_agent.agent.model_tiers import use_chat_model
+    from ghl_agent.fakes import FakeGHL, ScriptedChatModel
+    from ghl_agent.metrics import suppressed_metrics
+    from ghl_agent.tools.ghl_tools import use_http_client
+    from ghl_agent.usage import suppressed_usage
+    from langchain_core.messages import HumanMessage
+
+    # A private graph, model and GHL client: webhooks served meanwhile keep the
+    # real ones, and the fake turn stays out of metrics, stats and usage
+    graph = workflow.compile()
+    ghl = FakeGHL()
+    async with httpx.AsyncClient(transport=ghl.transport()) as http_client:
+        with use_chat_model(ScriptedChatModel()), use_http_client(http_client), \
+                suppressed_metrics(), suppressed_usage():
+            await graph.ainvoke({
+                "messages": [HumanMessage(content=DRY_RUN_MESSAGE)],
+                "contact_id": "warmup-contact",
+                "conversation_id": "warmup-conversation"
+            })
+    if not ghl.sent_messages:
+        raise RuntimeError("Dry run did not send a reply")
+
+
+def _bind_tools():
+    from ghl_agent.config_loader import get_config
+    from ghl_agent.agent.graph import bound_models
+    from ghl_agent.agent.model_tiers import get_tier_model
+
+    config = get_config()
+    models = {tier: get_tier_model(tier) for tier in config.models.tiers}
+    subsets = [None, *config.stage_tools.values()]
+    bound = bound_models.precompute(models, subsets)
+    logger.debug("Pre-bound tool schemas", bindings=bound)
+
+
+async def _open_pools():
+    from ghl_agent.agent.llm_gateway import get_llm_gateway
+    from ghl_agent.tools.ghl_tools import ghl_client
+
+    await asyncio.gather(get_llm_gateway().warm_up(), ghl_client.warm_up())
+
+
+async def _open_store():
+    # The request-path graph and its async backend - no sync pool is opened
+    from ghl_agent.agent.checkpointing import get_async_checkpointer_with_store
+    from ghl_agent.agent.graph import aget_graph
+
+    await aget_graph()
+    _, store = await get_async_checkpointer_with_store()
+    await store.asearch(("warmup",), limit=1)
+
+
+def warmup_steps() -> List[tuple]:
+    """Ordered (name, step) pairs - steps are sync functions or coroutine functions"""
+    steps = [("caches", _prime_caches), ("graphs", _compile_graphs)]
+    if WARMUP_DRY_RUN:
+        steps.append(("dry_run", _dry_run))
+    steps += [("tool_bindings", _bind_tools), ("pools", _open_pools), ("store", _open_store)]
+    return steps
+
+
+async def _run_step(name: str, step: Callable[[], Any]):
+    started = time.perf_counter()
+    error = None
+    try:
+        if asyncio.iscoroutinefunction(step):
+            await step()
+        else:
+            step()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        error = str(e)
+        logger.warning("Warm-up step failed", step=name, error=error)
+    warmup_status.record(name, (time.perf_counter() - started) * 1000, error)
+
+
+async def warm_up():
+    """Run every warm-up step and mark the worker ready"""
+    try:
+        for name, step in warmup_steps():
+            await _run_step(name, step)
+    finally:
+        warmup_status.finish()
+        logger.info("Warm-up finished", **warmup_status.snapshot())
+
+
+async def close_pools():
+    """Close pooled HTTP clients opened during warm-up or by requests"""
+    if "ghl_agent.tools.ghl_tools" in sys.modules:
+        await sys.modules["ghl_agent.tools.ghl_tools"].ghl_client.aclose()
+    gateway = getattr(sys.modules.get("ghl_agent.agent.llm_gateway"), "_gateway", None)
+    if gateway is not None:
+        await gateway.aclose()
+
+
+__all__ = ["WARMUP_ON_STARTUP", "WarmupStatus", "warmup_status", "warm_up", "close_pools"]
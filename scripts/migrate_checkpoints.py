@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Re-encode pickled local checkpoints with the compact serializer
+
+Reads the ``.langgraph_checkpoint.*.pckl`` files the local dev server
+persists (checkpoints, pending writes and channel blobs), decodes every
+serialized value - including legacy "pickle" payloads - and re-encodes it
+with ``CompactSerializer``. Values that fail to decode are kept unchanged.
+
+Only run this on files you trust: loading them unpickles arbitrary objects.
+
+Usage:
+    python scripts/migrate_checkpoints.py --dry-run
+    python scripts/migrate_checkpoints.py --source .langgraph_api --output .langgraph_api/compact
+"""
+from typing import Any, Dict
+from collections import Counter
+from pathlib import Path
+import argparse
+import pickle
+import shutil
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ghl_agent.serialization import CompactSerializer, TYPE_COMPACT, TYPE_COMPACT_ZSTD
+
+# Serialized value type tags written by LangGraph's default serializer
+LEGACY_TYPES = {"msgpack", "json", "pickle", "null", "bytes", "bytearray"}
+
+
+class Migration:
+    """Walks pickled checkpoint containers and re-encodes serialized values"""
+
+    def __init__(self, serde: CompactSerializer):
+        self.serde = serde
+        self.stats: Counter = Counter()
+
+    def _reencode(self, value: tuple) -> tuple:
+        try:
+            decoded = self.serde.loads_typed(value)
+            migrated = self.serde.dumps_typed(decoded)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"  kept {value[0]} value ({len(value[1])} bytes): {e}", file=sys.stderr)
+            return value
+        self.stats["values"] += 1
+        self.stats[f"from_{value[0]}"] += 1
+        self.stats["bytes_before"] += len(value[1])
+        self.stats["bytes_after"] += len(migrated[1])
+        return migrated
+
+    def migrate(self, value: Any) -> Any:
+        """Return ``value`` with every serialized (type, bytes) pair re-encoded"""
+        if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], (bytes, bytearray)):
+            if value[0] in LEGACY_TYPES:
+                return self._reencode(value)
+            if value[0] in (TYPE_COMPACT, TYPE_COMPACT_ZSTD):
+                self.stats["already_compact"] += 1
+            return value
+        if isinstance(value, dict):
+            # Keep the container type (the dev server uses nested defaultdicts)
+            migrated = value.copy()
+            for key, item in value.items():
+                migrated[key] = self.migrate(item)
+            return migrated
+        if isinstance(value, (tuple, list)):
+            return type(value)(self.migrate(item) for item in value)
+        return value
+
+
+def migrate_file(path: Path, output: Path, migration: Migration, dry_run: bool) -> Dict[str, int]:
+    before = Counter(migration.stats)
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    migrated = migration.migrate(data)
+    if not dry_run:
+        with open(output / path.name, "wb") as f:
+            pickle.dump(migrated, f)
+    return dict(Counter(migration.stats) - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode local checkpoints with the compact serializer")
+    parser.add_argument("--source", type=Path, default=Path(".langgraph_api"), help="Directory with .pckl files")
+    parser.add_argument("--output", type=Path, help="Output directory (default: <source>/compact)")
+    parser.add_argument("--no-compression", action="store_true", help="Do not zstd-compress large values")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing files")
+    args = parser.parse_args()
+
+    files = sorted(args.source.glob(".langgraph_checkpoint*.pckl"))
+    if not files:
+        print(f"No checkpoint files in {args.source}")
+        return 1
+    output = args.output or args.source / "compact"
+    if not args.dry_run:
+        output.mkdir(parents=True, exist_ok=True)
+
+    serde = CompactSerializer(
+        compression_threshold=None if args.no_compression else CompactSerializer().compression_threshold,
+        pickle_fallback=True
+    )
+    migration = Migration(serde)
+    for path in files:
+        stats = migrate_file(path, output, migration, args.dry_run)
+        print(f"{path.name}: {stats.get('values', 0)} values, "
+              f"{stats.get('bytes_before', 0)} -> {stats.get('bytes_after', 0)} bytes, "
+              f"{stats.get('failed', 0)} kept")
+
+    # Other dev server files (runs, store) are not checkpoint data - copy them as they are
+    if not args.dry_run:
+        for path in args.source.glob("*.pckl"):
+            if path not in files:
+                shutil.copy2(path, output / path.name)
+
+    stats = migration.stats
+    saved = 1 - stats["bytes_after"] / stats["bytes_before"] if stats["bytes_before"] else 0.0
+    print(f"total: {stats['values']} values, {stats['bytes_before']} -> {stats['bytes_after']} bytes "
+          f"({saved:.0%} smaller), {stats['failed']} kept, {stats['already_compact']} already compact")
+    if not args.dry_run:
+        print(f"written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
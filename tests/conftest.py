@@ -0,0 +1,30 @@
+"""Shared fixtures: offline stand-ins and quiet logging"""
+import logging
+import os
+
+import pytest
+import structlog
+
+# Tests run the in-process agent, never a deployment
+for _name in ("LANGGRAPH_API_URL", "LANGGRAPH_AUTH_TYPE", "POSTGRES_URI", "REDIS_URL", "SQLITE_PATH"):
+    os.environ.pop(_name, None)
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+
+@pytest.fixture
+def fakes():
+    """Scripted chat model and fake GHL API installed for the test"""
+    from ghl_agent.fakes import installed_fakes
+
+    with installed_fakes() as installed:
+        yield installed
+
+
+@pytest.fixture(autouse=True)
+def fresh_persistence(monkeypatch):
+    """Each test starts with empty in-memory checkpoints and store"""
+    from ghl_agent.agent import checkpointing, graph
+
+    monkeypatch.setattr(checkpointing, "_memory_backend", None)
+    monkeypatch.setattr(graph, "_request_graph", None)
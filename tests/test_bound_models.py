@@ -0,0 +1,54 @@
+from langchain_core.tools import tool
+
+from ghl_agent.agent.bound_models import BoundModelRegistry
+from ghl_agent.fakes import ScriptedChatModel
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up"""
+    return query
+
+
+@tool
+def send(message: str) -> str:
+    """Send a message"""
+    return message
+
+
+def test_bindings_are_reused_per_tier_subset_and_flag():
+    registry = BoundModelRegistry([lookup, send])
+    model = ScriptedChatModel()
+
+    bound = registry.get(model, "fast", ["send"])
+    assert registry.get(model, "fast", ["send"]) is bound
+    assert registry.get(model, "fast", ["send"], parallel_tool_calls=False) is not bound
+    assert registry.get(model, "smart", ["send"]) is not bound
+    assert bound.kwargs["tools"] == ["send"]
+
+
+def test_a_rebuilt_tier_model_is_bound_again():
+    registry = BoundModelRegistry([lookup, send])
+    old, new = ScriptedChatModel(model_name="old"), ScriptedChatModel(model_name="new")
+
+    registry.get(old, "fast")
+    rebound = registry.get(new, "fast")
+
+    assert rebound.bound is new
+    # The stale binding is replaced, not kept alongside
+    assert len(registry) == 1
+
+
+def test_unknown_tools_are_ignored_and_order_is_normalized():
+    registry = BoundModelRegistry([lookup, send])
+    model = ScriptedChatModel()
+    assert registry.get(model, "fast", ["send", "lookup", "missing"]) is registry.get(model, "fast", ["lookup", "send"])
+
+
+def test_precompute_and_config_reload_clear():
+    registry = BoundModelRegistry([lookup, send])
+    models = {"fast": ScriptedChatModel(), "smart": ScriptedChatModel()}
+
+    assert registry.precompute(models, [None, ["send"]]) == 2 * 2 * 2
+    registry.clear(object())  # called as a config subscriber
+    assert len(registry) == 0
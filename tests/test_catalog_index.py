@@ -0,0 +1,53 @@
+import pytest
+
+from ghl_agent.catalog import CatalogIndex, get_catalog
+
+RANGES = [(0, 10 ** 9), (0, 0), (1000, 5000), (5000, 5000), (2048, 15000), (20000, 10 ** 9), (5000, 1000)]
+HOUSING = [None, "casa", "apartamento", "ambos", "oficina"]
+
+
+def linear_scan(products, min_wh, max_wh, housing_type=None):
+    """The per-call scan get_battery_by_capacity_range used before the index"""
+    matches = [
+        product_id for product_id, info in products.items()
+        if min_wh <= info["capacity_wh"] <= max_wh
+        and (housing_type is None or info["best_for"] in [housing_type, "ambos"])
+    ]
+    return sorted(matches, key=lambda product_id: products[product_id]["capacity_wh"])
+
+
+@pytest.mark.parametrize("housing_type", HOUSING)
+@pytest.mark.parametrize("min_wh, max_wh", RANGES)
+def test_capacity_range_matches_linear_scan(min_wh, max_wh, housing_type):
+    catalog = get_catalog()
+    results = catalog.index.capacity_range(min_wh, max_wh, housing_type)
+    assert [record["id"] for record in results] == linear_scan(catalog.batteries, min_wh, max_wh, housing_type)
+
+
+def test_records_carry_parsed_prices_and_ids():
+    index = CatalogIndex({
+        "a": {"name": "A", "capacity_wh": 3000, "best_for": "casa", "price": "$2,499.00", "price_with_install": "$3,999"},
+        "b": {"name": "B", "capacity_wh": 1000, "best_for": "ambos", "price": "Consultar"}
+    })
+    assert [record["id"] for record in index.records] == ["b", "a"]
+    assert index.by_id["a"]["price_value"] == 2499.0
+    assert index.by_id["a"]["price_with_install_value"] == 3999.0
+    assert index.by_id["b"]["price_value"] is None
+    assert "price_with_install_value" not in index.by_id["b"]
+
+
+def test_housing_partitions_include_ambos_products():
+    index = CatalogIndex({
+        "house": {"capacity_wh": 5000, "best_for": "casa"},
+        "flat": {"capacity_wh": 1000, "best_for": "apartamento"},
+        "both": {"capacity_wh": 2000, "best_for": "ambos"}
+    })
+    assert [r["id"] for r in index.capacity_range(0, 10000, "casa")] == ["both", "house"]
+    assert [r["id"] for r in index.capacity_range(0, 10000, "apartamento")] == ["flat", "both"]
+    assert [r["id"] for r in index.capacity_range(0, 10000, "oficina")] == ["both"]
+
+
+def test_empty_catalog():
+    index = CatalogIndex({})
+    assert index.capacity_range(0, 10 ** 9) == []
+    assert index.capacity_range(0, 10 ** 9, "casa") == []
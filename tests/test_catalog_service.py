@@ -0,0 +1,65 @@
+import pytest
+import yaml
+
+from ghl_agent.catalog import DEFAULT_CATALOG_PATH, CatalogService
+from ghl_agent.tools.pricing import PricePoints
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = tmp_path / "catalog.yaml"
+    path.write_text(DEFAULT_CATALOG_PATH.read_text(encoding="utf-8"), encoding="utf-8")
+    return path
+
+
+def _edit(path, **sections):
+    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data.update(sections)
+    path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+
+
+def test_catalog_file_is_the_only_product_source():
+    from ghl_agent.tools import battery_product_knowledge, battery_tools
+
+    for module, names in (
+        (battery_product_knowledge, ("ALL_BATTERY_PRODUCTS", "STACKABLE_BATTERIES", "SOLAR_PANEL_PRICING", "COMMISSION_STRUCTURE")),
+        (battery_tools, ("BATTERY_OPTIONS",))
+    ):
+        assert not any(hasattr(module, name) for name in names)
+
+
+def test_missing_configured_file_falls_back_to_bundled_catalog(tmp_path):
+    bundled = CatalogService(DEFAULT_CATALOG_PATH).snapshot
+    service = CatalogService(tmp_path / "missing.yaml")
+    assert dict(service.snapshot.batteries) == dict(bundled.batteries)
+
+
+def test_empty_solar_pricing_is_rejected_on_load(catalog_file):
+    _edit(catalog_file, solar_panel_pricing={})
+    with pytest.raises(ValueError):
+        CatalogService(catalog_file)
+
+
+def test_reload_with_empty_solar_pricing_keeps_current_catalog(catalog_file):
+    service = CatalogService(catalog_file)
+    before = service.snapshot
+    _edit(catalog_file, solar_panel_pricing={})
+    assert service.reload(force=True) == frozenset()
+    assert service.snapshot is before
+    assert service.snapshot.solar_panel_prices.lookup(12) == 6000.0
+
+
+def test_reload_rebuilds_only_changed_structures(catalog_file):
+    service = CatalogService(catalog_file)
+    before = service.snapshot
+    _edit(catalog_file, solar_panel_pricing={8: 4200.0, 20: 10200.0})
+    assert service.reload(force=True) == frozenset({"solar_panel_pricing"})
+    after = service.snapshot
+    assert after.version == before.version + 1
+    assert after.index is before.index and after.sizing is before.sizing
+    assert after.solar_panel_prices.lookup(8) == 4200.0
+
+
+def test_price_points_need_a_point():
+    with pytest.raises(ValueError):
+        PricePoints({})
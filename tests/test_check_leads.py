@@ -0,0 +1,45 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from ghl_agent.config_loader import get_config
+from ghl_agent.tasks import check_leads
+from ghl_agent.tasks.check_leads import LeadChecker
+
+
+@pytest.fixture(autouse=True)
+def fresh_matchers():
+    check_leads._reset_triage_matchers(get_config())
+
+
+def triage(message):
+    return asyncio.run(LeadChecker()._triage_lead({"id": "lead-1", "message": message}))
+
+
+def test_import_does_not_load_the_config():
+    code = "import ghl_agent.tasks.check_leads, ghl_agent.config_loader as c; assert c._config_loader is None"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_reason_names_the_configured_pattern():
+    assert triage("Quiero saber sobre la luma y sus apagones") == {
+        "action": "auto_respond",
+        "reason": "Contains auto-respond pattern: LUMA"
+    }
+
+
+def test_unmatched_messages_go_to_a_human():
+    assert triage("hola")["action"] == "notify_human"
+
+
+def test_matchers_are_rebuilt_after_a_config_change(monkeypatch):
+    config = get_config()
+    changed = config.model_copy(update={"triage": {**config.triage, "ignore": ["Spam Total"]}})
+    monkeypatch.setattr(check_leads, "get_config", lambda: changed)
+    check_leads._reset_triage_matchers(changed)
+    try:
+        assert triage("esto es spam total") == {"action": "ignored", "reason": "Contains ignore pattern: Spam Total"}
+    finally:
+        check_leads._reset_triage_matchers(config)
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.memory import InMemoryStore
+
+from ghl_agent.agent import checkpointing
+from ghl_agent.usage import UsageLedger, UsageScope
+
+
+@pytest.fixture
+def async_postgres(monkeypatch):
+    """An already built async backend for POSTGRES_URI; the sync pool must not be opened"""
+    store = InMemoryStore()
+    monkeypatch.setenv("POSTGRES_URI", "postgresql://unused")
+    monkeypatch.setattr(checkpointing, "_async_postgres_backend", (None, MemorySaver(), store))
+
+    def sync_backend(postgres_uri):
+        raise AssertionError("sync Postgres pool opened on the request path")
+
+    monkeypatch.setattr(checkpointing, "_get_postgres_backend", sync_backend)
+    return store
+
+
+def test_inbox_uses_the_async_backend(async_postgres):
+    from ghl_agent.inbox.api import create_inbox_router
+
+    async_postgres.put(("conversation", "contact-1"), "latest", {
+        "customer_name": "Ana", "conversation_stage": "qualification", "last_interaction": "2025-01-15"
+    })
+    app = FastAPI()
+    app.include_router(create_inbox_router())
+    client = TestClient(app)
+
+    assert client.get("/inbox/conversations").status_code == 200
+    assert client.get("/inbox/conversations/contact-1").json()["conversation"]["customer_name"] == "Ana"
+    assert client.post("/inbox/conversations/contact-1/flag", params={"reason": "review"}).status_code == 200
+    assert async_postgres.search(("flags", "contact-1"))[0].value["reason"] == "review"
+
+
+def test_warmup_and_usage_ledger_use_the_async_backend(async_postgres):
+    from ghl_agent.warmup import _open_store
+
+    ledger = UsageLedger()
+    ledger.record("gpt-4o-mini", {"input_tokens": 10, "output_tokens": 5}, UsageScope("tenant-1", "contact-1", "discovery"))
+
+    async def scenario():
+        await _open_store()
+        await ledger.open()
+        assert await ledger.flush() == 1
+        return await ledger.report("tenant-1")
+
+    assert asyncio.run(scenario())["totals"]["calls"] == 1
+    assert async_postgres.search(("usage", "tenant-1")) != []
+
+
+def test_sync_pool_is_sized_separately():
+    from ghl_agent.config_loader import get_config
+
+    memory = get_config().memory
+    assert memory.sync_pool_max_size < memory.pool_max_size
@@ -0,0 +1,60 @@
+import pytest
+import yaml
+
+from ghl_agent.config_loader import ConfigLoader, flatten_config, interpolate_env
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("${GHL_TEST_SET}", "from-env"),
+    ("prefix-${GHL_TEST_SET}-suffix", "prefix-from-env-suffix"),
+    ("${GHL_TEST_UNSET:-fallback}", "fallback"),
+    ("${GHL_TEST_EMPTY:-fallback}", "fallback"),
+    ("${GHL_TEST_SET:-fallback}", "from-env"),
+    ("${GHL_TEST_UNSET:-}", ""),
+    ("${GHL_TEST_SET}/${GHL_TEST_UNSET:-x}", "from-env/x"),
+    ("no placeholders", "no placeholders"),
+    ("$GHL_TEST_SET", "$GHL_TEST_SET"),
+    (42, 42),
+    (None, None)
+])
+def test_interpolate_env(monkeypatch, value, expected):
+    monkeypatch.setenv("GHL_TEST_SET", "from-env")
+    monkeypatch.setenv("GHL_TEST_EMPTY", "")
+    monkeypatch.delenv("GHL_TEST_UNSET", raising=False)
+    assert interpolate_env(value) == expected
+
+
+def test_interpolate_env_recurses_and_reports_missing(monkeypatch):
+    monkeypatch.setenv("GHL_TEST_SET", "from-env")
+    monkeypatch.delenv("GHL_TEST_UNSET", raising=False)
+    missing = set()
+    result = interpolate_env({
+        "a": ["${GHL_TEST_SET}", {"b": "${GHL_TEST_UNSET}"}],
+        "c": "${GHL_TEST_UNSET:-default}",
+        "d": True
+    }, missing)
+    assert result == {"a": ["from-env", {"b": "${GHL_TEST_UNSET}"}], "c": "default", "d": True}
+    assert missing == {"GHL_TEST_UNSET"}
+
+
+def test_flatten_config_maps_every_path():
+    assert flatten_config({"a": {"b": {"c": 1}}, "d": 2}) == {
+        "a": {"b": {"c": 1}}, "a.b": {"c": 1}, "a.b.c": 1, "d": 2
+    }
+
+
+def test_loader_interpolates_and_casts(tmp_path, monkeypatch):
+    raw = yaml.safe_load(ConfigLoader().config_path.read_text(encoding="utf-8"))
+    raw["business"]["name"] = "${GHL_TEST_NAME:-Default Co}"
+    raw["behavior"]["max_retry_attempts"] = "${GHL_TEST_RETRIES:-3}"
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(raw, allow_unicode=True), encoding="utf-8")
+    monkeypatch.setenv("GHL_TEST_RETRIES", "7")
+    monkeypatch.delenv("GHL_TEST_NAME", raising=False)
+
+    loader = ConfigLoader(str(path))
+    assert loader.get("business.name") == "Default Co"
+    assert loader.config.business.name == "Default Co"
+    assert loader.get_as("behavior.max_retry_attempts", int) == 7
+    assert loader.get_as("business.name", int, default=-1) == -1
+    assert loader.get_as("behavior.missing", int, default=5) == 5
@@ -0,0 +1,133 @@
+import pytest
+
+from ghl_agent.tools import equipment_matcher as matcher_module
+from ghl_agent.tools.battery_tools import build_equipment_matcher
+from ghl_agent.tools.equipment_matcher import EquipmentMatcher, normalize_equipment_name, singularize
+
+
+@pytest.fixture
+def matcher() -> EquipmentMatcher:
+    return build_equipment_matcher()
+
+
+@pytest.mark.parametrize("text, key, kind, quantity", [
+    ("nevera", "nevera", "exact", 1),
+    ("Aire Acondicionado", "aire_acondicionado_pequeno", "alias", 1),
+    ("Refrigerador", "nevera", "alias", 1),
+    ("2 neveras", "nevera", "plural", 2),
+    ("3x abanicos", "abanico", "plural", 3),
+    ("TVs", "tv", "plural", 1),
+    ("2 tvs", "tv", "plural", 2),
+    ("luces", "bombilla_led", "plural", 1),
+    ("televisores", "televisor", "plural", 1),
+    ("microhondas", "microondas", "fuzzy", 1),
+    ("aire acondisionado", "aire_acondicionado_pequeno", "fuzzy", 1),
+    ("router wifi", "router_internet", "fuzzy", 1)
+])
+def test_matches(matcher, text, key, kind, quantity):
+    match = matcher.match(text)
+    assert match is not None
+    assert (match.key, match.kind, match.quantity) == (key, kind, quantity)
+
+
+@pytest.mark.parametrize("text", [
+    "maquina de oxigeno",  # shares "maquina de" with the cafetera alias
+    "secadora de pelo",
+    "planchas",
+    "gas",
+    "",
+    "123"
+])
+def test_unknown_equipment_is_not_guessed(matcher, text):
+    assert matcher.match(text) is None
+
+
+def test_close_runner_up_is_ambiguous():
+    matcher = EquipmentMatcher({"bomba_agua": 750, "bomba_aire": 300})
+    assert matcher.match("bomba aiua") is None
+    assert matcher.match("bomba de agua").key == "bomba_agua"
+
+
+@pytest.mark.parametrize("name, singular", [
+    ("tvs", "tv"),
+    ("neveras", "nevera"),
+    ("luces", "luz"),
+    ("televisores", "televisor"),
+    ("ventiladores_de_techo", "ventilador_de_techo"),
+    ("gps", "gp"),
+    ("compress", "compress")
+])
+def test_singularize(name, singular):
+    assert singularize(name) == singular
+
+
+def test_normalize_folds_accents_and_separators():
+    assert normalize_equipment_name("  Máquina de Café! ") == "maquina_de_cafe"
+
+
+def test_cache_is_bounded_lru(matcher, monkeypatch):
+    monkeypatch.setattr(matcher_module, "CACHE_SIZE", 3)
+    for text in ("nevera", "tv", "abanico"):
+        matcher.match(text)
+    matcher.match("nevera")  # refresh
+    matcher.match("lavadora")  # evicts "tv"
+    assert list(matcher._cache) == ["abanico", "nevera", "lavadora"]
+
+
+def test_stats_count_every_lookup(matcher):
+    for text in ("nevera", "nevera", "refri", "neveras", "maquina de oxigeno"):
+        matcher.match(text)
+    snapshot = matcher.snapshot()
+    assert {kind: snapshot[kind] for kind in ("exact", "alias", "plural", "fuzzy", "miss")} == {
+        "exact": 2, "alias": 1, "plural": 1, "fuzzy": 0, "miss": 1
+    }
+    assert snapshot["hit_rate"] == pytest.approx(0.8)
+
+
+def test_matches_are_exported_as_metrics(matcher):
+    from ghl_agent import metrics
+
+    if not metrics.METRICS_ENABLED:
+        pytest.skip("metrics disabled")
+    counter = metrics.EQUIPMENT_MATCHES.labels(kind="miss")
+    before = counter._value.get()
+    matcher.match("maquina de oxigeno")
+    matcher.match("maquina de oxigeno")  # cached lookups still count
+    assert counter._value.get() == before + 2
+
+
+def test_zero_quantity_is_kept_and_skipped_by_the_runtime_tool(matcher):
+    from ghl_agent.tools.battery_tools import calculate_battery_runtime
+
+    assert matcher.match("0 neveras").quantity == 0
+    result = calculate_battery_runtime.invoke({"equipment_list": ["0 neveras", "tv"], "battery_capacity_wh": 700})
+    assert [detail["matched"] for detail in result["equipment_details"]] == ["tv"]
+    assert result["total_consumption_watts"] == 70
+    assert result["unknown_equipment"] == []
+
+
+def test_config_reloads_keep_match_stats(monkeypatch):
+    from ghl_agent.config_loader import get_config
+    from ghl_agent.tools import battery_tools
+
+    monkeypatch.setattr(battery_tools, "_equipment_matcher", None)
+    matcher = battery_tools.get_equipment_matcher()
+    for text in ("nevera", "maquina de oxigeno"):
+        matcher.match(text)
+    stats = dict(matcher.stats)
+
+    # Same tables: the matcher and its cache survive the reload
+    battery_tools._reset_equipment_matcher(get_config())
+    assert battery_tools.get_equipment_matcher() is matcher
+    assert "nevera" in matcher._cache
+
+    # Changed tables: a new matcher, still counting from where the old one was
+    config = get_config()
+    changed = config.model_copy(update={"equipment_consumption": {**config.equipment_consumption, "bomba_agua": 750}})
+    monkeypatch.setattr(battery_tools, "get_config", lambda: changed)
+    battery_tools._reset_equipment_matcher(changed)
+    rebuilt = battery_tools.get_equipment_matcher()
+    assert rebuilt is not matcher
+    assert rebuilt.stats == stats
+    assert rebuilt.match("bomba de agua").key == "bomba_agua"
+    assert rebuilt.stats["miss"] == stats["miss"]
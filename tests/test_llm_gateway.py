@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from ghl_agent.agent.llm_gateway import LLMGateway, estimate_tokens, parse_reset_duration
+from ghl_agent.config_loader import get_config
+
+MODEL = "test-model"
+TOKENS_PER_MINUTE = 60000
+MESSAGES = [HumanMessage(content="Hola" * 100)]
+
+
+def _rate_limit_error(headers=None):
+    response = httpx.Response(429, headers=headers or {}, request=httpx.Request("POST", "https://api.openai.com/v1/chat"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def _gateway(max_retries=3) -> LLMGateway:
+    return LLMGateway(get_config().llm_gateway.model_copy(update={
+        "tokens_per_minute": {MODEL: TOKENS_PER_MINUTE},
+        "max_retries": max_retries,
+        "backoff_base_seconds": 0.0,
+        "backoff_max_seconds": 0.0
+    }))
+
+
+def _flaky(failures, error=_rate_limit_error):
+    """Runnable failing ``failures`` times before answering, counting attempts"""
+    attempts = []
+
+    async def call(messages):
+        attempts.append(len(attempts) + 1)
+        if len(attempts) <= failures:
+            raise error()
+        return AIMessage(content="ok", usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120})
+
+    return RunnableLambda(call), attempts
+
+
+def _run(gateway, runnable):
+    """Response and the budget left right after the call (refill since is negligible)"""
+    async def run():
+        response = await gateway.ainvoke(runnable, MESSAGES, MODEL)
+        return response, gateway._budgets[MODEL].tokens
+    return asyncio.run(run())
+
+
+def test_retries_reserve_the_budget_once():
+    gateway = _gateway()
+    runnable, attempts = _flaky(failures=2)
+
+    response, tokens = _run(gateway, runnable)
+
+    assert response.content == "ok"
+    assert attempts == [1, 2, 3]
+    # Only the successful call's real usage is charged
+    assert tokens == pytest.approx(TOKENS_PER_MINUTE - 120, abs=5)
+
+
+def test_exhausted_retries_refund_the_reservation():
+    gateway = _gateway(max_retries=2)
+    runnable, attempts = _flaky(failures=10)
+
+    async def run():
+        with pytest.raises(openai.RateLimitError):
+            await gateway.ainvoke(runnable, MESSAGES, MODEL)
+        return gateway._budgets[MODEL].tokens
+
+    assert asyncio.run(run()) == pytest.approx(TOKENS_PER_MINUTE, abs=5)
+    assert attempts == [1, 2, 3]
+
+
+def test_other_errors_are_not_retried():
+    gateway = _gateway()
+    runnable, attempts = _flaky(failures=1, error=lambda: ValueError("bad request"))
+
+    async def run():
+        with pytest.raises(ValueError):
+            await gateway.ainvoke(runnable, MESSAGES, MODEL)
+        return gateway._budgets[MODEL].tokens
+
+    assert asyncio.run(run()) == pytest.approx(TOKENS_PER_MINUTE, abs=5)
+    assert attempts == [1]
+
+
+def test_backoff_prefers_the_server_hint():
+    gateway = LLMGateway(get_config().llm_gateway.model_copy(update={"backoff_base_seconds": 0.0, "backoff_max_seconds": 20}))
+    assert gateway.backoff_delay(0, _rate_limit_error({"retry-after-ms": "1500"})) == pytest.approx(1.5)
+    assert gateway.backoff_delay(0, _rate_limit_error({"x-ratelimit-reset-tokens": "6m0s"})) == 20
+
+
+def test_backoff_is_full_jitter_below_the_cap():
+    gateway = LLMGateway(get_config().llm_gateway.model_copy(update={"backoff_base_seconds": 0.5, "backoff_max_seconds": 4}))
+    delays = [gateway.backoff_delay(attempt) for attempt in range(8) for _ in range(20)]
+    assert all(0 <= delay <= 4 for delay in delays)
+    assert max(gateway.backoff_delay(0) for _ in range(50)) <= 0.5
+
+
+def test_reset_durations_parse():
+    assert parse_reset_duration("6m0s") == 360
+    assert parse_reset_duration("20ms") == pytest.approx(0.02)
+    assert parse_reset_duration("1.5") == 1.5
+    assert parse_reset_duration("soon") is None
+
+
+def test_token_estimate_includes_completion_allowance():
+    assert estimate_tokens([HumanMessage(content="x" * 400)]) == 100 + 500
@@ -0,0 +1,30 @@
+import pytest
+
+from ghl_agent import metrics
+
+
+@pytest.fixture
+def store_samples():
+    if not metrics.METRICS_ENABLED:
+        pytest.skip("metrics disabled")
+
+    def count(operation, namespace):
+        labels = {"operation": operation, "namespace": namespace, "outcome": "ok"}
+        return metrics.prometheus_client.REGISTRY.get_sample_value(
+            "ghl_agent_store_operation_duration_seconds_count", labels
+        ) or 0
+
+    return count
+
+
+@pytest.mark.parametrize("namespaces, label", [
+    ([("conversation", "c1")], "conversation"),
+    ([("usage", "t1", "2025-01-15"), ("usage", "t2", "2025-01-15")], "usage"),
+    ([("conversation", "c1"), ("preferences", "c1")], metrics.BATCH_NAMESPACE),
+    ([], "")
+])
+def test_store_batches_are_labelled_by_every_namespace(store_samples, namespaces, label):
+    before = store_samples("test-op", label)
+    with metrics.track_store("test-op", *namespaces):
+        pass
+    assert store_samples("test-op", label) == before + 1
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ghl_agent.agent import model_tiers
+from ghl_agent.agent.model_tiers import (
+    TIER_FAST,
+    TIER_SMART,
+    TierStats,
+    estimate_confidence,
+    invoke_with_tiering,
+    select_turn_tier,
+    set_chat_model_factory
+)
+from ghl_agent.fakes import ScriptedChatModel
+
+
+def _logprobs(*values):
+    return {"logprobs": {"content": [{"token": "x", "logprob": value} for value in values]}}
+
+
+class LogprobModel(ScriptedChatModel):
+    """Scripted model whose answers carry fixed token logprobs"""
+
+    token_logprob: float = 0.0
+
+    def _respond(self, messages, tools):
+        message = super()._respond(messages, tools)
+        message.response_metadata = {**message.response_metadata, **_logprobs(self.token_logprob)}
+        return message
+
+
+@pytest.fixture
+def models():
+    """Per-tier scripted models, keyed by tier"""
+    from ghl_agent.config_loader import get_config
+
+    tiers = get_config().models.tiers
+    by_name = {
+        tiers[TIER_FAST].name: LogprobModel(responder=lambda m: AIMessage(content="fast"), token_logprob=-0.1),
+        tiers[TIER_SMART].name: LogprobModel(responder=lambda m: AIMessage(content="smart"))
+    }
+    previous = set_chat_model_factory(lambda name, temperature, logprobs: by_name[name])
+    yield {TIER_FAST: by_name[tiers[TIER_FAST].name], TIER_SMART: by_name[tiers[TIER_SMART].name]}
+    set_chat_model_factory(previous)
+
+
+def test_triage_turns_use_the_fast_tier():
+    assert select_turn_tier({}, [HumanMessage(content="Hola")], enable_tiering=True) == TIER_FAST
+
+
+def test_sized_leads_get_the_smart_tier():
+    state = {"housing_type": "casa", "equipment_list": ["nevera"]}
+    assert select_turn_tier(state, [HumanMessage(content="¿Cuál me recomiendas?")], enable_tiering=True) == TIER_SMART
+
+
+def test_pending_sizing_results_get_the_smart_tier():
+    messages = [AIMessage(content="", tool_calls=[{"name": "calculate_battery_runtime", "args": {}, "id": "call_1"}])]
+    assert select_turn_tier({}, messages, enable_tiering=True) == TIER_SMART
+
+
+def test_tiering_off_always_uses_the_smart_tier():
+    assert select_turn_tier({}, [HumanMessage(content="Hola")], enable_tiering=False) == TIER_SMART
+
+
+def test_confidence_is_the_geometric_mean_token_probability():
+    response = AIMessage(content="ok", response_metadata=_logprobs(-0.5, -1.5))
+    assert estimate_confidence(response) == pytest.approx(0.3679, abs=1e-4)
+
+
+def test_empty_and_malformed_answers_have_no_confidence():
+    assert estimate_confidence(AIMessage(content="")) == 0.0
+    malformed = AIMessage(content="x", invalid_tool_calls=[{"name": "f", "args": "{", "id": "1", "error": "bad"}])
+    assert estimate_confidence(malformed) == 0.0
+    assert estimate_confidence(AIMessage(content="no logprobs")) == 1.0
+
+
+def test_confident_fast_answers_are_kept(models):
+    response, tier = asyncio.run(invoke_with_tiering([HumanMessage(content="Hola")], TIER_FAST, escalation_threshold=0.5))
+    assert (response.content, tier) == ("fast", TIER_FAST)
+    assert models[TIER_SMART].calls == 0
+
+
+def test_low_confidence_fast_answers_escalate(models, monkeypatch):
+    stats = TierStats()
+    monkeypatch.setattr(model_tiers, "tier_stats", stats)
+    # exp(-0.1) ~ 0.905 is below the threshold
+    response, tier = asyncio.run(invoke_with_tiering([HumanMessage(content="Hola")], TIER_FAST, escalation_threshold=0.95))
+    assert (response.content, tier) == ("smart", TIER_SMART)
+    snapshot = stats.snapshot()
+    assert snapshot[TIER_FAST]["escalations"] == 1
+    assert snapshot[TIER_SMART]["calls"] == 1
+
+
+def test_tier_stats_are_served_to_admins(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from ghl_agent.admin import create_admin_router
+
+    stats = TierStats()
+    stats.record(TIER_FAST, 0.2, AIMessage(content="ok", usage_metadata={"input_tokens": 1000, "output_tokens": 0, "total_tokens": 1000}))
+    monkeypatch.setattr(model_tiers, "tier_stats", stats)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(create_admin_router())
+
+    response = TestClient(app).get("/admin/stats/model-tiers", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()[TIER_FAST]["calls"] == 1
+    assert response.json()[TIER_FAST]["avg_latency_seconds"] == pytest.approx(0.2)
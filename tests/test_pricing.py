@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from ghl_agent.catalog import get_catalog
+from ghl_agent.tools.pricing import PricePoints, TierTable
+
+
+def scalar_commission(tiers, sale_amount):
+    """The per-tier loop get_commission_for_sale used before TierTable"""
+    for tier in tiers:
+        if tier["min"] <= sale_amount <= tier["max"]:
+            return tier["commission"]
+    if sale_amount > 45000:
+        return 1200
+    return 0
+
+
+@pytest.fixture(scope="module")
+def commission_tiers():
+    catalog = get_catalog()
+    return catalog.commission_structure, catalog.commission_tiers
+
+
+def test_commission_matches_scalar_loop_for_integer_amounts(commission_tiers):
+    tiers, table = commission_tiers
+    amounts = list(range(0, 60001, 7)) + [tier[key] for tier in tiers for key in ("min", "max")]
+    for amount in amounts:
+        assert table.lookup(amount) == scalar_commission(tiers, amount), amount
+
+
+def test_commission_gaps_between_listed_tiers_keep_the_lower_tier(commission_tiers):
+    tiers, table = commission_tiers
+    assert table.lookup(tiers[0]["max"] + 0.5) == tiers[0]["commission"]
+    assert table.lookup(tiers[0]["min"] - 0.01) == 0
+
+
+def test_tier_batch_matches_single_lookups(commission_tiers):
+    _, table = commission_tiers
+    amounts = np.random.default_rng(7).uniform(-1000, 80000, 5000)
+    assert table.lookup_batch(amounts).tolist() == [table.lookup(amount) for amount in amounts]
+
+
+def test_tier_table_sorts_bounds_and_uses_below():
+    table = TierTable([100, 10], [2.0, 1.0], below=-1.0)
+    assert table.lower_bounds == (10.0, 100.0)
+    assert [table.lookup(v) for v in (5, 10, 99.9, 100, 1e9)] == [-1.0, 1.0, 1.0, 2.0, 2.0]
+    assert table.lookup_batch([5, 10, 100]).tolist() == [-1.0, 1.0, 2.0]
+
+
+@pytest.fixture(scope="module")
+def solar_prices():
+    catalog = get_catalog()
+    return catalog.solar_panel_pricing, catalog.solar_panel_prices
+
+
+def test_listed_panel_counts_return_listed_prices(solar_prices):
+    pricing, points = solar_prices
+    for count, price in pricing.items():
+        assert points.lookup(count) == price
+        assert points.lookup(count, "nearest") == price
+
+
+def test_price_points_interpolate_snap_and_extrapolate():
+    points = PricePoints({8: 4000.0, 10: 5000.0, 12: 7000.0})
+    assert points.lookup(9) == 4500.0
+    assert points.lookup(11.5) == 6500.0
+    assert points.lookup(8.9, "nearest") == 4000.0
+    assert points.lookup(9, "nearest") == 4000.0  # ties go to the lower count
+    assert points.lookup(9.1, "nearest") == 5000.0
+    assert points.lookup(2) == 4000.0
+    assert points.lookup(14) == 9000.0  # last rate: 1000 per panel
+
+
+@pytest.mark.parametrize("mode", ["interpolate", "nearest"])
+def test_price_points_batch_matches_single_lookups(solar_prices, mode):
+    _, points = solar_prices
+    counts = np.linspace(0, 40, 401)
+    assert points.lookup_batch(counts, mode).tolist() == pytest.approx([points.lookup(c, mode) for c in counts])
+
+
+def test_single_price_point_is_flat():
+    points = PricePoints({10: 5000.0})
+    assert points.lookup(3) == points.lookup(30) == 5000.0
+    assert points.lookup_batch([3, 30]).tolist() == [5000.0, 5000.0]
@@ -0,0 +1,45 @@
+import asyncio
+
+from ghl_agent.agent import checkpointing
+from ghl_agent.agent import graph as graph_module
+from ghl_agent.agent.graph import aget_graph, process_ghl_message, thread_config
+
+
+def test_memory_written_by_one_turn_is_read_by_the_next(fakes, monkeypatch):
+    loaded = []
+    aload_memory_context = graph_module.aload_memory_context
+
+    async def recording_load(store, contact_id):
+        loaded.append(await aload_memory_context(store, contact_id))
+        return loaded[-1]
+
+    monkeypatch.setattr(graph_module, "aload_memory_context", recording_load)
+
+    async def two_turns():
+        await process_ghl_message("contact-memory", "conversation-memory", "Hola, vivo en casa y tengo nevera")
+        await process_ghl_message("contact-memory", "conversation-memory", "¿Cuánto cuesta?")
+        _, store = await checkpointing.get_async_checkpointer_with_store()
+        state = await (await aget_graph()).aget_state(thread_config("contact-memory"))
+        return await store.asearch(("conversation", "contact-memory")), state.values
+
+    records, values = asyncio.run(two_turns())
+    assert records
+    assert loaded[0] == (None, None)
+    conversation_memory, _ = loaded[-1]
+    assert conversation_memory is not None and conversation_memory.housing_type == "casa"
+    # The second turn continued the checkpointed thread
+    assert [m.content for m in values["messages"] if m.type == "human"] == ["Hola, vivo en casa y tengo nevera", "¿Cuánto cuesta?"]
+    assert len(fakes["ghl"].sent_messages) >= 2
+
+
+def test_request_graph_and_memory_backend_are_shared():
+    async def twice():
+        return (
+            await aget_graph(), await aget_graph(),
+            await checkpointing.get_async_checkpointer_with_store(), checkpointing.get_checkpointer_with_store()
+        )
+
+    first, second, async_backend, sync_backend = asyncio.run(twice())
+    assert first is second
+    assert async_backend == sync_backend
+    assert first.checkpointer is async_backend[0] and first.store is async_backend[1]
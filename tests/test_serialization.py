@@ -0,0 +1,145 @@
+import operator
+from datetime import datetime, timezone
+from typing import Annotated
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from ghl_agent.agent.checkpointing import DeltaChannel, delta_state_schema
+from ghl_agent.serialization import TYPE_COMPACT, TYPE_COMPACT_ZSTD, CompactSerializer, zstandard
+
+THRESHOLDS = [None, pytest.param(0, marks=pytest.mark.skipif(zstandard is None, reason="zstandard not installed"))]
+
+MESSAGES = [
+    SystemMessage(content="Eres un asesor de baterías", id="s1"),
+    HumanMessage(content="Hola, vivo en apartamento", id="h1", additional_kwargs={"channel": "sms"}),
+    AIMessage(
+        content="",
+        id="a1",
+        tool_calls=[{"name": "send_ghl_message", "args": {"message": "¡Hola!"}, "id": "call-1", "type": "tool_call"}],
+        usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150},
+        response_metadata={"model_name": "gpt-4o-mini"}
+    ),
+    ToolMessage(content="sent", id="t1", tool_call_id="call-1", name="send_ghl_message", status="success"),
+    AIMessage(content=[{"type": "text", "text": "Listo"}], id="a2")
+]
+
+
+class ConversationState(TypedDict):
+    messages: Annotated[list, operator.add]
+    turns: int
+
+
+def reply(state):
+    turn = state.get("turns", 0) + 1
+    return {
+        "messages": [AIMessage(
+            content=f"respuesta {turn}",
+            id=f"ai-{turn}",
+            usage_metadata={"input_tokens": turn, "output_tokens": 2 * turn, "total_tokens": 3 * turn}
+        )],
+        "turns": turn
+    }
+
+
+def build_graph(checkpointer, delta: bool):
+    schema = delta_state_schema(ConversationState, snapshot_every=2) if delta else ConversationState
+    workflow = StateGraph(schema)
+    workflow.add_node("reply", reply)
+    workflow.add_edge(START, "reply")
+    workflow.add_edge("reply", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def run_turns(graph, start: int, count: int):
+    config = {"configurable": {"thread_id": "thread-1"}}
+    for turn in range(start, start + count):
+        graph.invoke({"messages": [HumanMessage(content=f"mensaje {turn}", id=f"human-{turn}")]}, config)
+    return config
+
+
+def history(graph, config):
+    return [snapshot.values for snapshot in graph.get_state_history(config)]
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+def test_values_round_trip(threshold):
+    serde = CompactSerializer(compression_threshold=threshold)
+    value = {
+        "messages": MESSAGES,
+        "chunk": AIMessageChunk(content="parcial", id="c1"),
+        "at": datetime(2025, 1, 15, 12, 30, tzinfo=timezone.utc),
+        "nested": {"ids": ("a", "b"), "count": 3, "tags": {"x"}}
+    }
+    type_, payload = serde.dumps_typed(value)
+    assert type_ == (TYPE_COMPACT if threshold is None else TYPE_COMPACT_ZSTD)
+    # Same values back as LangGraph's own serializer (which also turns tuples into lists)
+    default = JsonPlusSerializer()
+    assert serde.loads_typed((type_, payload)) == default.loads_typed(default.dumps_typed(value))
+    assert serde.loads_typed((type_, payload))["messages"] == MESSAGES
+
+
+def test_compact_payloads_are_smaller_than_default():
+    compact = CompactSerializer(compression_threshold=None).dumps_typed(MESSAGES)[1]
+    default = JsonPlusSerializer().dumps_typed(MESSAGES)[1]
+    assert len(compact) < len(default)
+
+
+@pytest.mark.parametrize("delta", [False, pytest.param(True, marks=pytest.mark.skipif(DeltaChannel is None, reason="needs langgraph>=1.2"))])
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+def test_checkpoints_round_trip(threshold, delta):
+    expected_graph = build_graph(MemorySaver(serde=JsonPlusSerializer()), delta)
+    expected = history(expected_graph, run_turns(expected_graph, 0, 5))
+
+    serde = CompactSerializer(compression_threshold=threshold)
+    written = []
+    dumps_typed = serde.dumps_typed
+    serde.dumps_typed = lambda obj: written.append(type(obj).__name__) or dumps_typed(obj)
+    saver = MemorySaver(serde=serde)
+    config = run_turns(build_graph(saver, delta), 0, 5)
+    if delta:
+        assert "_DeltaSnapshot" in written
+
+    # A fresh graph only has the serialized checkpoints to go on
+    assert history(build_graph(saver, delta), config) == expected
+    blob_types = {type_ for type_, _ in saver.blobs.values()} - {"empty", "null"}
+    assert blob_types <= {TYPE_COMPACT, TYPE_COMPACT_ZSTD}
+    if threshold is not None:
+        assert TYPE_COMPACT_ZSTD in blob_types
+
+
+@pytest.mark.parametrize("delta", [False, pytest.param(True, marks=pytest.mark.skipif(DeltaChannel is None, reason="needs langgraph>=1.2"))])
+def test_default_serializer_checkpoints_keep_loading(delta):
+    expected_graph = build_graph(MemorySaver(serde=JsonPlusSerializer()), delta)
+    expected = history(expected_graph, run_turns(expected_graph, 0, 5))
+
+    saver = MemorySaver(serde=JsonPlusSerializer())
+    config = run_turns(build_graph(saver, delta), 0, 3)
+    legacy_types = {type_ for type_, _ in saver.blobs.values()}
+
+    # Switch serializers on a live thread: old checkpoints load, new ones are compact
+    saver.serde = CompactSerializer()
+    graph = build_graph(saver, delta)
+    partial = history(graph, config)
+    assert partial == expected[-len(partial):]
+    run_turns(graph, 3, 2)
+    assert history(graph, config) == expected
+    assert {type_ for type_, _ in saver.blobs.values()} - legacy_types - {"empty", "null"} <= {TYPE_COMPACT, TYPE_COMPACT_ZSTD}
+
+
+def test_missing_zstandard_is_reported_once(monkeypatch):
+    from ghl_agent import serialization
+
+    warnings = []
+    monkeypatch.setattr(serialization, "zstandard", None)
+    monkeypatch.setattr(serialization, "_compression_warning_logged", False)
+    monkeypatch.setattr(serialization.logger, "warning", lambda event, **kw: warnings.append(event))
+
+    assert serialization.check_compression() is False
+    serialization.get_serializer()
+    assert len(warnings) == 1
+    assert CompactSerializer(compression_threshold=0).dumps_typed(MESSAGES)[0] == TYPE_COMPACT
@@ -0,0 +1,96 @@
+import math
+
+import pytest
+
+from ghl_agent.catalog import get_catalog
+from ghl_agent.tools.sizing_engine import SizingEngine, parse_price
+
+CONSUMPTIONS = [0.0, 25.0, 150.0, 420.0, 900.0, 1800.0, 5000.0, 40000.0]
+HOUSING = ["casa", "apartamento", None]
+
+
+@pytest.fixture(scope="module")
+def engine() -> SizingEngine:
+    return get_catalog().sizing
+
+
+def scalar_recommend(products, housing_type, watts, top_k=3):
+    """Per-product loop of the old recommend_battery_system, with the engine's ranking"""
+    candidates = []
+    for product in products:
+        if housing_type in ("casa", "apartamento") and product.get("best_for", "ambos") not in (housing_type, "ambos"):
+            continue
+        if product["capacity_wh"] < watts * 6:
+            continue
+        runtime = product["capacity_wh"] / watts if watts > 0 else math.inf
+        price = parse_price(product.get("price", product.get("price_range")))
+        covers_8h = product["capacity_wh"] >= watts * 8
+        candidates.append((not covers_8h, math.inf if price is None else price, -product["capacity_wh"], product, runtime))
+    candidates.sort(key=lambda candidate: candidate[:3])
+    return [
+        (product.get("name") or product.get("model"), round(runtime, 1) if math.isfinite(runtime) else None)
+        for *_, product, runtime in candidates[:top_k]
+    ]
+
+
+@pytest.mark.parametrize("housing_type", HOUSING)
+@pytest.mark.parametrize("watts", CONSUMPTIONS)
+def test_recommend_matches_scalar_loop(engine, housing_type, watts):
+    results = engine.recommend(housing_type, watts, top_k=3)
+    assert [(r["model"], r["runtime_hours"]) for r in results] == scalar_recommend(engine.products, housing_type, watts)
+    for result in results:
+        assert result["suitable"]
+        assert result["coverage_gap_6h_wh"] == 0
+
+
+def test_batch_matches_single_lead_calls(engine):
+    leads = [(housing, watts) for housing in HOUSING for watts in CONSUMPTIONS]
+    batch = engine.recommend_batch([h for h, _ in leads], [w for _, w in leads], top_k=5)
+    assert batch == [engine.recommend(h, w, top_k=5) for h, w in leads]
+
+
+def test_rank_batch_pads_with_minus_one():
+    engine = SizingEngine([
+        {"name": "small", "capacity_wh": 500, "best_for": "apartamento", "price": 300},
+        {"name": "big", "capacity_wh": 5000, "best_for": "casa", "price": "$4,999.00"}
+    ])
+    ranked = engine.rank_batch(["apartamento", "casa", "casa"], [50, 50, 10000], top_k=2)
+    assert ranked.tolist() == [[0, -1], [1, -1], [-1, -1]]
+
+
+def test_cheapest_eight_hour_product_ranks_first():
+    engine = SizingEngine([
+        {"name": "six-hours", "capacity_wh": 600, "price": 100},
+        {"name": "eight-hours-pricey", "capacity_wh": 900, "price": 900},
+        {"name": "eight-hours-cheap", "capacity_wh": 800, "price": 500},
+        {"name": "unpriced", "capacity_wh": 2000}
+    ])
+    assert [r["model"] for r in engine.recommend(None, 100, top_k=4)] == [
+        "eight-hours-cheap", "eight-hours-pricey", "unpriced", "six-hours"
+    ]
+    unpriced = engine.recommend(None, 100, top_k=4)[2]
+    assert unpriced["price"] is None and unpriced["price_per_wh"] is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    (999, 999.0),
+    ("$12,999.00", 12999.0),
+    ("$999 - $1,199", 999.0),
+    ("Consultar", None),
+    (None, None)
+])
+def test_parse_price(value, expected):
+    assert parse_price(value) == expected
+
+
+@pytest.mark.parametrize("watts", [0, -5])
+def test_recommend_tool_rejects_non_positive_consumption(watts):
+    from ghl_agent.tools.battery_tools import recommend_battery_system
+
+    result = recommend_battery_system.invoke({"housing_type": "casa", "total_consumption_watts": watts})
+    assert result["error"]
+    assert result["recommendations"] == []
+
+
+def test_zero_load_runtime_is_json_safe(engine):
+    assert all(result["runtime_hours"] is None for result in engine.recommend("casa", 0.0))
@@ -0,0 +1,103 @@
+import asyncio
+import operator
+import os
+from typing import Annotated
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.store.base import PutOp
+from typing_extensions import TypedDict
+
+pytest.importorskip("langgraph.checkpoint.sqlite")
+
+from ghl_agent.agent import checkpointing  # noqa: E402
+from ghl_agent.agent.sqlite_backend import (  # noqa: E402
+    ThreadedSqliteSaver,
+    ThreadedSqliteStore,
+    close_sqlite_backends,
+    get_sqlite_checkpointer_with_store
+)
+
+
+class ConversationState(TypedDict):
+    messages: Annotated[list, operator.add]
+
+
+def reply(state):
+    return {"messages": [AIMessage(content=f"respuesta {len(state['messages'])}")]}
+
+
+def build_graph(checkpointer):
+    schema = checkpointing.delta_state_schema(ConversationState, snapshot_every=2)
+    workflow = StateGraph(schema)
+    workflow.add_node("reply", reply)
+    workflow.add_edge(START, "reply")
+    workflow.add_edge("reply", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+CONFIG = {"configurable": {"thread_id": "thread-1"}}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "data" / "agent.sqlite")
+    close_sqlite_backends()
+
+
+def test_state_and_store_survive_reopen(db_path):
+    checkpointer, store = get_sqlite_checkpointer_with_store(db_path)
+    graph = build_graph(checkpointer)
+
+    async def write():
+        for turn in range(3):
+            await graph.ainvoke({"messages": [HumanMessage(content=f"mensaje {turn}")]}, CONFIG)
+        await store.abatch([PutOp(("memories", "contact-1"), f"m{i}", {"fact": i}) for i in range(3)])
+        return (await graph.aget_state(CONFIG)).values
+
+    values = asyncio.run(write())
+    assert len(values["messages"]) == 6
+    close_sqlite_backends()
+
+    reopened_checkpointer, reopened_store = get_sqlite_checkpointer_with_store(db_path)
+    assert reopened_checkpointer is not checkpointer
+    reopened = build_graph(reopened_checkpointer)
+
+    async def read():
+        history = [snapshot async for snapshot in reopened.aget_state_history(CONFIG)]
+        items = await reopened_store.asearch(("memories", "contact-1"))
+        return (await reopened.aget_state(CONFIG)).values, history, items
+
+    reopened_values, history, items = asyncio.run(read())
+    assert reopened_values == values
+    assert len(history) == 9  # input, loop and end checkpoint per turn
+    assert sorted(item.value["fact"] for item in items) == [0, 1, 2]
+
+    # The reopened thread keeps growing from where it was
+    asyncio.run(reopened.ainvoke({"messages": [HumanMessage(content="otra vez")]}, CONFIG))
+    assert len(reopened.get_state(CONFIG).values["messages"]) == 8
+
+
+def test_close_folds_the_wal_into_the_database(db_path):
+    checkpointer, _ = get_sqlite_checkpointer_with_store(db_path)
+    assert checkpointer.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    build_graph(checkpointer).invoke({"messages": [HumanMessage(content="hola")]}, CONFIG)
+
+    close_sqlite_backends()
+    wal = db_path + "-wal"
+    assert not os.path.exists(wal) or os.path.getsize(wal) == 0
+
+
+def test_backends_are_shared_per_path(db_path, tmp_path):
+    checkpointer, store = get_sqlite_checkpointer_with_store(db_path)
+    assert isinstance(checkpointer, ThreadedSqliteSaver) and isinstance(store, ThreadedSqliteStore)
+    assert get_sqlite_checkpointer_with_store(db_path) == (checkpointer, store)
+    assert get_sqlite_checkpointer_with_store(str(tmp_path / "other.sqlite"))[0] is not checkpointer
+
+
+def test_sqlite_path_selects_the_backend(db_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", db_path)
+    checkpointer, store = checkpointing.get_checkpointer_with_store()
+    assert (checkpointer, store) == get_sqlite_checkpointer_with_store(db_path)
+    assert asyncio.run(checkpointing.get_async_checkpointer_with_store()) == (checkpointer, store)
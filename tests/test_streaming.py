@@ -0,0 +1,78 @@
+import asyncio
+
+from ghl_agent.agent.graph import stream_graph_updates
+from ghl_agent.fakes import REFLECTION_ANSWER, ScriptedChatModel, installed_fakes
+
+
+def _text_responder(messages):
+    from langchain_core.messages import AIMessage, SystemMessage
+
+    if isinstance(messages[0], SystemMessage) and "SENTIMIENTO:" in messages[0].content:
+        return AIMessage(content=REFLECTION_ANSWER)
+    return AIMessage(content="Hola, te ayudo con tu batería")
+
+
+def _collect(state):
+    async def run():
+        return [event async for event in stream_graph_updates(state)]
+    return asyncio.run(run())
+
+
+def test_only_agent_tokens_are_streamed():
+    with installed_fakes(model=ScriptedChatModel(responder=_text_responder)):
+        # Every fifth message (system prompt included) triggers reflection, which calls the model too
+        events = _collect({
+            "messages": [{"role": "human", "content": text} for text in ("Hola", "Vivo en casa", "Tengo nevera", "¿Precio?")],
+            "contact_id": "contact-stream",
+            "conversation_id": "conversation-stream"
+        })
+
+    tokens = [event for event in events if event["event"] == "token"]
+    assert tokens
+    assert {event["node"] for event in tokens} == {"agent"}
+    assert "SENTIMIENTO" not in "".join(event["content"] for event in tokens)
+
+
+def test_sse_run_input_carries_location_id(monkeypatch):
+    from ghl_agent import custom_app
+    from ghl_agent.agent import graph as graph_module
+
+    seen = {}
+
+    async def fake_stream(state, run_config=None):
+        seen.update(state)
+        yield {"event": "run_end"}
+
+    monkeypatch.setattr(graph_module, "stream_graph_updates", fake_stream)
+
+    async def run():
+        return [frame async for frame in custom_app._stream_run_events("contact-1", "conversation-1", "Hola", "location-1")]
+
+    frames = asyncio.run(run())
+    assert frames[-1].startswith("event: run_end")
+    assert seen["location_id"] == "location-1"
+
+
+def test_escalated_draft_tokens_are_not_streamed(monkeypatch):
+    from langchain_core.messages import AIMessage, SystemMessage
+
+    from ghl_agent.agent import model_tiers
+
+    answers = iter(["borrador descartado", "respuesta final"])
+
+    def responder(messages):
+        if isinstance(messages[0], SystemMessage) and "SENTIMIENTO:" in messages[0].content:
+            return AIMessage(content=REFLECTION_ANSWER)
+        return AIMessage(content=next(answers, "respuesta final"))
+
+    monkeypatch.setattr(model_tiers, "estimate_confidence", lambda response: 0.0 if "borrador" in response.content else 1.0)
+    with installed_fakes(model=ScriptedChatModel(responder=responder)):
+        events = _collect({
+            "messages": [{"role": "human", "content": "Hola"}],
+            "contact_id": "contact-escalation",
+            "conversation_id": "conversation-escalation"
+        })
+
+    streamed = "".join(event["content"] for event in events if event["event"] == "token")
+    assert "respuesta final" in streamed
+    assert "borrador" not in streamed
@@ -0,0 +1,79 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from ghl_agent.agent import graph as graph_module
+from ghl_agent.agent.graph import build_system_prompt, get_conversation_stage, tools
+from ghl_agent.agent.tool_exposure import StageToolStats, tools_for_stage
+
+TOOL_NAMES = {tool.name for tool in tools}
+
+# One state per branch of get_conversation_stage
+STAGE_STATES = {
+    "discovery": {},
+    "qualification": {"housing_type": "casa"},
+    "recommendation": {"housing_type": "casa", "total_consumption": 450.0},
+    "scheduling": {"housing_type": "casa", "total_consumption": 450.0, "interested_in_consultation": True},
+    "completed": {"housing_type": "casa", "total_consumption": 450.0, "customer_phone": "+17875550100"}
+}
+
+# Tools each stage's step of the conversation flow needs
+STAGE_FLOW_TOOLS = {
+    "discovery": {"calculate_battery_runtime"},
+    "qualification": {"calculate_battery_runtime", "recommend_battery_system"},
+    "recommendation": {
+        "calculate_battery_runtime",
+        "recommend_battery_system",
+        "format_consultation_request",
+        "get_available_calendar_slots",
+        "book_ghl_appointment"
+    },
+    "scheduling": {"format_consultation_request", "get_available_calendar_slots", "book_ghl_appointment"},
+    "completed": {"get_available_calendar_slots", "book_ghl_appointment"}
+}
+
+
+def test_stage_states_cover_every_stage():
+    assert {stage: get_conversation_stage(state) for stage, state in STAGE_STATES.items()} == {
+        stage: stage for stage in STAGE_STATES
+    }
+
+
+@pytest.mark.parametrize("stage", sorted(STAGE_STATES))
+def test_stage_exposes_tools_the_prompt_refers_to(stage):
+    exposed = tools_for_stage(stage)
+    assert exposed is not None, f"{stage} missing from stage_tools"
+    assert set(exposed) <= TOOL_NAMES
+    prompt_tools = {name for name in TOOL_NAMES if name in build_system_prompt()}
+    assert prompt_tools, "system prompt names no tools"
+    assert prompt_tools <= set(exposed)
+    assert STAGE_FLOW_TOOLS[stage] <= set(exposed)
+
+
+def test_stage_tool_map_has_no_unreachable_stages():
+    from ghl_agent.config_loader import get_config
+
+    assert set(get_config().stage_tools) <= set(STAGE_STATES)
+
+
+def test_stage_tool_stats_are_served_to_admins(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from ghl_agent.admin import create_admin_router
+
+    stats = StageToolStats(tools)
+    exposed = tools_for_stage("recommendation")
+    stats.record("recommendation", exposed, AIMessage(
+        content="",
+        tool_calls=[{"name": "recommend_battery_system", "args": {}, "id": "call-1"}]
+    ))
+    monkeypatch.setattr(graph_module, "stage_tool_stats", stats)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(create_admin_router())
+
+    response = TestClient(app).get("/admin/stats/tool-exposure", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    snapshot = response.json()["recommendation"]
+    assert snapshot["tools_exposed"] == len(exposed)
+    assert snapshot["calls_by_tool"] == {"recommend_battery_system": 1}
+    assert snapshot["schema_tokens_saved"] > 0
@@ -0,0 +1,52 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from ghl_agent.agent import graph as graph_module
+from ghl_agent.agent.graph import READ_ONLY_TOOLS, custom_tool_node, tools
+
+
+def _run_tool_calls(monkeypatch, names):
+    """Run one tool node step over fake tools, returning (events, tool messages)"""
+    events = []
+
+    async def fake_execute(tool_call, contact_id, conversation_id, stage=None):
+        events.append(("start", tool_call["id"]))
+        await asyncio.sleep(0.01)
+        events.append(("end", tool_call["id"]))
+        return ToolMessage(content="ok", tool_call_id=tool_call["id"])
+
+    monkeypatch.setattr(graph_module, "_execute_tool_call", fake_execute)
+    message = AIMessage(content="", tool_calls=[
+        {"name": name, "args": {}, "id": f"{index}-{name}"} for index, name in enumerate(names)
+    ])
+    result = asyncio.run(custom_tool_node({"messages": [message], "contact_id": "contact-1"}))
+    return events, result["messages"]
+
+
+def test_read_only_tools_are_real_tools():
+    assert READ_ONLY_TOOLS <= {tool.name for tool in tools}
+
+
+def test_writing_tools_never_overlap_and_keep_call_order(monkeypatch):
+    writes = ["update_ghl_contact", "send_ghl_message", "update_conversation_state", "book_ghl_appointment"]
+    events, messages = _run_tool_calls(monkeypatch, writes)
+
+    write_events = [event for event in events if event[1].split("-", 1)[1] in writes]
+    assert write_events == [
+        (kind, f"{index}-{name}") for index, name in enumerate(writes) for kind in ("start", "end")
+    ]
+    assert [m.tool_call_id for m in messages] == [f"{index}-{name}" for index, name in enumerate(writes)]
+
+
+def test_read_only_tools_run_concurrently(monkeypatch):
+    reads = ["get_ghl_contact_info", "get_conversation_messages", "get_available_calendar_slots"]
+    events, _ = _run_tool_calls(monkeypatch, reads)
+
+    # Every read starts before the first one finishes
+    assert [kind for kind, _ in events[:len(reads)]] == ["start"] * len(reads)
+
+
+def test_unknown_tools_are_treated_as_writes(monkeypatch):
+    events, _ = _run_tool_calls(monkeypatch, ["new_crm_tool", "update_ghl_contact"])
+    assert [kind for kind, _ in events] == ["start", "end", "start", "end"]
@@ -0,0 +1,197 @@
+import asyncio
+
+import pytest
+from langgraph.store.memory import InMemoryStore
+
+from ghl_agent import usage as usage_module
+from ghl_agent.config_loader import ModelTierConfig, get_config
+from ghl_agent.usage import BUDGET_DOWNGRADE, BUDGET_TEMPLATE, UsageLedger, UsageScope, usage_cost, usage_day
+
+SCOPE = UsageScope("tenant-1", "contact-1", "qualification")
+USAGE = {"input_tokens": 1000, "output_tokens": 200, "input_token_details": {"cache_read": 400}}
+
+
+@pytest.fixture
+def prices(monkeypatch):
+    tiers = {
+        "priced": ModelTierConfig(name="priced", input_cost_per_1k=0.01, output_cost_per_1k=0.03, cached_input_cost_per_1k=0.005),
+        "uncached": ModelTierConfig(name="uncached", input_cost_per_1k=0.01, output_cost_per_1k=0.03)
+    }
+    monkeypatch.setattr(usage_module, "price_for", tiers.get)
+
+
+def with_usage_config(monkeypatch, **updates):
+    config = get_config()
+    usage = config.usage.model_copy(update={
+        "budgets": config.usage.budgets.model_copy(update=updates.pop("budgets", {})),
+        **updates
+    })
+    monkeypatch.setattr(usage_module, "get_config", lambda: config.model_copy(update={"usage": usage}))
+
+
+def test_usage_cost_prices_cached_tokens_separately(prices):
+    assert usage_cost("priced", 1000, 200, 400) == pytest.approx(0.6 * 0.01 + 0.4 * 0.005 + 0.2 * 0.03)
+    assert usage_cost("priced", 1000, 200) == pytest.approx(0.01 + 0.2 * 0.03)
+
+
+def test_usage_cost_without_cached_price_uses_input_price(prices):
+    assert usage_cost("uncached", 1000, 200, 400) == pytest.approx(usage_cost("uncached", 1000, 200))
+
+
+def test_unknown_model_is_free(prices):
+    assert usage_cost("unknown", 1000, 200, 400) == 0.0
+
+
+def test_flush_merges_into_existing_items(prices):
+    store = InMemoryStore()
+    ledger = UsageLedger(store)
+    day = usage_day()
+    namespace = ("usage", SCOPE.tenant, day)
+    store.put(namespace, "contact-1|qualification|priced", {
+        "input_tokens": 10, "output_tokens": 5, "cached_tokens": 0, "calls": 1, "cost_usd": 1.0
+    })
+
+    ledger.record("priced", USAGE, SCOPE)
+    ledger.record("priced", USAGE, SCOPE)
+    ledger.record("uncached", USAGE, SCOPE)
+    assert asyncio.run(ledger.flush()) == 2
+    assert asyncio.run(ledger.flush()) == 0
+
+    merged = store.get(namespace, "contact-1|qualification|priced").value
+    assert {field: merged[field] for field in ("input_tokens", "output_tokens", "cached_tokens", "calls")} == {
+        "input_tokens": 2010, "output_tokens": 405, "cached_tokens": 800, "calls": 3
+    }
+    assert merged["cost_usd"] == pytest.approx(1.0 + 2 * usage_cost("priced", 1000, 200, 400))
+    assert store.get(namespace, "contact-1|qualification|uncached").value["calls"] == 1
+
+    report = asyncio.run(ledger.report(SCOPE.tenant, day))
+    assert report["totals"]["calls"] == 4
+    assert set(report["by_model"]) == {"priced", "uncached"}
+
+
+def test_failed_flush_keeps_deltas(prices):
+    class FailingStore(InMemoryStore):
+        fail = True
+
+        async def abatch(self, ops):
+            if self.fail:
+                raise ConnectionError("store down")
+            return await super().abatch(ops)
+
+    store = FailingStore()
+    ledger = UsageLedger(store)
+    ledger.record("priced", USAGE, SCOPE)
+    assert asyncio.run(ledger.flush()) == 0
+
+    store.fail = False
+    ledger.record("priced", USAGE, SCOPE)
+    assert asyncio.run(ledger.flush()) == 1
+    assert store.get(("usage", SCOPE.tenant, usage_day()), "contact-1|qualification|priced").value["calls"] == 2
+
+
+def test_budgets_count_stored_and_unflushed_usage(prices, monkeypatch):
+    with_usage_config(monkeypatch, budgets={"contact_daily_tokens": 2000, "tenant_daily_cost_usd": 0.05})
+    store = InMemoryStore()
+    ledger = UsageLedger(store)
+    store.put(("usage", SCOPE.tenant, usage_day()), "contact-1|qualification|priced", {
+        "input_tokens": 500, "output_tokens": 100, "cached_tokens": 0, "calls": 1, "cost_usd": 0.0
+    })
+
+    async def scenario():
+        ledger.record("priced", USAGE, SCOPE)  # before the day is seeded: picked up from pending
+        assert await ledger.budget_action(SCOPE.tenant, "contact-1") is None
+        assert await ledger.budget_action(SCOPE.tenant, "contact-2") is None
+        ledger.record("priced", USAGE, SCOPE)
+        assert await ledger.budget_action(SCOPE.tenant, "contact-1") == BUDGET_DOWNGRADE
+        await ledger.flush()
+        assert await ledger.budget_action(SCOPE.tenant, "contact-1") == BUDGET_DOWNGRADE
+        for _ in range(3):
+            ledger.record("priced", USAGE, SCOPE._replace(contact_id="contact-3"))
+        assert await ledger.budget_action(SCOPE.tenant, "contact-2") == BUDGET_TEMPLATE
+
+    asyncio.run(scenario())
+
+
+def test_budget_action_respects_usage_enabled(prices, monkeypatch):
+    with_usage_config(monkeypatch, enabled=False, budgets={"contact_daily_tokens": 0, "tenant_daily_cost_usd": 0.0})
+
+    class UnusedStore(InMemoryStore):
+        async def asearch(self, *args, **kwargs):
+            raise AssertionError("store read while usage accounting is disabled")
+
+    ledger = UsageLedger(UnusedStore())
+    assert asyncio.run(ledger.budget_action(SCOPE.tenant, "contact-1")) is None
+
+
+def test_over_budget_turn_without_configured_template_gets_the_default(fakes, monkeypatch):
+    from langchain_core.messages import HumanMessage
+
+    from ghl_agent.agent import graph as graph_module
+    from ghl_agent.config_loader import DEFAULT_BUDGET_EXCEEDED_TEMPLATE
+
+    with_usage_config(monkeypatch, budgets={"tenant_daily_cost_usd": 0.0})
+    config = get_config()
+    templates = {name: text for name, text in config.templates.items() if name != "budget_exceeded"}
+    monkeypatch.setattr(graph_module, "get_config", lambda: config.model_copy(update={"templates": templates}))
+    monkeypatch.setattr(usage_module, "usage_ledger", UsageLedger(InMemoryStore()))
+    monkeypatch.setattr(graph_module, "usage_ledger", usage_module.usage_ledger)
+
+    result = asyncio.run(graph_module.get_graph().ainvoke({
+        "messages": [HumanMessage(content="Hola")],
+        "contact_id": "contact-budget",
+        "conversation_id": "conversation-budget",
+        "location_id": "tenant-budget"
+    }))
+    assert result["response"] == DEFAULT_BUDGET_EXCEEDED_TEMPLATE
+    assert fakes["ghl"].sent_messages[-1]["message"] == DEFAULT_BUDGET_EXCEEDED_TEMPLATE
+
+
+def test_first_use_starts_the_flusher_without_the_app_lifespan(prices, monkeypatch):
+    with_usage_config(monkeypatch, flush_interval_seconds=0.01)
+    store = InMemoryStore()
+    ledger = UsageLedger(store)
+    ledger.record("priced", USAGE, SCOPE)  # no event loop: nothing to start
+    assert ledger._flusher is None
+
+    async def scenario():
+        ledger.record("priced", USAGE, SCOPE)
+        flusher = ledger._flusher
+        ledger.record("priced", USAGE, SCOPE)
+        assert ledger._flusher is flusher
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if store.search(("usage", SCOPE.tenant, usage_day())):
+                break
+
+    asyncio.run(scenario())
+    assert store.get(("usage", SCOPE.tenant, usage_day()), "contact-1|qualification|priced").value["calls"] == 3
+
+
+def test_delimiters_in_ids_do_not_shift_fields(prices, monkeypatch):
+    with_usage_config(monkeypatch, budgets={"contact_daily_tokens": 1000})
+    store = InMemoryStore()
+    ledger = UsageLedger(store)
+    tricky = SCOPE._replace(contact_id="contact|1%7C", stage="a|b")
+
+    async def scenario():
+        ledger.record("priced", USAGE, tricky)
+        await ledger.flush()
+        fresh = UsageLedger(store)  # seeds from the store only
+        return (
+            await ledger.report(SCOPE.tenant),
+            await fresh.budget_action(SCOPE.tenant, "contact|1%7C"),
+            await fresh.budget_action(SCOPE.tenant, "contact")
+        )
+
+    report, tricky_action, other_action = asyncio.run(scenario())
+    [row] = report["rows"]
+    assert (row["contact_id"], row["stage"], row["model"]) == ("contact|1%7C", "a|b", "priced")
+    assert set(report["by_contact"]) == {"contact|1%7C"}
+    assert (tricky_action, other_action) == (BUDGET_DOWNGRADE, None)
+
+
+def test_items_without_fields_are_read_from_the_key(prices):
+    store = InMemoryStore()
+    store.put(("usage", SCOPE.tenant, usage_day()), "contact-1|qualification|priced", {"calls": 2, "cost_usd": 0.5})
+    report = asyncio.run(UsageLedger(store).report(SCOPE.tenant))
+    assert report["by_stage"]["qualification"]["calls"] == 2
@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import HumanMessage
+
+from ghl_agent import fakes as fakes_module
+from ghl_agent.fakes import FakeGHL, ScriptedChatModel, default_responder, installed_fakes
+from ghl_agent.tools.ghl_tools import GHLClient
+from ghl_agent.warmup import _dry_run, warmup_status
+
+
+@pytest.fixture
+def warming_up():
+    warmup_status.begin()
+    try:
+        yield warmup_status
+    finally:
+        warmup_status.finish()
+
+
+def test_dry_run_does_not_touch_live_model_client_or_stats():
+    from ghl_agent.agent.graph import get_graph, stage_tool_stats
+    from ghl_agent.agent.model_tiers import tier_stats
+    from ghl_agent.metrics import METRICS_ENABLED, render_metrics
+
+    def agent_metrics():
+        return [line for line in render_metrics()[0].decode().splitlines() if line.startswith("ghl_agent_")]
+
+    seen_contacts = []
+
+    def responder(messages):
+        seen_contacts.append(fakes_module._contact_id(messages))
+        return default_responder(messages)
+
+    live_ghl = FakeGHL(latency_seconds=0.01)
+    with installed_fakes(model=ScriptedChatModel(responder=responder, latency_seconds=0.01), ghl=live_ghl):
+        async def live_turn():
+            await get_graph().ainvoke({
+                "messages": [HumanMessage(content="Hola, vivo en apartamento")],
+                "contact_id": "live-contact",
+                "conversation_id": "live-conversation"
+            })
+
+        async def both():
+            await asyncio.gather(live_turn(), _dry_run())
+
+        asyncio.run(both())
+
+        assert "warmup-contact" not in seen_contacts
+        assert live_ghl.sent_messages
+        assert {message["contact_id"] for message in live_ghl.sent_messages} == {"live-contact"}
+
+        # A dry run on its own records nothing
+        tiers, stages = tier_stats.snapshot(), stage_tool_stats.snapshot()
+        metrics_before = agent_metrics() if METRICS_ENABLED else None
+        asyncio.run(_dry_run())
+        assert tier_stats.snapshot() == tiers
+        assert stage_tool_stats.snapshot() == stages
+        if METRICS_ENABLED:
+            assert agent_metrics() == metrics_before
+
+
+@pytest.mark.parametrize("path", ["/webhook/ghl", "/agent/stream"])
+def test_agent_endpoints_answer_503_while_warming_up(warming_up, path):
+    from ghl_agent.custom_app import app
+
+    client = TestClient(app)
+    response = client.post(path, json={"contact_id": "c1", "message": "hola"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert client.get("/health").status_code == 503
+
+    warming_up.finish()
+    assert client.post("/agent/stream", json={}).status_code == 400
+
+
+def test_use_transport_closes_replaced_clients_on_aclose():
+    async def scenario():
+        ghl = GHLClient(transport=FakeGHL().transport())
+        replaced = ghl.client
+        ghl.use_transport(httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+        assert ghl.client is not replaced
+        await ghl.aclose()
+        assert replaced.is_closed
+
+    asyncio.run(scenario())